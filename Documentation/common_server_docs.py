@@ -20,7 +20,9 @@ jsPrivateFuncs = ["dqQueryBuilder", "toArray", "indent", "formatTableValuesRecur
 pyPrivateFuncs = ["raiseTable", "zoomField", "epochToTimestamp", "formatTimeColumns", "strip_tag", "elem_to_internal",
                   "internal_to_elem", "json2elem", "elem2json", "json2xml", "OrderedDict", "datetime", "timedelta",
                   "createContextSingle", "IntegrationLogger", "tblToMd", "DemistoException", "BaseClient",
-                  "BaseHTTPClient", "DemistoHandler", "DebugLogger"]
+                  "BaseHTTPClient", "DemistoHandler", "DebugLogger", "_LazyModule", "_is_module_available",
+                  "_join_md_parts", "ContextBuilder", "_xml_source", "_iterparse_internal",
+                  "deque"]
 
 pyIrregularFuncs = {"LOG": {"argList": ["message"]}}
 
@@ -6,7 +6,7 @@ from CommonServerUserPython import *
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 import uuid
-import json
+import time
 import requests
 
 
@@ -128,7 +128,7 @@ def http_request(uri: str, method: str, headers: Dict = {},
     if params.get('type') == 'export':
         return result
 
-    json_result = json.loads(xml2json(result.text))
+    json_result = xml2dict(result.text)
 
     # handle non success
     if json_result['response']['@status'] != 'success':
@@ -2742,7 +2742,7 @@ def panorama_list_pcaps_command():
 
     result = http_request(URL, 'GET', params=params)
 
-    json_result = json.loads(xml2json(result.text))['response']
+    json_result = xml2dict(result.text)['response']
     if json_result['@status'] != 'success':
         return_error('Request to get list of Pcaps Failed.\nStatus code: ' + str(
             json_result['response']['@code']) + '\nWith message: ' + str(json_result['response']['msg']['line']))
@@ -3631,7 +3631,7 @@ def build_logs_query(address_src=None, address_dst=None,
 @logger
 def panorama_query_logs(log_type, number_of_logs, query, address_src, address_dst,
                         zone_src, zone_dst, time_generated, action,
-                        port_dst, rule, url, filedigest):
+                        port_dst, rule, url, filedigest, skip=None):
     params = {
         'type': 'log',
         'log-type': log_type,
@@ -3651,6 +3651,8 @@ def panorama_query_logs(log_type, number_of_logs, query, address_src, address_ds
                                            port_dst, rule, url, filedigest)
     if number_of_logs:
         params['nlogs'] = number_of_logs
+    if skip:
+        params['skip'] = skip
 
     result = http_request(
         URL,
@@ -3661,12 +3663,11 @@ def panorama_query_logs(log_type, number_of_logs, query, address_src, address_ds
     return result
 
 
-def panorama_query_logs_command():
+def get_query_logs_args():
     """
-    Query logs
+    Gets the arguments of the logs query, which the logs query commands share
     """
     log_type = demisto.args().get('log-type')
-    number_of_logs = demisto.args().get('number_of_logs')
     query = demisto.args().get('query')
     address_src = demisto.args().get('addr-src')
     address_dst = demisto.args().get('addr-dst')
@@ -3685,10 +3686,26 @@ def panorama_query_logs_command():
                   or time_generated or action or port_dst or rule or url or filedigest):
         return_error('Use the free query argument or the fixed search parameters arguments to build your query')
 
-    result = panorama_query_logs(log_type, number_of_logs, query, address_src, address_dst,
-                                 zone_src, zone_dst, time_generated, action,
-                                 port_dst, rule, url, filedigest)
+    return {
+        'log_type': log_type,
+        'query': query,
+        'address_src': address_src,
+        'address_dst': address_dst,
+        'zone_src': zone_src,
+        'zone_dst': zone_dst,
+        'time_generated': time_generated,
+        'action': action,
+        'port_dst': port_dst,
+        'rule': rule,
+        'url': url,
+        'filedigest': filedigest
+    }
+
 
+def check_query_logs_result(result):
+    """
+    Checks that the logs query job was created
+    """
     if result['response']['@status'] == 'error':
         if 'msg' in result['response'] and 'line' in result['response']['msg']:
             message = '. Reason is: ' + result['response']['msg']['line']
@@ -3699,6 +3716,18 @@ def panorama_query_logs_command():
     if 'response' not in result or 'result' not in result['response'] or 'job' not in result['response']['result']:
         return_error('Missing JobID in response')
 
+
+def panorama_query_logs_command():
+    """
+    Query logs
+    """
+    query_logs_args = get_query_logs_args()
+    log_type = query_logs_args['log_type']
+    number_of_logs = demisto.args().get('number_of_logs')
+
+    result = panorama_query_logs(number_of_logs=number_of_logs, **query_logs_args)
+    check_query_logs_result(result)
+
     query_logs_output = {
         'JobID': result['response']['result']['job'],
         'Status': 'Pending',
@@ -3904,6 +3933,152 @@ def panorama_get_logs_command():
             })
 
 
+# the range of the number of logs of a single PAN-OS logs query (nlogs)
+LOGS_QUERY_MIN_PAGE_SIZE = 20
+LOGS_QUERY_MAX_PAGE_SIZE = 5000
+LOGS_JOB_MIN_POLLING_INTERVAL = 1  # seconds
+LOGS_JOB_MAX_POLLING_INTERVAL = 10  # seconds
+
+
+def panorama_stream_logs_job(job_id, tag):
+    """
+    Gets a logs query job, and streams the elements of the given tag from the response (e.g. the job status or the
+    log entries), parsing them one at a time while the response is downloaded. Closing the generator closes the
+    response. The message of a failed request (e.g. of an invalid job ID) is streamed as well, to report it as
+    http_request does.
+    """
+    LOG('calling panorama_stream_logs_job({}, {})'.format(job_id, tag))
+    params = {
+        'action': 'get',
+        'type': 'log',
+        'job-id': job_id,
+        'key': API_KEY
+    }
+
+    result = requests.request(
+        'GET',
+        URL,
+        verify=USE_SSL,
+        params=params,
+        stream=True
+    )
+    try:
+        if result.status_code < 200 or result.status_code >= 300:
+            return_error('Request Failed. with status: ' + str(result.status_code) + '. Reason is: '
+                         + str(result.reason))
+
+        result.raw.decode_content = True
+        for element in iter_xml_elements(result.raw, (tag, 'msg')):
+            if 'msg' in element:
+                msg = element['msg']
+                line = str(msg.get('line', msg) if isinstance(msg, dict) else msg)
+                if line.find('job') != -1 and (line.find('not found') != -1 or line.find('No such query job') != -1):
+                    return_error('Invalid Job ID error: ' + line)
+                return_error('Request Failed.\nWith message: ' + line)
+
+            yield element[tag]
+    finally:
+        result.close()
+
+
+def panorama_wait_for_logs_job(job_id, timeout):
+    """
+    Polls the status of a logs query job, with a growing interval, until the job is finished
+    """
+    interval = LOGS_JOB_MIN_POLLING_INTERVAL
+    deadline = time.time() + timeout
+    while True:
+        job_stream = panorama_stream_logs_job(job_id, 'job')
+        try:
+            job = next(job_stream, None)
+        finally:
+            # the job status precedes the logs, which are not downloaded
+            job_stream.close()
+
+        if not job or 'status' not in job:
+            return_error('Missing JobID status in response')
+        if job['status'] == 'FIN':
+            return
+
+        if time.time() + interval > deadline:
+            return_error(f'The logs query job {job_id} did not finish in {timeout} seconds')
+        time.sleep(interval)
+        interval = min(interval * 2, LOGS_JOB_MAX_POLLING_INTERVAL)
+
+
+def panorama_get_logs_page(job_id, max_logs):
+    """
+    Gets the logs of a finished logs query job, at most max_logs of them
+    """
+    pretty_logs = []
+    logs_stream = panorama_stream_logs_job(job_id, 'entry')
+    try:
+        for log in logs_stream:
+            if len(pretty_logs) == max_logs:
+                break
+            pretty_logs.append(prettify_log(log))
+    finally:
+        logs_stream.close()
+
+    return pretty_logs
+
+
+def panorama_query_logs_stream_command():
+    """
+    Query logs, and get them page by page. Each page is queried by a separate job (skipping the logs of the previous
+    pages), which is polled until it is finished. Then its logs are parsed one at a time while they are downloaded,
+    and returned in an entry of the page, so only a single page is kept in memory.
+    """
+    query_logs_args = get_query_logs_args()
+    log_type = query_logs_args['log_type']
+    number_of_logs = int(demisto.args().get('number_of_logs') or 1000)
+    page_size = min(int(demisto.args().get('page_size') or 1000), LOGS_QUERY_MAX_PAGE_SIZE)
+    timeout = int(demisto.args().get('timeout') or 120)
+    ignore_auto_extract = demisto.args().get('ignore_auto_extract') == 'true'
+
+    logs_count = 0
+    page = 0
+    while logs_count < number_of_logs:
+        page_logs = min(page_size, number_of_logs - logs_count)
+        result = panorama_query_logs(number_of_logs=max(page_logs, LOGS_QUERY_MIN_PAGE_SIZE), skip=logs_count,
+                                     **query_logs_args)
+        check_query_logs_result(result)
+        job_id = result['response']['result']['job']
+
+        panorama_wait_for_logs_job(job_id, timeout)
+        pretty_logs = panorama_get_logs_page(job_id, page_logs)
+        if not pretty_logs:
+            break
+
+        page += 1
+        logs_count += len(pretty_logs)
+        query_logs_output = {
+            'JobID': job_id,
+            'Status': 'Completed',
+            'LogType': log_type,
+            'Page': page,
+            'Logs': pretty_logs
+        }
+        demisto.results({
+            'Type': entryTypes['note'],
+            'ContentsFormat': formats['json'],
+            'Contents': pretty_logs,
+            'ReadableContentsFormat': formats['markdown'],
+            'HumanReadable': tableToMarkdown(f'Query {log_type} Logs (page {page}):', pretty_logs,
+                                             ['TimeGenerated', 'SourceAddress', 'DestinationAddress', 'Application',
+                                              'Action', 'Rule', 'URLOrFilename'], removeNull=True),
+            'IgnoreAutoExtract': ignore_auto_extract,
+            'EntryContext': {"Panorama.Monitor(val.JobID == obj.JobID)": query_logs_output}
+        })
+
+        if len(pretty_logs) < page_logs:
+            # the last page
+            break
+
+    if logs_count == 0:
+        demisto.results('No ' + log_type + ' logs matched the query')
+
+
 ''' EXECUTION '''
 
 
@@ -4088,6 +4263,9 @@ def main():
         elif demisto.command() == 'panorama-get-logs':
             panorama_get_logs_command()
 
+        elif demisto.command() == 'panorama-query-logs-stream':
+            panorama_query_logs_stream_command()
+
         # Pcaps
         elif demisto.command() == 'panorama-list-pcaps':
             panorama_list_pcaps_command()
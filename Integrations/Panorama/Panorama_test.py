@@ -1,3 +1,4 @@
+import io
 import pytest
 
 import demistomock as demisto
@@ -158,3 +159,82 @@ def test_prettify_logs():
                 {'Action': 'my_action2', 'CategoryOrVerdict': 'my_category2', 'Rule': 'my_rule2',
                  'NATDestinationPort': '101'}]
     assert response == expected
+
+
+class MockStreamResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.reason = 'OK'
+        self.raw = io.BytesIO(content.encode('utf-8'))
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def get_logs_job_response(status, entries=()):
+    logs = ''.join('<entry logid="{}"><src>{}</src><action>allow</action></entry>'.format(index, src)
+                   for index, src in enumerate(entries))
+    return '<response status="success"><result><job><id>1</id><status>{}</status></job>' \
+           '<log><logs count="{}" progress="100">{}</logs></log></result></response>'.format(status, len(entries), logs)
+
+
+def test_panorama_wait_for_logs_job(mocker):
+    import Panorama
+    responses = [MockStreamResponse(get_logs_job_response('ACT')), MockStreamResponse(get_logs_job_response('FIN'))]
+    mocker.patch.object(Panorama.requests, 'request', side_effect=responses)
+    sleep = mocker.patch.object(Panorama.time, 'sleep')
+    Panorama.panorama_wait_for_logs_job('1', 120)
+    assert sleep.call_count == 1
+    assert all(response.closed for response in responses)
+
+
+@pytest.mark.parametrize('response, error', [
+    ('<response status="error"><msg><line>Query job 1 not found</line></msg></response>',
+     'Invalid Job ID error: Query job 1 not found'),
+    ('<response status="error" code="403"><result><msg>Invalid credentials.</msg></result></response>',
+     'Request Failed.\nWith message: Invalid credentials.'),
+])
+def test_panorama_wait_for_logs_job_error(mocker, response, error):
+    import Panorama
+    response = MockStreamResponse(response)
+    mocker.patch.object(Panorama.requests, 'request', return_value=response)
+    return_error = mocker.patch.object(Panorama, 'return_error', side_effect=SystemExit)
+    with pytest.raises(SystemExit):
+        Panorama.panorama_wait_for_logs_job('1', 120)
+    return_error.assert_called_once_with(error)
+    assert response.closed
+
+
+def test_panorama_get_logs_page(mocker):
+    import Panorama
+    response = MockStreamResponse(get_logs_job_response('FIN', ['1.1.1.1', '2.2.2.2', '3.3.3.3']))
+    mocker.patch.object(Panorama.requests, 'request', return_value=response)
+    pretty_logs = Panorama.panorama_get_logs_page('1', 2)
+    assert pretty_logs == [{'SourceAddress': '1.1.1.1', 'Action': 'allow'},
+                           {'SourceAddress': '2.2.2.2', 'Action': 'allow'}]
+    assert response.closed
+
+
+def test_panorama_query_logs_stream_command(mocker):
+    import Panorama
+    mocker.patch.object(demisto, 'args', return_value={'log-type': 'traffic', 'query': 'action eq allow',
+                                                       'number_of_logs': '100', 'page_size': '2'})
+    query_logs = mocker.patch.object(Panorama, 'panorama_query_logs', side_effect=[
+        {'response': {'@status': 'success', 'result': {'job': '1'}}},
+        {'response': {'@status': 'success', 'result': {'job': '2'}}}
+    ])
+    mocker.patch.object(Panorama.requests, 'request', side_effect=[
+        MockStreamResponse(get_logs_job_response('FIN')),
+        MockStreamResponse(get_logs_job_response('FIN', ['1.1.1.1', '2.2.2.2'])),
+        MockStreamResponse(get_logs_job_response('FIN')),
+        MockStreamResponse(get_logs_job_response('FIN', ['3.3.3.3']))
+    ])
+    results = mocker.patch.object(demisto, 'results')
+    Panorama.panorama_query_logs_stream_command()
+
+    # each page is queried by its own job, skipping the logs of the previous pages
+    assert [call[1]['skip'] for call in query_logs.call_args_list] == [0, 2]
+    assert [call[1]['number_of_logs'] for call in query_logs.call_args_list] == [20, 20]
+    pages = [call[0][0]['EntryContext']['Panorama.Monitor(val.JobID == obj.JobID)'] for call in results.call_args_list]
+    assert [(page['JobID'], page['Page'], len(page['Logs'])) for page in pages] == [('1', 1, 2), ('2', 2, 1)]
@@ -5,6 +5,9 @@ import subprocess
 import time
 import tempfile
 import sys
+import os
+import glob
+import socket
 
 
 def assert_results_ok():
@@ -53,3 +56,165 @@ def test_socks_proxy(mocker, request):
     assert_results_ok()
     tmp.seek(0)
     assert 'connected to' in tmp.read()  # make sure we went through microsocks
+
+
+def test_whois_cache(mocker):
+    responses = {
+        ('whois.verisign-grs.com', '=example.com'):
+            'Domain Name: EXAMPLE.COM\nRegistrar WHOIS Server: whois.iana.org\n',
+        ('whois.iana.org', 'example.com'): 'domain: EXAMPLE.COM\n'
+    }
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '1', 'cache_size': '2'})
+    mocker.patch.object(demisto, 'getIntegrationContext', return_value={})
+    mocker.patch.object(demisto, 'setIntegrationContext')
+    mocker.patch.object(Whois, 'whois_request', side_effect=lambda domain, server: responses[(server, domain)])
+    mocker.patch.object(Whois, 'whois_cache', Whois.init_whois_cache())
+
+    raw_data, server_list = Whois.get_whois_raw('example.com', with_server_list=True)
+    assert server_list == ['whois.verisign-grs.com', 'whois.iana.org']
+    assert Whois.whois_request.call_count == 2
+
+    # the referral chain is followed from the cache
+    assert Whois.get_whois_raw('example.com', with_server_list=True) == (raw_data, server_list)
+    assert Whois.whois_request.call_count == 2
+
+    # the cache is kept in the integration context between runs
+    Whois.whois_cache.save()
+    integration_context = demisto.setIntegrationContext.call_args[0][0]
+    demisto.getIntegrationContext.return_value = integration_context
+    mocker.patch.object(Whois, 'whois_cache', Whois.init_whois_cache())
+    assert Whois.get_whois_raw('example.com') == raw_data
+    assert Whois.whois_request.call_count == 2
+
+    # the least recently used responses are evicted, and expired responses are queried again
+    Whois.whois_cache.set_response('whois.iana.org', 'example.org', 'domain: EXAMPLE.ORG\n', [])
+    assert Whois.whois_cache.get_response('whois.verisign-grs.com', '=example.com') is None
+    Whois.whois_cache.ttl = 0
+    Whois.get_whois_raw('example.com')
+    assert Whois.whois_request.call_count == 4
+
+
+def test_whois_cache_disabled(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '0'})
+    assert Whois.init_whois_cache() is None
+
+
+def load_raw_responses():
+    raw_responses = {}
+    for path in sorted(glob.glob('./test_data/raw_responses/*.txt')):
+        with open(path) as raw_response:
+            raw_responses[os.path.basename(path)] = raw_response.read()
+    return raw_responses
+
+
+@pytest.mark.parametrize('regex, literals', [
+    (r'Registrar Name[.]*:\s?(?P<val>.+)', ['Registrar Name', ':']),
+    (r'Exp(?:iry)? Date\s?[.]*:\s?(?P<val>.+)', ['Exp', ' Date', ':']),
+    (r'(C|c)hanged:\s*(?P<val>.+)', ['hanged:']),
+    (r'(?<=[ .]{2})[^a-z0-9.-](?P<val>d?ns\.([a-z0-9-]+\.)+[a-z0-9]+)', ['ns.', '.']),
+    (r'(?P<val>[\w.-]+@[\w.-]+\.[\w]{2,6})', ['@', '.']),
+    (r'a|b', []),
+])
+def test_get_regex_literals(regex, literals):
+    assert Whois.get_regex_literals(regex) == literals
+
+
+def test_grammar_rules_literals():
+    # a line which a regex matches always contains the required literal of the regex
+    for raw_response in load_raw_responses().values():
+        for line in raw_response.splitlines():
+            for rule_key, required_literal, regex in Whois.grammar_rules:
+                if regex.search(line):
+                    assert required_literal in line.lower()
+
+
+def test_parse_raw_whois():
+    raw_responses = load_raw_responses()
+    result = Whois.parse_raw_whois([raw_responses['markmonitor_example_com.txt'],
+                                    raw_responses['verisign_example_com.txt']])
+    # the rules which matched the registrar response are not searched in the registry response
+    assert result['registrar'] == ['MarkMonitor, Inc.']
+    assert result['nameservers'] == ['a.iana-servers.net', 'b.iana-servers.net']
+    assert result['creation_date'][0].year == 1995
+    assert result['expiration_date'][0].year == 2020
+    assert result['contacts']['registrant']['organization'] == 'Internet Assigned Numbers Authority'
+
+    result = Whois.parse_raw_whois([raw_responses['ripn_example_ru.txt']])
+    assert result['status'] == ['REGISTERED, DELEGATED, VERIFIED']
+    assert result['nameservers'] == ['ns1.example.ru', 'ns2.example.ru']
+    assert result['expiration_date'][0].year == 2020
+
+
+def test_bulk_whois_command(mocker):
+    raw_responses = load_raw_responses()
+
+    def whois_request(domain, server):
+        if server == 'whois.verisign-grs.com':
+            return raw_responses['verisign_example_com.txt'] if domain == '=example.com' else ''
+        if server == 'whois.markmonitor.com':
+            return raw_responses['markmonitor_example_com.txt']
+        if server == 'whois.tcinet.ru':
+            return raw_responses['ripn_example_ru.txt']
+        raise Whois.WhoisQueryError("Whois returned - Couldn't connect with the socket-server: timed out")
+
+    mocker.patch.object(demisto, 'args', return_value={'query': 'example.com,example.ru,example.de'})
+    mocker.patch.object(demisto, 'results')
+    mocker.patch.object(Whois, 'whois_request', side_effect=whois_request)
+    Whois.whois_command()
+
+    # the results of all the domains are returned in a single entry
+    assert demisto.results.call_count == 1
+    entry = demisto.results.call_args[0][0]
+    domains_context = entry['EntryContext'][Whois.outputPaths['domain']]
+    assert [domain_context['Name'] for domain_context in domains_context] == ['example.com', 'example.ru', 'example.de']
+    assert domains_context[0]['Whois']['QueryStatus'] == 'Success'
+    assert domains_context[0]['Whois']['Registrar'] == {'Name': ['MarkMonitor, Inc.']}
+    assert domains_context[1]['Whois']['QueryStatus'] == 'Success'
+    assert domains_context[2]['Whois']['QueryStatus'] == 'Failed'
+    assert "Couldn't connect with the socket-server" in entry['Contents']['example.de']
+    assert 'Failed whois queries' in entry['HumanReadable']
+    assert entry['Type'] == Whois.entryTypes['note']
+
+
+def test_server_semaphore(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'server_concurrency': '3'})
+    semaphore = Whois.get_server_semaphore('whois.example.com')
+    assert semaphore is Whois.get_server_semaphore('whois.example.com')
+    for _ in range(3):
+        assert semaphore.acquire(False)
+    assert not semaphore.acquire(False)
+    for _ in range(3):
+        semaphore.release()
+
+
+def test_whois_request_timeout(mocker):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    mocker.patch.object(demisto, 'params', return_value={'timeout': '0.5'})
+    try:
+        with pytest.raises(Whois.WhoisQueryError) as err:
+            Whois.whois_request('example.com', '127.0.0.1', server.getsockname()[1])
+        assert 'timed out' in str(err.value)
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize('domain, root_server', [
+    ('example.com', 'whois.verisign-grs.com'),
+    ('example.co.uk', 'whois.nic.uk'),
+    # queried as a uk domain
+    ('www.british-library.uk', 'whois.nic.uk'),
+    ('example.uk.com', 'whois.centralnic.com'),
+    # suffixes are matched by whole labels
+    ('exampleuk.com', 'whois.verisign-grs.com'),
+])
+def test_get_root_server(domain, root_server):
+    assert Whois.get_root_server(domain) == root_server
+
+
+def test_get_root_server_unsupported():
+    with pytest.raises(Whois.WhoisQueryError):
+        Whois.get_root_server('example.aaa')
+    with pytest.raises(Whois.WhoisException):
+        Whois.get_root_server('example.notatld')
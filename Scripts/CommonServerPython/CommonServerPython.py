@@ -4,27 +4,76 @@ Please notice that to add custom common code, add it to the CommonServerUserPyth
 Note that adding code to CommonServerUserPython can override functions in CommonServerPython
 """
 from __future__ import print_function
-import socket
 import time
 import json
 import sys
 import os
 import re
 import base64
+import io
+import importlib
+import itertools
 import logging
-from collections import OrderedDict
-import xml.etree.cElementTree as ET
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 
 import demistomock as demisto
 
-# imports something that can be missed from docker image
-try:
-    import requests
-except Exception:
-    pass
-
 IS_PY3 = sys.version_info[0] == 3
+
+
+class _LazyModule(object):
+    """
+        A stand-in for a module, which is imported only on first attribute access.
+        Used for modules that are expensive to import and are not needed by most scripts.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_module', None)
+
+    def _lazy_load(self):
+        module = object.__getattribute__(self, '_lazy_module')
+        if module is None:
+            module = importlib.import_module(object.__getattribute__(self, '_lazy_name'))
+            object.__setattr__(self, '_lazy_module', module)
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._lazy_load(), name)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        return '<lazy module {}>'.format(object.__getattribute__(self, '_lazy_name'))
+
+
+def _is_module_available(name):
+    """Checks whether a top level module can be imported, without importing it"""
+    try:
+        if IS_PY3:
+            import importlib.util  # noqa: F401
+            return importlib.util.find_spec(name) is not None
+        import imp
+        imp.find_module(name)
+        return True
+    except Exception:
+        return False
+
+
+socket = _LazyModule('socket')
+ET = _LazyModule('xml.etree.cElementTree')
+
+# imports something that can be missed from docker image
+if 'requests' in sys.modules or _is_module_available('requests'):
+    requests = _LazyModule('requests')
 # pylint: disable=undefined-variable
 if IS_PY3:
     STRING_TYPES = (str, bytes)  # type: ignore
@@ -593,6 +642,8 @@ class IntegrationLogger(object):
       use LOG(<message>) to add a record to the logger (message can be any object with __str__)
       use LOG.print_log(verbose=True/False) to display all records in War-Room (if verbose) and server log.
       use add_replace_strs to add sensitive strings that should be replaced before going to the log.
+      while buffering, only the last max_lines messages (and up to max_size characters) are kept,
+      older messages are dropped and counted in dropped_lines.
 
       :type message: ``str``
       :param message: The message to be logged
@@ -601,11 +652,22 @@ class IntegrationLogger(object):
       :rtype: ``None``
     """
 
-    def __init__(self):
-        self.messages = []  # type: list
+    def __init__(self, max_lines=10000, max_size=5 * 1024 * 1024):
+        self.messages = deque()  # type: deque
+        self.messages_size = 0
+        self.dropped_lines = 0
+        self.max_lines = max_lines
+        self.max_size = max_size
         self.write_buf = []  # type: list
         self.replace_strs = []  # type: list
+        self._replace_regex = None
         self.buffering = True
+        # the params are scanned for sensitive values on first use and not when the logger is created,
+        # as the module level LOG is created by every script, including the ones that never log
+        self._params_replace_strs_added = False
+
+    def _add_params_replace_strs(self):
+        self._params_replace_strs_added = True
         # if for some reason you don't want to auto add credentials.password to replace strings
         # set the os env COMMON_SERVER_NO_AUTO_REPLACE_STRS. Either in CommonServerUserPython, or docker env
         if (not os.getenv('COMMON_SERVER_NO_AUTO_REPLACE_STRS') and hasattr(demisto, 'getParam')):
@@ -622,6 +684,8 @@ class IntegrationLogger(object):
                             self.add_replace_strs(v, b64_encode(v))
 
     def encode(self, message):
+        if not self._params_replace_strs_added:
+            self._add_params_replace_strs()
         try:
             res = str(message)
         except UnicodeEncodeError as exception:
@@ -634,14 +698,34 @@ class IntegrationLogger(object):
                 res = message.encode('utf-8', 'replace')  # type: ignore
             else:
                 res = "Failed encoding message with error: {}".format(exception)
-        for s in self.replace_strs:
-            res = res.replace(s, '<XX_REPLACED>')
-        return res
+        return self._redact(res)
+
+    def _redact(self, text):
+        if not self.replace_strs:
+            return text
+        if self._replace_regex is None:
+            # longest first, so a secret which contains another secret is replaced as a whole
+            strs = sorted(set(self.replace_strs), key=len, reverse=True)
+            self._replace_regex = re.compile('|'.join(re.escape(s) for s in strs))
+        try:
+            return self._replace_regex.sub('<XX_REPLACED>', text)
+        except TypeError:
+            # text and replace strings are not of the same type (bytes / unicode)
+            for s in self.replace_strs:
+                text = text.replace(s, '<XX_REPLACED>')
+            return text
+
+    def _append_message(self, text):
+        self.messages.append(text)
+        self.messages_size += len(text)
+        while len(self.messages) > 1 and (len(self.messages) > self.max_lines or self.messages_size > self.max_size):
+            self.messages_size -= len(self.messages.popleft())
+            self.dropped_lines += 1
 
     def __call__(self, message):
         text = self.encode(message)
         if self.buffering:
-            self.messages.append(text)
+            self._append_message(text)
         else:
             demisto.info(text)
 
@@ -651,7 +735,9 @@ class IntegrationLogger(object):
             Meant for avoiding passwords and so forth in the log.
         '''
         to_add = [self.encode(a) for a in args if a]
-        self.replace_strs.extend(to_add)
+        if to_add:
+            self.replace_strs.extend(to_add)
+            self._replace_regex = None
 
     def set_buffering(self, state):
         """
@@ -664,13 +750,18 @@ class IntegrationLogger(object):
 
     def print_log(self, verbose=False):
         if self.write_buf:
-            self.messages.append("".join(self.write_buf))
+            self._append_message("".join(self.write_buf))
         if self.messages:
-            text = 'Full Integration Log:\n' + '\n'.join(self.messages)
+            text = 'Full Integration Log:\n'
+            if self.dropped_lines:
+                text += '({} earlier lines were dropped)\n'.format(self.dropped_lines)
+            text += '\n'.join(self.messages)
             if verbose:
                 demisto.log(text)
             demisto.info(text)
-            self.messages = []
+            self.messages = deque()
+            self.messages_size = 0
+            self.dropped_lines = 0
 
     def write(self, msg):
         # same as __call__ but allows IntegrationLogger to act as a File like object.
@@ -685,7 +776,7 @@ class IntegrationLogger(object):
         if has_newline:
             text = "".join(self.write_buf)
             if self.buffering:
-                self.messages.append(text)
+                self._append_message(text)
             else:
                 demisto.info(text)
             self.write_buf = []
@@ -863,7 +954,7 @@ def appendContext(key, data, dedup=False):
             existing = existing.split(',')
         newVal = data + existing
         if dedup:
-            newVal = list(set(newVal))
+            newVal = dedup_list(newVal)
         if strBased:
             newVal = ','.join(newVal)
         demisto.setContext(key, newVal)
@@ -871,15 +962,17 @@ def appendContext(key, data, dedup=False):
         demisto.setContext(key, data)
 
 
-def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None):
+def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None, max_rows=None):
     """
        Converts a demisto table in JSON form to a Markdown table
 
        :type name: ``str``
        :param name: The name of the table (required)
 
-       :type t: ``dict`` or ``list``
-       :param t: The JSON table - List of dictionaries with the same keys or a single dictionary (required)
+       :type t: ``dict`` or ``list`` or ``generator``
+       :param t: The JSON table - List of dictionaries with the same keys or a single dictionary (required).
+            An iterator (e.g. a generator) of rows is also accepted and is consumed as the table is rendered,
+            unless removeNull is set (the rows are then collected first).
 
        :type headers: ``list`` or ``string``
        :keyword headers: A list of headers to be presented in the output table (by order). If string will be passed
@@ -894,77 +987,126 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
        :type metadata: ``str``
        :param metadata: Metadata about the table contents
 
+       :type max_rows: ``int``
+       :param max_rows: The maximal number of rows to render. Additional rows are dropped and a truncation
+            note is added below the table. Default is None (no limit)
+
        :return: A string representation of the markdown table
        :rtype: ``str``
     """
 
-    mdResult = ''
+    md_parts = []
     if name:
-        mdResult = '### ' + name + '\n'
+        md_parts.append('### ' + name + '\n')
 
     if metadata:
-        mdResult += metadata + '\n'
-
-    if not t or len(t) == 0:
-        mdResult += '**No entries.**\n'
-        return mdResult
+        md_parts.append(metadata + '\n')
+
+    total_rows = None
+    if isinstance(t, (list, tuple)):
+        total_rows = len(t)
+        rows = iter(t)
+    elif hasattr(t, '__next__') or hasattr(t, 'next'):
+        # an iterator of rows, consumed while rendering
+        rows = t
+    elif t:
+        total_rows = 1
+        rows = iter([t])
+    else:
+        rows = iter([])
 
-    if not isinstance(t, list):
-        t = [t]
+    first_row = next(rows, _EMPTY_TABLE)
+    if first_row is _EMPTY_TABLE:
+        md_parts.append('**No entries.**\n')
+        return _join_md_parts(md_parts)
+    rows = itertools.chain([first_row], rows)
 
     if headers and isinstance(headers, STRING_TYPES):
         headers = [headers]
 
-    if not isinstance(t[0], dict):
+    if not isinstance(first_row, dict):
         # the table cotains only simple objects (strings, numbers)
         # should be only one header
         if headers and len(headers) > 0:
             header = headers[0]
-            t = map(lambda item: dict((h, item) for h in [header]), t)
+            rows = ({header: item} for item in rows)
         else:
             raise Exception("Missing headers param for tableToMarkdown. Example: headers=['Some Header']")
 
     # in case of headers was not provided (backward compatibility)
     if not headers:
-        headers = list(t[0].keys())
-        headers.sort()
+        headers = sorted(first_row.keys())
+    headers = list(headers)
 
     if removeNull:
-        headers_aux = headers[:]
-        for header in headers_aux:
-            if all(obj.get(header) in ('', None, [], {}) for obj in t):
-                headers.remove(header)
-
-    if t and len(headers) > 0:
-        newHeaders = []
-        if headerTransform is None:  # noqa
-            headerTransform = lambda s: s  # noqa
-        for header in headers:
-            newHeaders.append(headerTransform(header))
-        mdResult += '|'
-        if len(newHeaders) == 1:
-            mdResult += newHeaders[0]
+        rows = list(rows)
+        null_headers = set(headers)
+        for row in rows:
+            for header in list(null_headers):
+                if row.get(header) not in ('', None, [], {}):
+                    null_headers.remove(header)
+            if not null_headers:
+                break
+        headers = [header for header in headers if header not in null_headers]
+
+    if not headers:
+        md_parts.append('**No entries.**\n')
+        return _join_md_parts(md_parts)
+
+    if headerTransform is None:  # noqa
+        headerTransform = lambda s: s  # noqa
+    md_parts.append('|' + '|'.join([headerTransform(header) for header in headers]) + '|\n')
+    md_parts.append('|' + '|'.join(['---'] * len(headers)) + '|\n')
+
+    rendered_rows = 0
+    truncated = False
+    for entry in rows:
+        if max_rows is not None and rendered_rows >= max_rows:
+            truncated = True
+            break
+        vals = []
+        for h in headers:
+            value = entry.get(h)
+            if value is None:
+                vals.append('')
+            else:
+                if not isinstance(value, STRING_TYPES):
+                    value = formatCell(value, False)
+                vals.append(stringEscapeMD(value, True, True))
+        # this pipe is optional
+        md_parts.append('| ' + _join_md_parts(vals, ' | ') + ' |\n')
+        rendered_rows += 1
+
+    if truncated:
+        if total_rows is not None:
+            md_parts.append('\n**Showing {} out of {} rows. The table was truncated.**\n'.format(max_rows, total_rows))
         else:
-            mdResult += '|'.join(newHeaders)
-        mdResult += '|\n'
-        sep = '---'
-        mdResult += '|' + '|'.join([sep] * len(headers)) + '|\n'
-        for entry in t:
-            vals = [stringEscapeMD((formatCell(entry.get(h, ''), False) if entry.get(h) is not None else ''),
-                                   True, True) for h in headers]
-            # this pipe is optional
-            mdResult += '| '
-            try:
-                mdResult += ' | '.join(vals)
-            except UnicodeDecodeError:
-                vals = [str(v) for v in vals]
-                mdResult += ' | '.join(vals)
-            mdResult += ' |\n'
+            md_parts.append('\n**Showing the first {} rows. The table was truncated.**\n'.format(max_rows))
 
-    else:
-        mdResult += '**No entries.**\n'
+    return _join_md_parts(md_parts)
+
+
+_EMPTY_TABLE = object()
 
-    return mdResult
+
+def _join_md_parts(parts, separator=''):
+    """
+       Joins markdown parts. In python 2, falls back to converting the parts with str() when byte strings with
+       non-ascii characters are mixed with unicode strings.
+
+       :type parts: ``list``
+       :param parts: The markdown parts to join (required)
+
+       :type separator: ``str``
+       :param separator: The separator to put between the parts
+
+       :return: The joined markdown
+       :rtype: ``str``
+    """
+    try:
+        return separator.join(parts)
+    except UnicodeDecodeError:
+        return separator.join([str(part) for part in parts])
 
 
 tblToMd = tableToMarkdown
@@ -988,24 +1130,7 @@ def createContextSingle(obj, id=None, keyTransform=None, removeNull=False):
     :return: The converted context list
     :rtype: ``list``
     """
-    res = {}  # type: dict
-    if keyTransform is None:
-        keyTransform = lambda s: s  # noqa
-    keys = obj.keys()
-    for key in keys:
-        if removeNull and obj[key] in ('', None, [], {}):
-            continue
-        values = key.split('.')
-        current = res
-        for v in values[:-1]:
-            current.setdefault(v, {})
-            current = current[v]
-        current[keyTransform(values[-1])] = obj[key]
-
-    if id is not None:
-        res.setdefault('ID', id)
-
-    return res
+    return ContextBuilder(id=id, keyTransform=keyTransform, removeNull=removeNull).build(obj)
 
 
 def createContext(data, id=None, keyTransform=None, removeNull=False):
@@ -1027,11 +1152,147 @@ def createContext(data, id=None, keyTransform=None, removeNull=False):
         :rtype: ``list``
     """
     if isinstance(data, (list, tuple)):
-        return [createContextSingle(d, id, keyTransform, removeNull) for d in data]
+        # the key paths are compiled once and shared by all the records
+        builder = ContextBuilder(id=id, keyTransform=keyTransform, removeNull=removeNull)
+        return [builder.build(d) for d in data]
     else:
         return createContextSingle(data, id, keyTransform, removeNull)
 
 
+def dedup_list(items):
+    """
+       Removes duplicates from a list, keeping the first occurrence of every item (the order is kept).
+       Unhashable items (e.g. dicts) are compared by their JSON representation.
+
+       :type items: ``list``
+       :param items: The list to remove the duplicates from (required)
+
+       :return: The list without duplicates
+       :rtype: ``list``
+    """
+    seen = set()
+    res = []
+    for item in items:
+        try:
+            marker = (0, item)
+            hash(marker)
+        except TypeError:
+            marker = (1, json.dumps(item, sort_keys=True, default=str))
+        if marker not in seen:
+            seen.add(marker)
+            res.append(item)
+    return res
+
+
+class ContextBuilder(object):
+    """
+       Converts records with flattened (dotted) keys into nested context dicts and writes batches of them to the
+       investigation context. Every dotted key is split and transformed only once, and then reused for all the
+       records sharing it.
+       Examples:
+           >>> builder = ContextBuilder('MyIntegration.Event', keyTransform=underscoreToCamelCase, dedup=True)
+           >>> builder.add([{'event_id': 1, 'source.ip': '1.1.1.1'}, {'event_id': 2, 'source.ip': '2.2.2.2'}])
+           >>> builder.flush()  # a single setContext call for the whole batch
+
+       :type key: ``str``
+       :param key: The context path the batches are written to. Required only for flush.
+
+       :type id: ``str``
+       :param id: The ID of the context entries
+
+       :type keyTransform: ``function``
+       :param keyTransform: A formatting function for the last part of every key
+
+       :type removeNull: ``bool``
+       :param removeNull: True if empty values should be removed, false otherwise
+
+       :type dedup: ``bool``
+       :param dedup: True if duplicate context entries should be written only once
+
+       :return: No data returned
+       :rtype: ``None``
+    """
+
+    def __init__(self, key=None, id=None, keyTransform=None, removeNull=False, dedup=False):
+        self._key = key
+        self._id = id
+        self._key_transform = keyTransform if keyTransform is not None else lambda s: s
+        self._remove_null = removeNull
+        self._dedup = dedup
+        self._compiled_keys = {}  # type: dict
+        self._pending = []  # type: list
+
+    def _compile_key(self, key):
+        compiled = self._compiled_keys.get(key)
+        if compiled is None:
+            parts = key.split('.')
+            compiled = (tuple(parts[:-1]), self._key_transform(parts[-1]))
+            self._compiled_keys[key] = compiled
+        return compiled
+
+    def build(self, obj):
+        """
+           Converts a single record with flattened keys into a nested dict
+
+           :type obj: ``dict``
+           :param obj: The record to convert (required)
+
+           :return: The nested context dict
+           :rtype: ``dict``
+        """
+        res = {}  # type: dict
+        for key, value in obj.items():
+            if self._remove_null and value in ('', None, [], {}):
+                continue
+            parents, leaf = self._compile_key(key)
+            current = res
+            for parent in parents:
+                current = current.setdefault(parent, {})
+            current[leaf] = value
+
+        if self._id is not None:
+            res.setdefault('ID', self._id)
+
+        return res
+
+    def add(self, data):
+        """
+           Converts records and keeps them until the next flush
+
+           :type data: ``dict`` or ``list``
+           :param data: The record or records to add (required)
+
+           :return: No data returned
+           :rtype: ``None``
+        """
+        if isinstance(data, dict):
+            data = [data]
+        self._pending.extend(self.build(d) for d in data)
+
+    def flush(self):
+        """
+           Appends all the pending records to the existing values of the context key with a single setContext call
+
+           :return: The records written to the context key
+           :rtype: ``list``
+        """
+        if not self._key:
+            raise DemistoException('ContextBuilder requires a context key to flush records')
+        if not self._pending:
+            return []
+        existing = demisto.get(demisto.context(), self._key)
+        if existing is None:
+            existing = []
+        elif not isinstance(existing, list):
+            existing = [existing]
+        new_value = existing + self._pending
+        if self._dedup:
+            new_value = dedup_list(new_value)
+        self._pending = []
+        demisto.setContext(self._key, new_value)
+        return new_value
+
+
 def sectionsToMarkdown(root):
     """
        Converts a list of Demisto JSON tables to markdown string of tables
@@ -1290,13 +1551,15 @@ def elem_to_internal(elem, strip_ns=1, strip=1):
     return {elem_tag: d}
 
 
-def internal_to_elem(pfsh, factory=ET.Element):
+def internal_to_elem(pfsh, factory=None):
     """Convert an internal dictionary (not JSON!) into an Element.
     Whatever Element implementation we could import will be
     used by default; if you want to use something else, pass the
     Element class as the factory parameter.
     """
 
+    if factory is None:
+        factory = ET.Element
     attribs = OrderedDict()  # type: dict
     text = None
     tail = None
@@ -1341,7 +1604,7 @@ def elem2json(elem, options, strip_ns=1, strip=1):
         return json.dumps(elem_to_internal(elem, strip_ns=strip_ns, strip=strip))
 
 
-def json2elem(json_data, factory=ET.Element):
+def json2elem(json_data, factory=None):
     """Convert a JSON string into an Element.
     Whatever Element implementation we could import will be used by
     default; if you want to use something else, pass the Element class
@@ -1365,7 +1628,142 @@ def xml2json(xmlstring, options={}, strip_ns=1, strip=1):
     return elem2json(elem, options, strip_ns=strip_ns, strip=strip)
 
 
-def json2xml(json_data, factory=ET.Element):
+def _xml_source(xml):
+    """Wraps an XML string (or bytes) in a file like object for ET.iterparse. File like objects are kept as is."""
+    if hasattr(xml, 'read'):
+        return xml
+    if IS_PY3 and isinstance(xml, str):
+        return io.StringIO(xml)
+    if not IS_PY3 and not isinstance(xml, str):
+        # python 2 unicode
+        xml = xml.encode('utf-8')
+    return io.BytesIO(xml)
+
+
+def _iterparse_internal(xml, stream_tag=None, strip_ns=1, strip=1):
+    """
+       Converts XML into the internal dictionary representation of elem_to_internal, while parsing it
+       incrementally with ET.iterparse. Every element is converted when it ends and is then cleared.
+       If stream_tag is given (a tag or a tuple of tags), only the outermost elements with that tag are converted
+       and each one is yielded as soon as it ends. Otherwise, a single item (the root) is yielded.
+
+       :return: A generator of ``{tag: value}`` dicts
+       :rtype: ``generator``
+    """
+    # every frame is [element, converted children, whether the element is converted]
+    stack = []  # type: list
+    stream_tags = stream_tag if isinstance(stream_tag, tuple) else (stream_tag,)
+    streamed_depth = 0
+    for event, elem in ET.iterparse(_xml_source(xml), events=('start', 'end')):
+        tag = strip_tag(elem.tag) if strip_ns else elem.tag
+        if event == 'start':
+            if tag in stream_tags:
+                streamed_depth += 1
+            stack.append([elem, [], stream_tag is None or streamed_depth > 0])
+            continue
+
+        _, children, converted = stack.pop()
+        if not converted:
+            elem.clear()
+            continue
+
+        d = {}  # type: dict
+        for key, value in elem.attrib.items():
+            d['@' + key] = value
+        for child, child_tag, value in children:
+            # the tail of a child is known only once its parent ends
+            child_tail = child.tail.strip() if strip and child.tail else child.tail
+            if child_tail:
+                if not isinstance(value, dict):
+                    value = {'#text': value} if value else {}
+                value['#tail'] = child_tail
+            if child_tag not in d:
+                d[child_tag] = value
+            elif isinstance(d[child_tag], list):
+                d[child_tag].append(value)
+            else:
+                d[child_tag] = [d[child_tag], value]
+
+        text = elem.text
+        if strip and text:
+            text = text.strip()
+        if d:
+            if text:
+                d['#text'] = text
+        else:
+            d = text or None  # type: ignore
+
+        # release the subtree of the element, its tail is still needed by the parent
+        tail = elem.tail
+        elem.clear()
+        elem.tail = tail
+
+        if tag in stream_tags:
+            streamed_depth -= 1
+            if not streamed_depth:
+                if stack:
+                    stack[-1][0].remove(elem)
+                yield {tag: d}
+                continue
+        if stack and stack[-1][2]:
+            stack[-1][1].append((elem, tag, d))
+        else:
+            yield {tag: d}
+
+
+def xml2dict(xml, strip_ns=1, strip=1):
+    """
+       Converts XML into a dict, with the same structure as json.loads(xml2json(xml)) but without building
+       an intermediate JSON string.
+
+       :type xml: ``str`` or ``bytes`` or file like object
+       :param xml: The XML to convert (required)
+
+       :type strip_ns: ``bool``
+       :param strip_ns: Whether to remove the namespaces from the tags
+
+       :type strip: ``bool``
+       :param strip: Whether to strip leading and trailing whitespace from texts
+
+       :return: The converted XML
+       :rtype: ``dict``
+    """
+    for res in _iterparse_internal(xml, strip_ns=strip_ns, strip=strip):
+        return res
+    return {}
+
+
+def iter_xml_elements(xml, tag, strip_ns=1, strip=1):
+    """
+       Streams the elements of a given tag from XML, converted to dicts one at a time
+       (e.g. the log entries of a PAN-OS log query response). The rest of the XML is not converted
+       and every element is released as soon as it was parsed.
+       Examples:
+           >>> for entry in iter_xml_elements(response.text, 'entry'):
+           ...     handle_log(entry)
+
+       :type xml: ``str`` or ``bytes`` or file like object
+       :param xml: The XML to convert (required)
+
+       :type tag: ``str`` or ``tuple``
+       :param tag: The tag of the elements to stream (required). Nested elements with the same tag are part of
+            the outer element. If a tuple of tags is given, the elements of all of them are streamed in document
+            order, as ``{tag: value}`` dicts.
+
+       :type strip_ns: ``bool``
+       :param strip_ns: Whether to remove the namespaces from the tags
+
+       :type strip: ``bool``
+       :param strip: Whether to strip leading and trailing whitespace from texts
+
+       :return: A generator of the converted elements (the value under the tag)
+       :rtype: ``generator``
+    """
+    for res in _iterparse_internal(xml, stream_tag=tag, strip_ns=strip_ns, strip=strip):
+        yield res if isinstance(tag, tuple) else res[tag]
+
+
+def json2xml(json_data, factory=None):
     """Convert a JSON string into an XML string.
     Whatever Element implementation we could import will be used by
     default; if you want to use something else, pass the Element class
@@ -2181,8 +2579,10 @@ H || val.SSDeep && val.SSDeep == obj.SSDeep)': {'Malicious': {'Vendor': 'Vendor'
                                .format(indicator_type, INDICATOR_TYPE_TO_CONTEXT_KEY.keys()))
 
 
-# Will add only if 'requests' module imported
-if 'requests' in sys.modules:
+# Will add only if 'requests' module is available
+if 'requests' in globals():
+    import threading
+
     class BaseClient(object):
         """Client to use in integrations with powerful _http_request
         :type base_url: ``str``
@@ -2209,10 +2609,27 @@ if 'requests' in sys.modules:
             The request authorization, for example: (username, password).
             Can be None.
 
+        :type pool_size: ``int``
+        :param pool_size: The maximal number of keep-alive connections kept open to the server.
+
+        :type retries: ``int``
+        :param retries:
+            How many times to retry a failed request (connection errors and the status codes
+            in status_list_to_retry). Use 0 to disable retries.
+
+        :type backoff_factor: ``float``
+        :param backoff_factor:
+            The exponential backoff factor between retries: {backoff factor} * (2 ** ({retry number} - 1))
+            seconds. A Retry-After header sent by the server takes precedence.
+
+        :type status_list_to_retry: ``tuple`` or ``list``
+        :param status_list_to_retry: The response status codes that will trigger a retry.
+
         :return: No data returned
         :rtype: ``None``
         """
-        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None):
+        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None,
+                     pool_size=10, retries=3, backoff_factor=0.5, status_list_to_retry=(429, 500, 502, 503, 504)):
             self._base_url = base_url
             self._verify = verify
             self._ok_codes = ok_codes
@@ -2222,6 +2639,49 @@ if 'requests' in sys.modules:
                 self._proxies = handle_proxy()
             else:
                 self._proxies = None
+            self._session = requests.Session()
+            self._mount_adapter(pool_size, retries, backoff_factor, status_list_to_retry)
+            self._host_semaphores = {}  # type: dict
+            self._host_semaphores_lock = threading.Lock()
+
+        def __del__(self):
+            try:
+                self._session.close()
+            except Exception:
+                pass
+
+        def _mount_adapter(self, pool_size, retries, backoff_factor, status_list_to_retry):
+            """Mounts a pooled, retrying adapter on the client session for both http and https.
+
+            :type pool_size: ``int``
+            :param pool_size: The maximal number of keep-alive connections kept open to the server.
+
+            :type retries: ``int``
+            :param retries: How many times to retry a failed request.
+
+            :type backoff_factor: ``float``
+            :param backoff_factor: The exponential backoff factor between retries.
+
+            :type status_list_to_retry: ``tuple`` or ``list``
+            :param status_list_to_retry: The response status codes that will trigger a retry.
+
+            :return: No data returned
+            :rtype: ``None``
+            """
+            from requests.adapters import HTTPAdapter
+            from requests.packages.urllib3.util.retry import Retry  # type: ignore
+
+            retry = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=status_list_to_retry,
+                respect_retry_after_header=True,
+                # return the last response when retries are exhausted, _http_request handles the status code
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
 
         def _http_request(self, method, url_suffix, full_url=None, headers=None,
                           auth=None, json_data=None, params=None, data=None, files=None,
@@ -2285,7 +2745,7 @@ if 'requests' in sys.modules:
                 headers = headers if headers else self._headers
                 auth = auth if auth else self._auth
                 # Execute
-                res = requests.request(
+                res = self._session.request(
                     method,
                     address,
                     verify=self._verify,
@@ -2345,6 +2805,92 @@ if 'requests' in sys.modules:
                     .format(err_type, exception.errno, exception.strerror)
                 raise DemistoException(err_msg, exception)
 
+        def _http_batch_request(self, requests_kwargs, max_workers=10, max_per_host=None):
+            """Runs many _http_request calls concurrently on a bounded thread pool.
+            Examples:
+                >>> ips = argToList(demisto.args().get('ip'))
+                >>> results, errors = client._http_batch_request([
+                ...     {'method': 'GET', 'url_suffix': 'ip/{}'.format(ip)} for ip in ips
+                ... ])
+
+            :type requests_kwargs: ``list``
+            :param requests_kwargs: A list of dicts, each holding the keyword arguments of a single _http_request call.
+
+            :type max_workers: ``int``
+            :param max_workers: The maximal number of requests sent at the same time.
+
+            :type max_per_host: ``int``
+            :param max_per_host:
+                The maximal number of requests sent at the same time to a single host.
+                If None, only max_workers applies.
+
+            :return:
+                A tuple of the results list (in the order of requests_kwargs, None for failed requests)
+                and a dict mapping the index of every failed request to the exception it raised.
+            :rtype: ``(list, dict)``
+            """
+            requests_kwargs = list(requests_kwargs)
+            if not requests_kwargs:
+                return [], {}
+
+            def run_request(index):
+                kwargs = requests_kwargs[index]
+                semaphore = self._get_host_semaphore(kwargs, max_per_host)
+                try:
+                    if semaphore:
+                        semaphore.acquire()
+                    try:
+                        return self._http_request(**kwargs), None
+                    finally:
+                        if semaphore:
+                            semaphore.release()
+                except Exception as exception:
+                    return None, exception
+
+            from multiprocessing.pool import ThreadPool
+
+            pool = ThreadPool(min(max_workers, len(requests_kwargs)))
+            try:
+                responses = pool.map(run_request, range(len(requests_kwargs)), chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+            results = []
+            errors = {}
+            for index, (result, error) in enumerate(responses):
+                results.append(result)
+                if error is not None:
+                    errors[index] = error
+            return results, errors
+
+        def _get_host_semaphore(self, request_kwargs, max_per_host):
+            """Gets the semaphore bounding the concurrent requests to the host of a single _http_request call.
+
+            :type request_kwargs: ``dict``
+            :param request_kwargs: The keyword arguments of the _http_request call.
+
+            :type max_per_host: ``int``
+            :param max_per_host: The maximal number of concurrent requests to a single host.
+
+            :return: The semaphore of the host, or None if max_per_host is not set.
+            :rtype: ``threading.BoundedSemaphore``
+            """
+            if not max_per_host:
+                return None
+            try:
+                from urllib.parse import urlparse
+            except ImportError:
+                from urlparse import urlparse  # type: ignore
+
+            key = (urlparse(request_kwargs.get('full_url') or self._base_url).netloc, max_per_host)
+            with self._host_semaphores_lock:
+                semaphore = self._host_semaphores.get(key)
+                if semaphore is None:
+                    semaphore = threading.BoundedSemaphore(max_per_host)
+                    self._host_semaphores[key] = semaphore
+            return semaphore
+
         def _is_status_code_valid(self, response, ok_codes=None):
             """If the status code is OK, return 'True'.
 
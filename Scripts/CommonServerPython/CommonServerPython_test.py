@@ -10,7 +10,8 @@ import pytest
 from CommonServerPython import xml2json, json2xml, entryTypes, formats, tableToMarkdown, underscoreToCamelCase, \
     flattenCell, date_to_timestamp, datetime, camelize, pascalToSpace, argToList, \
     remove_nulls_from_dictionary, is_error, get_error, hash_djb2, fileResult, is_ip_valid, get_demisto_version, \
-    IntegrationLogger, parse_date_string, IS_PY3, DebugLogger, b64_encode, parse_date_range
+    IntegrationLogger, parse_date_string, IS_PY3, DebugLogger, b64_encode, parse_date_range, createContext, \
+    dedup_list, appendContext, ContextBuilder, xml2dict, iter_xml_elements
 
 
 try:
@@ -52,6 +53,40 @@ def test_xml():
     assert xmlActual == xml, "expected:\n{}\nto equal:\n{}".format(xml, xmlActual)
 
 
+XML_LOGS = b'<response status="success"><result><job><id>7</id></job><log><logs count="3" progress="100">' \
+    b'<entry logid="1"><src>1.1.1.1</src><app>web</app></entry>' \
+    b'<entry logid="2"><src>2.2.2.2</src><app>dns</app><app>ssl</app></entry>' \
+    b'<entry logid="3"/></logs></log></result></response>'
+
+
+@pytest.mark.parametrize('xml', [
+    XML_LOGS,
+    b'<work><employee><id>100</id><name>foo</name></employee><employee><id>200</id><name>goo</name></employee></work>',
+    b'<a x="1"> text <b>in b</b> tail of b <c y="2"/>tail of c<d/></a>',
+    b'<r xmlns="http://example.com"><i>1</i><i>2</i></r>',
+    b'<empty/>',
+])
+def test_xml2dict(xml):
+    assert xml2dict(xml) == json.loads(xml2json(xml))
+    assert xml2dict(xml.decode('utf-8')) == json.loads(xml2json(xml))
+    assert xml2dict(xml, strip=0, strip_ns=0) == json.loads(xml2json(xml, strip=0, strip_ns=0))
+
+
+def test_iter_xml_elements():
+    from io import BytesIO
+    expected = [
+        {'@logid': '1', 'src': '1.1.1.1', 'app': 'web'},
+        {'@logid': '2', 'src': '2.2.2.2', 'app': ['dns', 'ssl']},
+        {'@logid': '3'},
+    ]
+    entries = iter_xml_elements(BytesIO(XML_LOGS), 'entry')
+    assert not isinstance(entries, list)
+    assert list(entries) == expected
+    assert list(iter_xml_elements(XML_LOGS, 'no_such_tag')) == []
+    # the elements of several tags, in document order
+    assert list(iter_xml_elements(XML_LOGS, ('entry', 'id'))) == [{'id': '7'}] + [{'entry': entry} for entry in expected]
+
+
 def toEntry(table):
     return {
 
@@ -329,6 +364,53 @@ def test_tbl_to_md_header_with_special_character():
     assert table_with_character == expected_string_with_special_character
 
 
+def test_tbl_to_md_generator():
+    # rows streamed from a generator
+    table = tableToMarkdown('tableToMarkdown test', (row for row in DATA))
+    assert table == tableToMarkdown('tableToMarkdown test', DATA)
+
+    # generator with removeNull
+    data = copy.deepcopy(DATA)
+    for d in data:
+        d['header_2'] = None
+    table = tableToMarkdown('tableToMarkdown test', (row for row in data), removeNull=True)
+    assert table == tableToMarkdown('tableToMarkdown test', DATA, headers=['header_1', 'header_3'])
+
+    # empty generator
+    table = tableToMarkdown('tableToMarkdown test', (row for row in []))
+    assert table == '### tableToMarkdown test\n**No entries.**\n'
+
+
+def test_tbl_to_md_max_rows():
+    table = tableToMarkdown('tableToMarkdown test', DATA, headers=['header_1'], max_rows=2)
+    expected_table = '''### tableToMarkdown test
+|header_1|
+|---|
+| a1 |
+| a2 |
+
+**Showing 2 out of 3 rows. The table was truncated.**
+'''
+    assert table == expected_table
+    # a blank line ends the table, so the footer is not rendered as a table row
+    assert '| a2 |\n\n**Showing' in table
+
+    table = tableToMarkdown('tableToMarkdown test', (row for row in DATA), headers=['header_1'], max_rows=2)
+    expected_table = '''### tableToMarkdown test
+|header_1|
+|---|
+| a1 |
+| a2 |
+
+**Showing the first 2 rows. The table was truncated.**
+'''
+    assert table == expected_table
+
+    # max_rows not reached
+    table = tableToMarkdown('tableToMarkdown test', DATA, max_rows=3)
+    assert table == tableToMarkdown('tableToMarkdown test', DATA)
+
+
 def test_flatten_cell():
     # sanity
     utf8_to_flatten = b'abcdefghijklmnopqrstuvwxyz1234567890!'.decode('utf8')
@@ -417,6 +499,60 @@ def test_remove_nulls():
                                                                                  str(expected_dictionary))
 
 
+def test_create_context():
+    data = [
+        {'event_id': 1, 'source.ip': '1.1.1.1', 'source.geo.country': 'US', 'empty': None},
+        {'event_id': 2, 'source.ip': '2.2.2.2', 'source.geo.country': '', 'empty': None},
+    ]
+    expected = [
+        {'EventId': 1, 'source': {'Ip': '1.1.1.1', 'geo': {'Country': 'US'}}, 'ID': 'id'},
+        {'EventId': 2, 'source': {'Ip': '2.2.2.2'}, 'ID': 'id'},
+    ]
+    assert createContext(data, id='id', keyTransform=underscoreToCamelCase, removeNull=True) == expected
+    assert createContext(data[0], id='id', keyTransform=underscoreToCamelCase, removeNull=True) == expected[0]
+
+
+def test_dedup_list():
+    assert dedup_list([3, 1, 3, 2, 1]) == [3, 1, 2]
+    assert dedup_list(['a', {'b': 1, 'c': 2}, 'a', {'c': 2, 'b': 1}, [1]]) == ['a', {'b': 1, 'c': 2}, [1]]
+    assert dedup_list([]) == []
+
+
+def test_append_context_dedup(mocker):
+    mocker.patch.object(demisto, 'context', return_value={'IP': ['1.1.1.1', '2.2.2.2']})
+    mocker.patch.object(demisto, 'setContext')
+    appendContext('IP', ['3.3.3.3', '1.1.1.1', '4.4.4.4'], dedup=True)
+    demisto.setContext.assert_called_once_with('IP', ['3.3.3.3', '1.1.1.1', '4.4.4.4', '2.2.2.2'])
+
+
+class TestContextBuilder(object):
+    def test_build(self):
+        builder = ContextBuilder(keyTransform=underscoreToCamelCase)
+        assert builder.build({'a.b_c': 1, 'a.d': 2, 'e': 3}) == {'a': {'BC': 1, 'D': 2}, 'E': 3}
+        assert builder._compiled_keys['a.b_c'] == (('a',), 'BC')
+
+    def test_flush(self, mocker):
+        mocker.patch.object(demisto, 'context', return_value={'Event': {'ID': 0}})
+        mocker.patch.object(demisto, 'setContext')
+        builder = ContextBuilder('Event', dedup=True)
+        builder.add([{'ID': 1, 'src.ip': '1.1.1.1'}, {'ID': 1, 'src.ip': '1.1.1.1'}])
+        builder.add({'ID': 2, 'src.ip': '2.2.2.2'})
+        res = builder.flush()
+        expected = [{'ID': 0}, {'ID': 1, 'src': {'ip': '1.1.1.1'}}, {'ID': 2, 'src': {'ip': '2.2.2.2'}}]
+        assert res == expected
+        demisto.setContext.assert_called_once_with('Event', expected)
+        # nothing is pending after a flush
+        assert builder.flush() == []
+        assert demisto.setContext.call_count == 1
+
+    def test_flush_without_key(self):
+        from CommonServerPython import DemistoException
+        builder = ContextBuilder()
+        builder.add({'a': 1})
+        with raises(DemistoException, match='context key'):
+            builder.flush()
+
+
 def test_is_error_true():
     execute_command_results = [
         {
@@ -561,6 +697,62 @@ def test_logger_replace_strs(mocker):
     assert ilog.messages[0] == '<XX_REPLACED> is <XX_REPLACED> and b64: <XX_REPLACED>'
 
 
+def test_logger_params_scanned_on_first_use(mocker):
+    mocker.patch.object(demisto, 'params', return_value={
+        'apikey': 'my_apikey',
+    })
+    ilog = IntegrationLogger()
+    assert demisto.params.call_count == 0
+    ilog('my_apikey')
+    scan_call_count = demisto.params.call_count
+    ilog('my_apikey again')
+    assert demisto.params.call_count == scan_call_count
+    assert list(ilog.messages) == ['<XX_REPLACED>', '<XX_REPLACED> again']
+
+
+def test_logger_replace_overlapping_strs(mocker):
+    mocker.patch.object(demisto, 'params', return_value={})
+    ilog = IntegrationLogger()
+    ilog.add_replace_strs('X', 'my_XXX_secret')
+    ilog('token: my_XXX_secret, X')
+    assert ilog.messages[0] == 'token: <XX_REPLACED>, <XX_REPLACED>'
+
+
+def test_logger_max_lines(mocker):
+    mocker.patch.object(demisto, 'params', return_value={})
+    mocker.patch.object(demisto, 'info')
+    ilog = IntegrationLogger(max_lines=3)
+    for i in range(10):
+        ilog('line {}'.format(i))
+    assert list(ilog.messages) == ['line 7', 'line 8', 'line 9']
+    assert ilog.dropped_lines == 7
+    ilog.print_log()
+    assert demisto.info.call_args[0][0] == \
+        'Full Integration Log:\n(7 earlier lines were dropped)\nline 7\nline 8\nline 9'
+    assert not ilog.messages
+    assert ilog.dropped_lines == 0
+
+
+def test_logger_max_size(mocker):
+    mocker.patch.object(demisto, 'params', return_value={})
+    ilog = IntegrationLogger(max_size=10)
+    ilog('12345')
+    ilog('67890')
+    ilog('abc')
+    assert list(ilog.messages) == ['67890', 'abc']
+    assert ilog.messages_size == 8
+    ilog('a message longer than max_size')
+    assert list(ilog.messages) == ['a message longer than max_size']
+
+
+def test_lazy_module():
+    from CommonServerPython import _LazyModule
+    lazy_json = _LazyModule('json')
+    assert lazy_json._lazy_module is None
+    assert lazy_json.dumps({'a': 1}) == '{"a": 1}'
+    assert lazy_json._lazy_module is json
+
+
 def test_is_mac_address():
     from CommonServerPython import is_mac_address
 
@@ -826,6 +1018,68 @@ class TestBaseClient:
         with raises(DemistoException, match="Verify that the server URL parameter"):
             self.client._http_request('get', 'event', resp_type='response')
 
+    def test_http_request_uses_session(self, mocker, requests_mock):
+        requests_mock.get('http://example.com/api/v2/event', text=json.dumps(self.text))
+        mocker.spy(self.client._session, 'request')
+        self.client._http_request('get', 'event')
+        self.client._http_request('get', 'event')
+        assert self.client._session.request.call_count == 2
+
+    def test_session_adapter(self):
+        from CommonServerPython import BaseClient
+        new_client = BaseClient('https://example.com/api/v2/', pool_size=5, retries=2, backoff_factor=1,
+                                status_list_to_retry=(429,))
+        adapter = new_client._session.get_adapter('https://example.com/api/v2/event')
+        assert adapter._pool_maxsize == 5
+        assert adapter.max_retries.total == 2
+        assert adapter.max_retries.backoff_factor == 1
+        assert 429 in adapter.max_retries.status_forcelist
+        assert adapter.max_retries.respect_retry_after_header
+        assert new_client._session.get_adapter('http://example.com') is adapter
+
+    def test_session_no_retries(self):
+        from CommonServerPython import BaseClient
+        new_client = BaseClient('http://example.com/api/v2/', retries=0)
+        adapter = new_client._session.get_adapter('http://example.com/api/v2/event')
+        assert adapter.max_retries.total == 0
+
+    def test_http_batch_request(self, requests_mock):
+        from CommonServerPython import DemistoException
+        for i in range(5):
+            requests_mock.get('http://example.com/api/v2/ip/{}'.format(i), text=json.dumps({'ip': i}))
+        requests_mock.get('http://example.com/api/v2/ip/bad', status_code=404)
+        requests_kwargs = [{'method': 'get', 'url_suffix': 'ip/{}'.format(i)} for i in range(5)]
+        requests_kwargs.insert(2, {'method': 'get', 'url_suffix': 'ip/bad'})
+        results, errors = self.client._http_batch_request(requests_kwargs, max_workers=3, max_per_host=2)
+        assert results == [{'ip': 0}, {'ip': 1}, None, {'ip': 2}, {'ip': 3}, {'ip': 4}]
+        assert list(errors.keys()) == [2]
+        assert isinstance(errors[2], DemistoException)
+
+    def test_http_batch_request_empty(self):
+        assert self.client._http_batch_request([]) == ([], {})
+
+    def test_http_batch_request_max_per_host(self, mocker):
+        import threading
+        import time
+        lock = threading.Lock()
+        in_flight = {'current': 0, 'max': 0}
+
+        def http_request(**kwargs):
+            with lock:
+                in_flight['current'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            time.sleep(0.01)
+            with lock:
+                in_flight['current'] -= 1
+            return kwargs['url_suffix']
+
+        mocker.patch.object(self.client, '_http_request', side_effect=http_request)
+        requests_kwargs = [{'method': 'get', 'url_suffix': str(i)} for i in range(20)]
+        results, errors = self.client._http_batch_request(requests_kwargs, max_workers=10, max_per_host=3)
+        assert results == [str(i) for i in range(20)]
+        assert not errors
+        assert in_flight['max'] <= 3
+
     def test_is_valid_ok_codes_empty(self):
         from requests import Response
         from CommonServerPython import BaseClient
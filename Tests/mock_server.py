@@ -1,13 +1,34 @@
 import os
+import ssl
+import sys
 import signal
 import string
 import time
+import shutil
+import argparse
+import tempfile
+import threading
 import unicodedata
+from collections import deque
+from pipes import quote
 from subprocess import call, Popen, PIPE, check_call, check_output
 
+try:
+    from urlparse import urlsplit
+    from SocketServer import ThreadingMixIn
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from urllib.parse import urlsplit
+    from socketserver import ThreadingMixIn
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+
 VALID_FILENAME_CHARS = '-_.() %s%s' % (string.ascii_letters, string.digits)
 PROXY_PROCESS_INIT_TIMEOUT = 20
-PROXY_PROCESS_INIT_INTERVAL = 1
+PROXY_PROCESS_INIT_INTERVAL = 0.25
+# size of a missing file in AMIConnection.get_file_sizes
+MISSING_FILE_SIZE = 'missing'
+# hop by hop headers of a recorded response, the replayed response has its own
+REPLAY_SKIPPED_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length'}
 
 
 def clean_filename(playbook_id, whitelist=VALID_FILENAME_CHARS, replace=' ()'):
@@ -121,6 +142,29 @@ class AMIConnection:
     def check_output(self, command, **kwargs):
         return check_output(self.add_ssh_prefix(command), **kwargs)
 
+    def get_file_sizes(self, file_paths):
+        """Get the sizes of files on the AMI, in a single call.
+
+        Args:
+            file_paths (list): paths of the files on the AMI.
+
+        Returns:
+            list. The size of each file (string), MISSING_FILE_SIZE if it does not exist.
+        """
+        script = 'for f in {}; do if [ -f "$f" ]; then stat -c %s "$f"; else echo {}; fi; done'.format(
+            ' '.join(quote(file_path) for file_path in file_paths), MISSING_FILE_SIZE)
+        return self.check_output([script]).split()
+
+    def wait_for_file(self, file_path, timeout=PROXY_PROCESS_INIT_TIMEOUT, interval=PROXY_PROCESS_INIT_INTERVAL):
+        """Wait on the AMI for a file to be created, in a single call.
+
+        Returns:
+            bool. True if the file was created before the timeout.
+        """
+        script = 'for i in $(seq {}); do [ -f {} ] && exit 0; sleep {}; done; exit 1'.format(
+            int(timeout / interval), quote(file_path), interval)
+        return silence_output(self.call, [script], stdout='null', stderr='null') == 0
+
     def copy_file(self, src, dst=REMOTE_HOME, **kwargs):
         silence_output(check_call, ['scp', '-o', ' StrictHostKeyChecking=no', src,
                                     "{}@{}:{}".format(self.REMOTE_MACHINE_USER, self.public_ip, dst)],
@@ -227,15 +271,16 @@ class MITMProxy:
         src_files = os.path.join(self.tmp_folder, get_folder_path(playbook_id) + '*')
         dst_folder = os.path.join(self.repo_folder, get_folder_path(playbook_id))
 
-        if not self.has_mock_file(playbook_id):
-            print 'Mock file not created!'
-        elif self.get_mock_file_size(src_filepath) == '0':
-            print 'Mock file is empty, ignoring.'
+        # check existence and size in a single call
+        mock_file_size = self.ami.get_file_sizes([src_filepath])[0]
+        if mock_file_size == MISSING_FILE_SIZE:
+            print('Mock file not created!')
+        elif mock_file_size == '0':
+            print('Mock file is empty, ignoring.')
             self.empty_files.append(playbook_id)
         else:
             # Move to repo folder
-            self.ami.call(['mkdir', '--parents', dst_folder])
-            self.ami.call(['mv', src_files, dst_folder])
+            self.ami.call(['mkdir', '--parents', dst_folder, '&&', 'mv', src_files, dst_folder])
 
     def start(self, playbook_id, path=None, record=False):
         """Start the proxy process and direct traffic through it.
@@ -250,12 +295,12 @@ class MITMProxy:
 
         path = path or self.current_folder
 
-        # Create mock files directory
-        silence_output(self.ami.call, ['mkdir', os.path.join(path, get_folder_path(playbook_id))], stderr='null')
+        # Create mock files directory, in the same call which starts the proxy
+        command = ['mkdir', os.path.join(path, get_folder_path(playbook_id)), '2>/dev/null;']
 
         # Configure proxy server
         actions = '--server-replay-kill-extra --server-replay' if not record else '--save-stream-file'
-        command = "mitmdump --ssl-insecure --verbose --listen-port {} {}".format(self.PROXY_PORT, actions).split()
+        command += "mitmdump --ssl-insecure --verbose --listen-port {} {}".format(self.PROXY_PORT, actions).split()
         command.append(os.path.join(path, get_mock_file_path(playbook_id)))
 
         # Handle proxy log output
@@ -269,18 +314,12 @@ class MITMProxy:
         if self.process.returncode is not None:
             raise Exception("Proxy process terminated unexpectedly.\nExit code: {}\noutputs:\nSTDOUT\n{}\n\nSTDERR\n{}"
                             .format(self.process.returncode, self.process.stdout.read(), self.process.stderr.read()))
-        log_file_exists = False
-        seconds_since_init = 0
-        # Make sure process is up and running
-        while not log_file_exists and seconds_since_init < PROXY_PROCESS_INIT_TIMEOUT:
-            # Check if log file exist
-            log_file_exists = silence_output(self.ami.call, ['ls', log_file], stdout='null', stderr='null') == 0
-            time.sleep(PROXY_PROCESS_INIT_INTERVAL)
-            seconds_since_init += PROXY_PROCESS_INIT_INTERVAL
-        if not log_file_exists:
+        init_start = time.time()
+        # Make sure process is up and running (the log file is created), waiting on the AMI
+        if not self.ami.wait_for_file(log_file):
             self.stop()
             raise Exception("Proxy process took to long to go up.")
-        print('Proxy process up and running. Took {} seconds'.format(seconds_since_init))
+        print('Proxy process up and running. Took {:.2f} seconds'.format(time.time() - init_start))
 
     def stop(self):
         if not self.process:
@@ -291,8 +330,256 @@ class MITMProxy:
 
         # Handle logs
         if self.debug:
-            print "proxy outputs:"
-            print self.process.stdout.read()
-            print self.process.stderr.read()
+            print("proxy outputs:")
+            print(self.process.stdout.read())
+            print(self.process.stderr.read())
 
         self.process = None
+
+
+def get_replay_key(method, scheme, host, port, path, content):
+    """Key of a request, matched like mitmproxy's server replay (by default options)"""
+    return method.upper(), scheme, host.lower(), int(port), path, content or b''
+
+
+def load_mock_flows(mock_file_path):
+    """Load the recorded responses of a mock file.
+
+    Args:
+        mock_file_path (string): path of a mitmproxy dump file.
+
+    Returns:
+        dict. Response deques by request replay key, in recording order.
+            A response is a tuple of status code, reason, headers (list of tuples) and content.
+    """
+    try:
+        from mitmproxy import io as mitmproxy_io
+    except ImportError:
+        print('Please install mitmproxy, you can do it by running: `pip install mitmproxy`')
+        sys.exit(1)
+
+    responses = {}
+    with open(mock_file_path, 'rb') as mock_file:
+        for flow in mitmproxy_io.FlowReader(mock_file).stream():
+            request, response = getattr(flow, 'request', None), getattr(flow, 'response', None)
+            if request is None or response is None:
+                continue
+            key = get_replay_key(request.method, request.scheme, request.host, request.port, request.path,
+                                 request.raw_content)
+            headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in response.headers.fields]
+            responses.setdefault(key, deque()).append((response.status_code, response.reason, headers,
+                                                       response.raw_content or b''))
+    return responses
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    """Proxy request handler which answers with the recorded responses of ReplayServer.
+    HTTPS requests are tunneled with CONNECT, and decrypted with the server's self signed certificate.
+    """
+
+    tunnel = None
+
+    def do_CONNECT(self):
+        host, _, port = self.path.rpartition(':')
+        self.send_response(200, 'Connection Established')
+        self.end_headers()
+        self.wfile.flush()
+
+        self.connection = self.server.get_ssl_context().wrap_socket(self.connection, server_side=True)
+        self.rfile = self.connection.makefile('rb', self.rbufsize)
+        self.wfile = self.connection.makefile('wb')
+        self.tunnel = (host, int(port))
+        self.close_connection = False
+
+    def replay(self):
+        if self.tunnel:
+            scheme, (host, port), path = 'https', self.tunnel, self.path
+        else:
+            url = urlsplit(self.path)
+            scheme, host, path = url.scheme, url.hostname, url.path + ('?' + url.query if url.query else '')
+            port = url.port or (443 if scheme == 'https' else 80)
+
+        content_length = int(self.headers.get('Content-Length') or 0)
+        content = self.rfile.read(content_length) if content_length else b''
+        response = self.server.pop_response(get_replay_key(self.command, scheme, host, port, path, content))
+        if response is None:
+            message = 'No recorded response for {} {}://{}:{}{}'.format(self.command, scheme, host, port, path)
+            self.server.unmatched_requests.append(message)
+            self.send_error(502, message)
+            return
+
+        status_code, reason, headers, content = response
+        self.send_response(status_code, reason)
+        for name, value in headers:
+            if name.lower() not in REPLAY_SKIPPED_HEADERS:
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = replay
+
+    def log_message(self, format, *args):
+        if self.server.debug:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class ReplayServer(ThreadingMixIn, HTTPServer):
+    """In-process proxy server which replays recorded responses, like mitmdump's server replay.
+
+    Attributes:
+        responses (dict): Response deques by request replay key, each response is replayed once.
+        unmatched_requests (list): Requests without a recorded response (answered with 502).
+        debug (bool): print the handled requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, responses, debug=False):
+        HTTPServer.__init__(self, ('127.0.0.1', port), ReplayRequestHandler)
+        self.responses = responses
+        self.unmatched_requests = []
+        self.debug = debug
+        self.lock = threading.Lock()
+        self.ssl_context = None
+        self.cert_folder = None
+
+    def pop_response(self, key):
+        with self.lock:
+            responses = self.responses.get(key)
+            return responses.popleft() if responses else None
+
+    def get_ssl_context(self):
+        """Create a self signed certificate on the first HTTPS request (the replayed integrations are insecure)"""
+        with self.lock:
+            if self.ssl_context is None:
+                self.cert_folder = tempfile.mkdtemp()
+                cert_file = os.path.join(self.cert_folder, 'cert.pem')
+                key_file = os.path.join(self.cert_folder, 'key.pem')
+                silence_output(check_call, ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                                            '-subj', '/CN=localhost', '-keyout', key_file, '-out', cert_file],
+                               stdout='null', stderr='null')
+                ssl_context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+                ssl_context.load_cert_chain(cert_file, key_file)
+                self.ssl_context = ssl_context
+            return self.ssl_context
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        if self.cert_folder:
+            shutil.rmtree(self.cert_folder, ignore_errors=True)
+
+
+class LocalReplayProxy:
+    """Replays the mock files of the content-test-data repo with an in-process proxy server, without the AMI.
+    Has the playback interface of MITMProxy.
+
+    Attributes:
+        repo_folder (string): path to a local clone of the content-test-data git repo.
+        port (int): the local port of the proxy.
+        server (ReplayServer): the replay server of the current playbook.
+        empty_files (list): List of playbooks that have empty mock files.
+        rerecorded_tests (list): Always empty, recording requires the AMI.
+        debug (bool): enable debug prints.
+    """
+
+    def __init__(self, repo_folder=MITMProxy.MOCKS_GIT_PATH, port=int(MITMProxy.PROXY_PORT), debug=False):
+        self.repo_folder = repo_folder
+        self.port = port
+        self.debug = debug
+        self.server = None
+        self.thread = None
+        self.empty_files = []
+        self.rerecorded_tests = []
+
+    @property
+    def address(self):
+        # the server's port, in case it was started on any free port (0)
+        return '127.0.0.1:{}'.format(self.server.server_address[1] if self.server else self.port)
+
+    def has_mock_file(self, playbook_id):
+        return os.path.isfile(os.path.join(self.repo_folder, get_mock_file_path(playbook_id)))
+
+    def start(self, playbook_id, path=None, record=False):
+        """Start the replay server of a test playbook.
+
+        Args:
+            playbook_id (string): ID of the test playbook to replay.
+            path (string): path override for the mock files.
+            record (bool): not supported, recording requires the AMI.
+        """
+        if record:
+            raise Exception("Cannot record with the local proxy - recording requires the AMI.")
+        if self.server:
+            raise Exception("Cannot start proxy - already running.")
+
+        responses = load_mock_flows(os.path.join(path or self.repo_folder, get_mock_file_path(playbook_id)))
+        if not responses:
+            self.empty_files.append(playbook_id)
+        self.server = ReplayServer(self.port, responses, self.debug)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        print('Replaying {} recorded requests of {} on {}'.format(sum(len(r) for r in responses.values()),
+                                                                  playbook_id, self.address))
+
+    def stop(self):
+        """Stop the replay server.
+
+        Returns:
+            list. The requests which had no recorded response.
+        """
+        if not self.server:
+            raise Exception("Cannot stop proxy - not running.")
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        unmatched_requests = self.server.unmatched_requests
+        self.server = self.thread = None
+        for unmatched_request in unmatched_requests:
+            print(unmatched_request)
+        return unmatched_requests
+
+
+def get_local_replay_options(args=None):
+    """Parse the arguments of run_with_local_replay. The command may be separated from the options by '--'"""
+    parser = argparse.ArgumentParser(description='Run a command against the recorded traffic of a test playbook')
+    parser.add_argument('-p', '--playbookID', help='The test playbook of the mock file', required=True)
+    parser.add_argument('-m', '--mocksFolder', help='Path to the content-test-data repo',
+                        default=MITMProxy.MOCKS_GIT_PATH)
+    parser.add_argument('--port', type=int, help='The local proxy port', default=int(MITMProxy.PROXY_PORT))
+    parser.add_argument('-d', '--debug', action='store_true', help='Print the replayed requests')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='The command to run')
+    options = parser.parse_args(args)
+    if options.command and options.command[0] == '--':
+        options.command = options.command[1:]
+    if not options.command:
+        parser.error('A command to run is required')
+
+    return options
+
+
+def run_with_local_replay():
+    """Run a command (e.g. the unit tests of an integration) with its traffic replayed from a test playbook mock"""
+    options = get_local_replay_options()
+    proxy = LocalReplayProxy(options.mocksFolder, options.port, options.debug)
+    if not proxy.has_mock_file(options.playbookID):
+        print('No mock file for {} in {}'.format(options.playbookID, options.mocksFolder))
+        sys.exit(1)
+
+    env = dict(os.environ)
+    for name in ('http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY'):
+        env[name] = 'http://' + proxy.address
+    proxy.start(options.playbookID)
+    try:
+        exit_code = call(options.command, env=env)
+    finally:
+        unmatched_requests = proxy.stop()
+
+    sys.exit(exit_code or (1 if unmatched_requests else 0))
+
+
+if __name__ == '__main__':
+    run_with_local_replay()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Measures the startup cost of the CommonServerPython code that is prepended to every script and integration.
+
+Every run starts a fresh interpreter, compiles the unified CommonServerPython code (as the server sends it,
+see package_creator.clean_python_code) and executes it. Reports the median compile time, execution time,
+peak RSS growth and the number of newly imported modules.
+
+Example:
+    python ./Tests/scripts/benchmarks/common_server_import_benchmark.py -r 20
+    python ./Tests/scripts/benchmarks/common_server_import_benchmark.py -p python2 -c /tmp/OldCommonServerPython.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../../..')
+sys.path.append(CONTENT_DIR)
+from package_creator import clean_python_code  # noqa: E402
+
+CSP_PATH = os.path.join(CONTENT_DIR, 'Scripts/CommonServerPython/CommonServerPython.py')
+DEMISTOMOCK_DIR = os.path.join(CONTENT_DIR, 'Tests/demistomock')
+
+# runs in the child interpreter, should work with both python 2 and 3
+CHILD_CODE = '''
+from __future__ import print_function  # inherited by compile(), as in the docker loop
+import json
+import resource
+import sys
+import time
+
+sys.path.insert(0, sys.argv[2])
+import demistomock as demisto
+
+demisto.params = lambda: {'url': 'https://example.com', 'apikey': 'my_key', 'credentials': {'password': 'pass'}}
+with open(sys.argv[1]) as f:
+    code_string = f.read()
+modules_before = len(sys.modules)
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.time()
+code = compile(code_string, '<string>', 'exec')
+compiled = time.time()
+sub_globals = {'demisto': demisto}
+exec(code, sub_globals, sub_globals)
+executed = time.time()
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'compile_ms': (compiled - start) * 1000,
+    'exec_ms': (executed - compiled) * 1000,
+    'rss_kb': rss_after - rss_before,
+    'new_modules': len(sys.modules) - modules_before,
+}))
+'''
+
+
+def run_once(python, unified_path):
+    out = subprocess.check_output([python, '-c', CHILD_CODE, unified_path, DEMISTOMOCK_DIR],
+                                  universal_newlines=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the startup cost of CommonServerPython')
+    parser.add_argument('-r', '--runs', type=int, default=20, help='Number of runs (fresh interpreters)')
+    parser.add_argument('-p', '--python', default=sys.executable, help='The python interpreter to benchmark with')
+    parser.add_argument('-c', '--csp', default=CSP_PATH, help='Path of the CommonServerPython.py to benchmark')
+    parser.add_argument('-j', '--json', action='store_true', help='Print the results as json')
+    options = parser.parse_args()
+
+    with open(options.csp, 'r') as csp_file:
+        unified_code = clean_python_code(csp_file.read())
+    unified_path = os.path.join(os.getenv('TMPDIR', '/tmp'), 'common_server_benchmark_unified.py')
+    with open(unified_path, 'w') as unified_file:
+        unified_file.write(unified_code)
+
+    try:
+        runs = [run_once(options.python, unified_path) for _ in range(options.runs)]
+    finally:
+        os.remove(unified_path)
+
+    results = {key: statistics.median([run[key] for run in runs]) for key in runs[0]}
+    results['total_ms'] = results['compile_ms'] + results['exec_ms']
+    if options.json:
+        print(json.dumps(results, indent=4))
+        return
+    print('CommonServerPython startup ({} runs, median) with {}'.format(options.runs, options.python))
+    print('  compile:     {:8.2f} ms'.format(results['compile_ms']))
+    print('  execute:     {:8.2f} ms'.format(results['exec_ms']))
+    print('  total:       {:8.2f} ms'.format(results['total_ms']))
+    print('  peak rss:    {:8.0f} KB'.format(results['rss_kb']))
+    print('  new modules: {:8.0f}'.format(results['new_modules']))
+
+
+if __name__ == '__main__':
+    main()
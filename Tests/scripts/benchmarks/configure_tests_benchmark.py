@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Measures the test selection time of configure_tests.find_tests_for_modified_files.
+
+Selects the tests for a sample of single file changes (integrations, scripts and playbooks) and reports the median
+and total selection time. When a baseline implementation is given, it runs on the same sample, and the selected
+tests of both implementations are compared.
+Should run from the content root, after the id_set was created (Tests/scripts/update_id_set.py -r).
+
+Example:
+    git show origin/master:Tests/scripts/configure_tests.py > /tmp/configure_tests_master.py
+    python ./Tests/scripts/benchmarks/configure_tests_benchmark.py -b /tmp/configure_tests_master.py -s 200
+"""
+import os
+import sys
+import imp
+import glob
+import time
+import random
+import argparse
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../..'))
+from Tests.scripts import configure_tests  # noqa: E402
+
+
+@contextmanager
+def silence_stdout():
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def get_sample(sample_size, seed):
+    files = glob.glob('Integrations/*/*.yml') + glob.glob('Integrations/integration-*.yml')
+    files += glob.glob('Scripts/*/*.yml') + glob.glob('Scripts/script-*.yml')
+    files += glob.glob('Playbooks/playbook-*.yml')
+    files.sort()
+    random.Random(seed).shuffle(files)
+    return files[:sample_size]
+
+
+def select_tests(module, sample):
+    times = []
+    selected = []
+    for file_path in sample:
+        start = time.time()
+        try:
+            with silence_stdout():
+                tests = sorted(module.find_tests_for_modified_files([file_path]))
+        except Exception as ex:
+            # files which fail the selection (e.g. with an invalid fromversion) are compared by their error
+            tests = 'error: {}'.format(ex)
+        times.append(time.time() - start)
+        selected.append(tests)
+
+    return times, selected
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def print_times(title, times):
+    print('{}: median {:.2f} ms, total {:.2f} s'.format(title, median(times) * 1000, sum(times)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the test selection of configure_tests.py')
+    parser.add_argument('-s', '--sampleSize', type=int, default=100, help='Number of modified files to sample')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the modified files sample')
+    parser.add_argument('-b', '--baseline', help='Path of a configure_tests.py implementation to compare with')
+    options = parser.parse_args()
+
+    sample = get_sample(options.sampleSize, options.seed)
+    print('Selecting tests for {} modified files'.format(len(sample)))
+    times, selected = select_tests(configure_tests, sample)
+    print_times('current', times)
+
+    if options.baseline:
+        baseline = imp.load_source('configure_tests_baseline', options.baseline)
+        baseline_times, baseline_selected = select_tests(baseline, sample)
+        print_times('baseline', baseline_times)
+        print('speedup: {:.1f}x'.format(sum(baseline_times) / sum(times)))
+        mismatches = [file_path for file_path, tests, baseline_tests in zip(sample, selected, baseline_selected)
+                      if tests != baseline_tests]
+        if mismatches:
+            print('The selected tests are different for:\n{}'.format('\n'.join(mismatches)))
+            sys.exit(1)
+
+        print('The selected tests are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Measures the throughput of the line and framed protocols of Utils/_script_docker_python_loop.py.
+
+Runs the docker python loop as a sub process and plays the server side (a stub which acknowledges logs and answers
+requests with an empty object). The benchmarked script sends many demisto.info logs, a few executeCommand requests
+and one big result. Reports the median run time of each protocol, and verifies that all the messages arrived.
+
+Example:
+    python ./Tests/scripts/benchmarks/docker_loop_protocol_benchmark.py -l 5000 -m 8 -r 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+CONTENT_DIR = os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../..')
+LOOP_PATH = os.path.join(CONTENT_DIR, 'Utils/_script_docker_python_loop.py')
+
+SCRIPT = '''
+for i in range({logs}):
+    demisto.info('log message number {{}}'.format(i))
+for i in range({requests}):
+    demisto.executeCommand('getList', {{'listName': 'list {{}}'.format(i)}})
+demisto.results('x' * {result_size})
+'''
+
+
+class StubServer(object):
+    """Server side of the docker loop protocol, reading messages from the loop's stdout"""
+
+    def __init__(self, python):
+        self.process = subprocess.Popen([python, LOOP_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.buffer = ''
+        self.decoder = json.JSONDecoder()
+
+    def write(self, data):
+        self.process.stdin.write(data.encode('utf-8'))
+        self.process.stdin.flush()
+
+    def fill(self):
+        data = os.read(self.process.stdout.fileno(), 1024 * 1024)
+        if not data:
+            raise EOFError('The docker loop exited')
+        self.buffer += data.decode('utf-8')
+
+    def skip_separators(self):
+        # line protocol messages end with a new line, control messages with an escaped one
+        self.buffer = self.buffer.lstrip()
+        while self.buffer.startswith('\\n'):
+            self.buffer = self.buffer[2:].lstrip()
+
+    def read_json(self):
+        while True:
+            self.skip_separators()
+            if self.buffer:
+                try:
+                    msg, end = self.decoder.raw_decode(self.buffer)
+                    self.buffer = self.buffer[end:]
+                    return msg
+                except ValueError:
+                    pass
+            self.fill()
+
+    def read_frame(self):
+        self.skip_separators()
+        while '\n' not in self.buffer:
+            self.fill()
+        length, self.buffer = self.buffer.split('\n', 1)
+        length = int(length)
+        while len(self.buffer) < length:
+            self.fill()
+        payload, self.buffer = self.buffer[:length], self.buffer[length:]
+        return json.loads(payload)
+
+    def read_framed_messages(self):
+        """Yields the messages of the framed protocol, expanding log batches and joining chunks"""
+        chunks = []
+        while True:
+            frame = self.read_frame()
+            if frame['type'] == 'chunk':
+                chunks.append(frame['data'])
+                if frame['last']:
+                    yield json.loads(''.join(chunks))
+                    chunks = []
+            elif frame['type'] == 'batch':
+                for msg in frame['messages']:
+                    yield msg
+            else:
+                yield frame
+
+    def run(self, script, protocol):
+        """Runs a script and returns the received message counts by type"""
+        self.write('ping\n')
+        pong = self.read_json()
+        assert protocol in pong.get('protocols', ['line']), 'The loop does not support the {} protocol'.format(protocol)
+
+        context = {'script': script, 'integration': False, 'native': False, 'args': {}, 'context': {},
+                   'protocol': protocol}
+        self.write(json.dumps(context) + '\n')
+        counts = {}
+        messages = self.read_framed_messages() if protocol == 'framed' else iter(self.read_json, None)
+        for msg in messages:
+            counts[msg['type']] = counts.get(msg['type'], 0) + 1
+            if msg['type'] in ('completed', 'exception'):
+                break
+            if msg['type'] == 'executeCommand' or (msg['type'] == 'log' and protocol == 'line'):
+                self.write('2\n{}' if protocol == 'framed' else '{}\n')
+
+        return counts
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the docker python loop protocols')
+    parser.add_argument('-l', '--logs', type=int, default=5000, help='Number of demisto.info calls')
+    parser.add_argument('-q', '--requests', type=int, default=100, help='Number of executeCommand calls')
+    parser.add_argument('-m', '--resultMb', type=int, default=8, help='Size of the result in MB')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='Number of runs of each protocol')
+    parser.add_argument('-p', '--python', default=sys.executable, help='The python interpreter of the docker loop')
+    options = parser.parse_args()
+
+    script = SCRIPT.format(logs=options.logs, requests=options.requests, result_size=options.resultMb * 1024 * 1024)
+    expected = {'log': options.logs, 'executeCommand': options.requests, 'result': 1, 'completed': 1}
+    times = {}
+    server = StubServer(options.python)
+    try:
+        for protocol in ('line', 'framed'):
+            times[protocol] = []
+            for _ in range(options.runs):
+                start = time.time()
+                counts = server.run(script, protocol)
+                times[protocol].append(time.time() - start)
+                assert counts == expected, 'Unexpected messages with the {} protocol: {}'.format(protocol, counts)
+    finally:
+        server.close()
+
+    for protocol, protocol_times in times.items():
+        print('{}: median {:.3f} seconds ({} runs)'.format(protocol, median(protocol_times), options.runs))
+    print('speedup: {:.1f}x'.format(median(times['line']) / median(times['framed'])))
+
+
+if __name__ == '__main__':
+    main()
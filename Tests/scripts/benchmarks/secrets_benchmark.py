@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Measures the run time of the secrets detection (hook_validations/secrets.search_potential_secrets).
+
+Scans the text files of the TestData dir (and optionally more files), as the pre-commit hook scans the files of a
+diff. When a baseline implementation is given, it scans the same files, and the secrets found by both
+implementations are compared.
+Should run from the content root, as the secrets white list is read from ./Tests/secrets_white_list.json.
+
+Example:
+    git show origin/master:Tests/scripts/hook_validations/secrets.py > /tmp/secrets_master.py
+    python ./Tests/scripts/benchmarks/secrets_benchmark.py -b /tmp/secrets_master.py -r 3
+"""
+import os
+import sys
+import imp
+import glob
+import time
+import argparse
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../..'))
+from Tests.scripts.hook_validations import secrets  # noqa: E402
+
+
+@contextmanager
+def silence_stdout():
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def get_files(patterns):
+    files = set()
+    for pattern in patterns:
+        files.update(path for path in glob.glob(pattern) if os.path.isfile(path) and secrets.is_text_file(path))
+    return files
+
+
+def scan(module, files, runs):
+    times = []
+    secrets_found = None
+    for _ in range(runs):
+        start = time.time()
+        with silence_stdout():
+            secrets_found = module.search_potential_secrets(files)
+        times.append(time.time() - start)
+
+    # the order of the secrets of each file is arbitrary
+    return min(times), {file_name: sorted(file_secrets) for file_name, file_secrets in secrets_found.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the secrets detection')
+    parser.add_argument('-f', '--files', nargs='*', default=['TestData/*'], help='Glob patterns of the files to scan')
+    parser.add_argument('-r', '--runs', type=int, default=3, help='Number of runs, the fastest one is reported')
+    parser.add_argument('-b', '--baseline', help='Path of a secrets.py implementation to compare with')
+    options = parser.parse_args()
+
+    files = get_files(options.files)
+    print('Scanning {} files'.format(len(files)))
+    current_time, current_secrets = scan(secrets, files, options.runs)
+    print('current: {:.2f} seconds, secrets found in {} files'.format(current_time, len(current_secrets)))
+
+    if options.baseline:
+        baseline = imp.load_source('secrets_baseline', options.baseline)
+        baseline_time, baseline_secrets = scan(baseline, files, options.runs)
+        print('baseline: {:.2f} seconds, secrets found in {} files'.format(baseline_time, len(baseline_secrets)))
+        print('speedup: {:.1f}x'.format(baseline_time / current_time))
+        mismatches = sorted(file_name for file_name in set(current_secrets) | set(baseline_secrets)
+                            if current_secrets.get(file_name) != baseline_secrets.get(file_name))
+        if mismatches:
+            print('The secrets found are different for:\n{}'.format('\n'.join(mismatches)))
+            sys.exit(1)
+
+        print('The secrets found are identical')
+
+
+if __name__ == '__main__':
+    main()
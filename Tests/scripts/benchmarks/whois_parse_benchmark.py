@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Measures the run time of the parsing of raw whois responses (Integrations/Whois/Whois.parse_raw_whois).
+
+Parses the recorded responses of Integrations/Whois/test_data/raw_responses, each one on its own and all of them
+as the segments of a single raw data (as the responses of a referral chain are parsed). When a baseline
+implementation is given, it parses the same responses, and the outputs of both implementations are compared.
+Should run with the python version of the integration (python 2).
+
+Example:
+    git show origin/master:Integrations/Whois/Whois.py > /tmp/Whois_master.py
+    python ./Tests/scripts/benchmarks/whois_parse_benchmark.py -b /tmp/Whois_master.py
+"""
+import os
+import sys
+import imp
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+
+CONTENT_DIR = os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../..')
+WHOIS_DIR = os.path.join(CONTENT_DIR, 'Integrations/Whois')
+RAW_RESPONSES_PATTERN = os.path.join(WHOIS_DIR, 'test_data/raw_responses/*.txt')
+
+
+def load_whois(path, name, dev_dir):
+    sys.path[:0] = [dev_dir, os.path.join(CONTENT_DIR, 'Tests/demistomock'),
+                    os.path.join(CONTENT_DIR, 'Scripts/CommonServerPython')]
+    return imp.load_source(name, path)
+
+
+def get_raw_data_sets():
+    raw_responses = []
+    for path in sorted(glob.glob(RAW_RESPONSES_PATTERN)):
+        with open(path) as raw_response:
+            raw_responses.append(raw_response.read())
+
+    return [[raw_response] for raw_response in raw_responses] + [raw_responses]
+
+
+def parse(module, raw_data_sets, runs, repeat):
+    times = []
+    outputs = None
+    for _ in range(runs):
+        start = time.time()
+        for _ in range(repeat):
+            outputs = [module.parse_raw_whois(raw_data) for raw_data in raw_data_sets]
+        times.append(time.time() - start)
+
+    return min(times), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parsing of raw whois responses')
+    parser.add_argument('-r', '--runs', type=int, default=3, help='Number of runs, the fastest one is reported')
+    parser.add_argument('-n', '--repeat', type=int, default=20,
+                        help='Number of times the responses are parsed in a run')
+    parser.add_argument('-b', '--baseline', help='Path of a Whois.py implementation to compare with')
+    options = parser.parse_args()
+
+    # the integrations import CommonServerUserPython, which is created empty for the dev tasks
+    dev_dir = tempfile.mkdtemp()
+    try:
+        open(os.path.join(dev_dir, 'CommonServerUserPython.py'), 'a').close()
+        raw_data_sets = get_raw_data_sets()
+        print('Parsing {} raw data sets {} times'.format(len(raw_data_sets), options.repeat))
+        current = load_whois(os.path.join(WHOIS_DIR, 'Whois.py'), 'Whois', dev_dir)
+        current_time, current_outputs = parse(current, raw_data_sets, options.runs, options.repeat)
+        print('current: {:.2f} seconds'.format(current_time))
+
+        if options.baseline:
+            baseline = load_whois(options.baseline, 'Whois_baseline', dev_dir)
+            baseline_time, baseline_outputs = parse(baseline, raw_data_sets, options.runs, options.repeat)
+            print('baseline: {:.2f} seconds'.format(baseline_time))
+            print('speedup: {:.1f}x'.format(baseline_time / current_time))
+            mismatches = [index for index, output in enumerate(current_outputs) if output != baseline_outputs[index]]
+            if mismatches:
+                print('The parsed outputs are different for the raw data sets: {}'.format(mismatches))
+                sys.exit(1)
+
+            print('The parsed outputs are identical')
+    finally:
+        shutil.rmtree(dev_dir)
+
+
+if __name__ == '__main__':
+    main()
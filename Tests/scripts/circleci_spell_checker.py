@@ -1,7 +1,7 @@
 import re
 import sys
 
-from Tests.scripts.spell_checker import spell_checker
+from Tests.scripts.spell_checker import spell_check_files, print_unknown_words
 from Tests.test_utils import run_command, checked_type
 from Tests.scripts.constants import SPELLCHECK_FILE_TYPES, DESCRIPTION_REGEX
 
@@ -46,13 +46,10 @@ def check_changed_files():
     if branch_name != "master":
         all_changed_files_string = run_command("git diff --name-status origin/master...{}".format(branch_name))
         yml_files, md_files = get_modified_files(all_changed_files_string)
-        for yml_file in yml_files:
-            print("Checking the file - {}".format(yml_file))
-            spell_checker(yml_file)
-
-        for md_file in md_files:
-            print("Checking the file - {}".format(md_file))
-            spell_checker(md_file, is_md=True)
+        files_results = spell_check_files(yml_files, md_files)
+        for changed_file in sorted(yml_files) + sorted(md_files):
+            print("Checking the file - {}".format(changed_file))
+            print_unknown_words(files_results[changed_file])
 
     else:
         print("Not checking for spelling errors in master branch")
@@ -9,6 +9,7 @@ import json
 import glob
 import random
 import argparse
+from collections import defaultdict
 
 from Tests.scripts.constants import *
 from Tests.test_utils import get_yaml, str2bool, get_from_version, get_to_version, \
@@ -32,6 +33,11 @@ SECRETS_WHITE_LIST = 'secrets_white_list.json'
 # Global used to indicate if failed during any of the validation states
 _FAILED = False
 
+ID_SET_PATH = './Tests/id_set.json'
+
+# id_set graphs by (path, modification time), so the id_set is loaded and indexed once per run
+_ID_SET_GRAPHS = {}
+
 
 def checked_type(file_path, regex_list):
     """Check if the file_path is from the regex list"""
@@ -113,6 +119,72 @@ def get_modified_files(files_string):
             is_reputations_json, is_indicator_json)
 
 
+class IdSetGraph(object):
+    """Reverse-edge indexes of the id_set.
+
+    Finds the scripts, playbooks and test playbooks which use a given command, script or playbook without scanning
+    the whole id_set. Lookups return the entities in their id_set order, so the test selection is the same as when
+    scanning the id_set.
+
+    :param id_set: The loaded id_set.json.
+    """
+
+    def __init__(self, id_set):
+        self.integration_to_commands = {}
+        for integration in id_set.get('integrations', []):
+            self.integration_to_commands[integration.keys()[0]] = integration.values()[0].get('commands', [])
+
+        # each index maps a key to (position in id_set, entity data) tuples
+        self.playbooks_by_command = self._index(id_set.get('playbooks', []), 'command_to_integration')
+        self.playbooks_by_script = self._index(id_set.get('playbooks', []), 'implementing_scripts')
+        self.playbooks_by_playbook = self._index(id_set.get('playbooks', []), 'implementing_playbooks')
+        self.scripts_by_command = self._index(id_set.get('scripts', []), 'depends_on')
+        self.scripts_by_script = self._index(id_set.get('scripts', []), 'script_executions')
+
+        test_playbooks = id_set.get('TestPlaybooks', [])
+        self.test_playbooks_by_command = self._index(test_playbooks, 'command_to_integration')
+        self.test_playbooks_by_script = self._index(test_playbooks, 'implementing_scripts')
+        self.test_playbooks_by_playbook = self._index(test_playbooks, 'implementing_playbooks')
+
+    @staticmethod
+    def _index(entities, field):
+        index = defaultdict(list)
+        for position, entity in enumerate(entities):
+            entity_id = entity.keys()[0]
+            entity_data = entity.values()[0]
+            for key in set(entity_data.get(field, [])):
+                index[key].append((position, entity_id, entity_data))
+
+        return index
+
+    @staticmethod
+    def lookup(*indexes_and_keys):
+        """Get the entities which match any of the given keys in their index.
+
+        :param indexes_and_keys: (index, keys) pairs. The keys are command names, script ids or playbook ids and
+            all the indexes must be of the same entity type.
+
+        :return: (entity id, entity data) tuples, in their id_set order.
+        """
+        found = {}
+        for index, keys in indexes_and_keys:
+            for key in keys:
+                for position, entity_id, entity_data in index.get(key, []):
+                    found[position] = (entity_id, entity_data)
+
+        return [found[position] for position in sorted(found)]
+
+
+def get_id_set_graph(id_set_path=ID_SET_PATH):
+    """Load the id_set and build its graph, once per id_set version."""
+    cache_key = (id_set_path, os.path.getmtime(id_set_path))
+    if cache_key not in _ID_SET_GRAPHS:
+        with open(id_set_path, 'r') as id_set_file:
+            _ID_SET_GRAPHS[cache_key] = IdSetGraph(json.load(id_set_file))
+
+    return _ID_SET_GRAPHS[cache_key]
+
+
 def get_name(file_path):
     data_dictionary = get_yaml(file_path)
 
@@ -145,17 +217,19 @@ def collect_tests(script_ids, playbook_ids, integration_ids, catched_scripts, ca
 
     test_ids = get_test_ids()
 
-    with open("./Tests/id_set.json", 'r') as conf_file:
-        id_set = json.load(conf_file)
+    graph = get_id_set_graph()
+    integration_to_command = get_integration_commands(integration_ids, graph)
+    integration_commands = set([])
+    for commands in integration_to_command.values():
+        integration_commands.update(commands)
 
-    integration_set = id_set['integrations']
-    test_playbooks_set = id_set['TestPlaybooks']
-    integration_to_command = get_integration_commands(integration_ids, integration_set)
+    # only the test playbooks which use one of the affected ids can detect a usage
+    test_playbooks = graph.lookup((graph.test_playbooks_by_script, script_ids),
+                                  (graph.test_playbooks_by_playbook, playbook_ids),
+                                  (graph.test_playbooks_by_command, integration_commands))
 
-    for test_playbook in test_playbooks_set:
+    for test_playbook_id, test_playbook_data in test_playbooks:
         detected_usage = False
-        test_playbook_id = test_playbook.keys()[0]
-        test_playbook_data = test_playbook.values()[0]
         test_playbook_name = test_playbook_data.get('name')
         for script in test_playbook_data.get('implementing_scripts', []):
             if script in script_ids:
@@ -214,13 +288,11 @@ def get_test_ids(check_nightly_status=False):
     return test_ids
 
 
-def get_integration_commands(integration_ids, integration_set):
+def get_integration_commands(integration_ids, graph):
     integration_to_command = {}
-    for integration in integration_set:
-        integration_id = integration.keys()[0]
-        integration_data = integration.values()[0]
-        if integration_id in integration_ids:
-            integration_to_command[integration_id] = integration_data.get('commands', [])
+    for integration_id in integration_ids:
+        if integration_id in graph.integration_to_commands:
+            integration_to_command[integration_id] = graph.integration_to_commands[integration_id]
 
     return integration_to_command
 
@@ -295,12 +367,7 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
             integration_ids.add(_id)
             integration_to_version[_id] = (get_from_version(file_path), get_to_version(file_path))
 
-    with open("./Tests/id_set.json", 'r') as conf_file:
-        id_set = json.load(conf_file)
-
-    script_set = id_set['scripts']
-    playbook_set = id_set['playbooks']
-    integration_set = id_set['integrations']
+    graph = get_id_set_graph()
 
     catched_scripts, catched_playbooks = set([]), set([])
     updated_script_names = set([])
@@ -308,18 +375,18 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
     tests_set = set([])
 
     for script_id in script_names:
-        enrich_for_script_id(script_id, script_to_version[script_id], script_names, script_set, playbook_set,
+        enrich_for_script_id(script_id, script_to_version[script_id], script_names, graph,
                              playbook_names, updated_script_names, updated_playbook_names, catched_scripts,
                              catched_playbooks, tests_set)
 
-    integration_to_command = get_integration_commands(integration_ids, integration_set)
+    integration_to_command = get_integration_commands(integration_ids, graph)
     for integration_id, integration_commands in integration_to_command.items():
         enrich_for_integration_id(integration_id, integration_to_version[integration_id], integration_commands,
-                                  script_set, playbook_set, playbook_names, script_names, updated_script_names,
+                                  graph, playbook_names, script_names, updated_script_names,
                                   updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
 
     for playbook_id in playbook_names:
-        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, script_set, playbook_set,
+        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, graph,
                                updated_playbook_names, catched_playbooks, tests_set)
 
     for new_script in updated_script_names:
@@ -340,7 +407,7 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
     return tests_set, catched_scripts, catched_playbooks
 
 
-def enrich_for_integration_id(integration_id, given_version, integration_commands, script_set, playbook_set,
+def enrich_for_integration_id(integration_id, given_version, integration_commands, graph,
                               playbook_names, script_names, updated_script_names, updated_playbook_names,
                               catched_scripts, catched_playbooks, tests_set):
     """Enrich the list of affected scripts/playbooks by your change set.
@@ -348,8 +415,7 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param integration_id: The name of the integration we changed.
     :param given_version: the version of the integration we changed.
     :param integration_commands: The commands of the changed integation
-    :param script_set: The set of existing scripts within Content repo.
-    :param playbook_set: The set of existing playbooks within Content repo.
+    :param graph: The IdSetGraph of existing scripts and playbooks within Content repo.
     :param playbook_names: The names of the playbooks affected by your changes.
     :param script_names: The names of the scripts affected by your changes.
     :param updated_script_names: The names of scripts we identify as affected to your change set.
@@ -358,8 +424,7 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param catched_playbooks: The names of playbooks we found tests for.
     :param tests_set: The names of the caught tests.
     """
-    for playbook in playbook_set:
-        playbook_data = playbook.values()[0]
+    for _, playbook_data in graph.lookup((graph.playbooks_by_command, integration_commands)):
         playbook_name = playbook_data.get('name')
         playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
         playbook_toversion = playbook_data.get('toversion', '99.99.99')
@@ -378,11 +443,10 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
 
                         updated_playbook_names.add(playbook_name)
                         new_versions = (playbook_fromversion, playbook_toversion)
-                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, graph,
                                                updated_playbook_names, catched_playbooks, tests_set)
 
-    for script in script_set:
-        script_data = script.values()[0]
+    for _, script_data in graph.lookup((graph.scripts_by_command, integration_commands)):
         script_name = script_data.get('name')
         script_fromversion = script_data.get('fromversion', '0.0.0')
         script_toversion = script_data.get('toversion', '99.99.99')
@@ -401,15 +465,14 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
 
                         updated_script_names.add(script_name)
                         new_versions = (script_fromversion, script_toversion)
-                        enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set,
+                        enrich_for_script_id(script_name, new_versions, script_names, graph,
                                              playbook_names, updated_script_names, updated_playbook_names,
                                              catched_scripts, catched_playbooks, tests_set)
 
 
-def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, script_set, playbook_set,
+def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, graph,
                            updated_playbook_names, catched_playbooks, tests_set):
-    for playbook in playbook_set:
-        playbook_data = playbook.values()[0]
+    for _, playbook_data in graph.lookup((graph.playbooks_by_playbook, [given_playbook_id])):
         playbook_name = playbook_data.get('name')
         playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
         playbook_toversion = playbook_data.get('toversion', '99.99.99')
@@ -424,14 +487,13 @@ def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, scr
 
                 updated_playbook_names.add(playbook_name)
                 new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, graph,
                                        updated_playbook_names, catched_playbooks, tests_set)
 
 
-def enrich_for_script_id(given_script_id, given_version, script_names, script_set, playbook_set, playbook_names,
+def enrich_for_script_id(given_script_id, given_version, script_names, graph, playbook_names,
                          updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
-    for script in script_set:
-        script_data = script.values()[0]
+    for _, script_data in graph.lookup((graph.scripts_by_script, [given_script_id])):
         script_name = script_data.get('name')
         script_fromversion = script_data.get('fromversion', '0.0.0')
         script_toversion = script_data.get('toversion', '99.99.99')
@@ -445,12 +507,11 @@ def enrich_for_script_id(given_script_id, given_version, script_names, script_se
 
                 updated_script_names.add(script_name)
                 new_versions = (script_fromversion, script_toversion)
-                enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set, playbook_names,
+                enrich_for_script_id(script_name, new_versions, script_names, graph, playbook_names,
                                      updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks,
                                      tests_set)
 
-    for playbook in playbook_set:
-        playbook_data = playbook.values()[0]
+    for _, playbook_data in graph.lookup((graph.playbooks_by_script, [given_script_id])):
         playbook_name = playbook_data.get('name')
         playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
         playbook_toversion = playbook_data.get('toversion', '99.99.99')
@@ -463,7 +524,7 @@ def enrich_for_script_id(given_script_id, given_version, script_names, script_se
 
                 updated_playbook_names.add(playbook_name)
                 new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
+                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, graph,
                                        updated_playbook_names, catched_playbooks, tests_set)
 
 
@@ -4,6 +4,8 @@ import re
 import math
 import json
 import string
+from collections import Counter
+from multiprocessing import Pool, cpu_count
 
 try:
     import PyPDF2
@@ -50,8 +52,82 @@ IPV4_REGEX = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0
 DATES_REGEX = r'((\d{4}[/.-]\d{2}[/.-]\d{2})[T\s](\d{2}:?\d{2}:?\d{2}:?(\.\d{5,10})?([+-]\d{2}:?\d{2})?Z?)?)'
 # false positives
 UUID_REGEX = r'([\w]{8}-[\w]{4}-[\w]{4}-[\w]{4}-[\w]{8,12})'
+DOCKER_IMAGE_REGEX = r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)'
 # disable-secrets-detection-end
 
+# compiled once, each pattern is searched only in lines which contain a string it can't match without
+SECRETS_PATTERNS = {
+    'dates': re.compile(DATES_REGEX),
+    'uuids': re.compile(UUID_REGEX),
+    'docker': re.compile(DOCKER_IMAGE_REGEX),
+    'urls': re.compile(URLS_REGEX),
+    'emails': re.compile(EMAIL_REGEX),
+    'ipv6': re.compile(IPV6_REGEX),
+    'ipv4': re.compile(IPV4_REGEX),
+}
+
+# matchers of the generic and ioc white lists, created once for all the scanned files
+WHITE_LIST_MATCHERS = {}  # type: dict
+
+
+class SubstringMatcher(object):
+    """Aho-Corasick automaton, which checks in a single pass over a text whether it contains any of the given strings.
+
+    Attributes:
+        goto (list): the transitions of each state, by character.
+        fail (list): the state to continue from, when there is no transition for the next character.
+        is_match (list): whether a string of the set ends in each state.
+    """
+
+    def __init__(self, strings):
+        self.goto = [{}]
+        self.fail = [0]
+        self.is_match = [False]
+        for string_ in strings:
+            state = 0
+            for char in string_:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.is_match.append(False)
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.is_match[state] = True
+
+        # breadth first, so the fail state of each state is ready before its children are handled
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.is_match[next_state] = self.is_match[next_state] or self.is_match[self.fail[next_state]]
+
+    def search(self, text):
+        """Check whether the text contains any of the strings.
+
+        Args:
+            text (str): the text to search in.
+
+        Returns:
+            bool. True if any of the strings is a substring of the text.
+        """
+        goto, fail, is_match = self.goto, self.fail, self.is_match
+        if is_match[0]:
+            return True
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if is_match[state]:
+                return True
+        return False
+
 
 def get_secrets(branch_name, is_circle):
     secrets_found = {}
@@ -146,61 +222,97 @@ def search_potential_secrets(secrets_file_paths):
     # Get generic white list set
     conf_secrets_white_list, ioc_white_list, files_white_list = get_white_list()
 
+    file_paths = []
     for file_path in secrets_file_paths:
         if file_path in files_white_list:
             print("Skipping secrets detection for file: {} as it is white listed".format(file_path))
             continue
-        file_name = os.path.basename(file_path)
-        high_entropy_strings = []
-        secrets_found_with_regex = []
-        yml_file_contents = None
-        file_path_temp, file_extension = os.path.splitext(file_path)
-        skip_secrets = False
+        file_paths.append(file_path)
+
+    if len(file_paths) > 1:
+        pool = Pool(processes=min(cpu_count(), len(file_paths)), initializer=init_white_list_matchers,
+                    initargs=(conf_secrets_white_list, ioc_white_list))
+        try:
+            files_secrets = pool.map(search_file_secrets, file_paths)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        init_white_list_matchers(conf_secrets_white_list, ioc_white_list)
+        files_secrets = [search_file_secrets(file_path) for file_path in file_paths]
 
-        secrets_white_list = set(conf_secrets_white_list)
-        # get file contents
-        file_contents = get_file_contents(file_path, file_extension)
-        # if py/js file, search for yml in order to retrieve temp white list
-        if file_extension in {'.py', '.js'}:
-            yml_file_contents = retrieve_related_yml(file_path_temp)
-        # Add all context output paths keywords to whitelist temporary
-        if file_extension == '.yml' or yml_file_contents:
-            temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
-            secrets_white_list = secrets_white_list.union(temp_white_list)
-        # Search by lines after strings with high entropy as possibly suspicious
-        for line in file_contents.split('\n'):
-            # if detected disable-secrets comment, skip the line
-            skip_secrets = is_secrets_disabled(line, skip_secrets)
-            if skip_secrets:
-                continue
-            # REGEX scanning for IOCs and false positive groups
-            regex_secrets, false_positives = regex_for_secrets(line)
-            for regex_secret in regex_secrets:
-                if not any(ioc.lower() in regex_secret.lower() for ioc in ioc_white_list):
-                    secrets_found_with_regex.append(regex_secret)
-            # added false positives into white list array before testing the strings in line
-            secrets_white_list = secrets_white_list.union(false_positives)
-            # due to nature of eml files, skip string by string secret detection - only regex
-            if file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
-                    any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS):
-                continue
-            line = remove_false_positives(line)
-            # calculate entropy for each string in the file
-            for string_ in line.split():
-                # compare the lower case of the string against both generic whitelist & temp white list
-                if not any(white_list_string.lower() in string_.lower() for white_list_string in secrets_white_list):
-                    entropy = calculate_shannon_entropy(string_)
-                    if entropy >= ENTROPY_THRESHOLD:
-                        high_entropy_strings.append(string_)
-
-        if high_entropy_strings or secrets_found_with_regex:
-            # uniquify identical matches between lists
-            file_secrets = list(set(high_entropy_strings + secrets_found_with_regex))
-            secrets_found[file_name] = file_secrets
+    for file_path, file_secrets in zip(file_paths, files_secrets):
+        if file_secrets:
+            secrets_found[os.path.basename(file_path)] = file_secrets
 
     return secrets_found
 
 
+def init_white_list_matchers(conf_secrets_white_list, ioc_white_list):
+    WHITE_LIST_MATCHERS['generic'] = SubstringMatcher(white_item.lower() for white_item in conf_secrets_white_list)
+    WHITE_LIST_MATCHERS['iocs'] = SubstringMatcher(ioc.lower() for ioc in ioc_white_list)
+
+
+def search_file_secrets(file_path):
+    """Returns potential secrets(sensitive data) found in a single file, using the white list matchers
+    :param file_path: path of a file that is being commited to git repo
+    :return: list of the secrets found in the file
+    """
+    generic_white_list = WHITE_LIST_MATCHERS['generic']
+    ioc_white_list = WHITE_LIST_MATCHERS['iocs']
+    file_name = os.path.basename(file_path)
+    high_entropy_strings = []
+    secrets_found_with_regex = []
+    yml_file_contents = None
+    file_path_temp, file_extension = os.path.splitext(file_path)
+    skip_secrets = False
+
+    # temp white list of the file, and the false positives found in its lines
+    file_white_list = SubstringMatcher([])
+    false_positives_white_list = set()
+    # get file contents
+    file_contents = get_file_contents(file_path, file_extension)
+    # if py/js file, search for yml in order to retrieve temp white list
+    if file_extension in {'.py', '.js'}:
+        yml_file_contents = retrieve_related_yml(file_path_temp)
+    # Add all context output paths keywords to whitelist temporary
+    if file_extension == '.yml' or yml_file_contents:
+        temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
+        file_white_list = SubstringMatcher(temp_white_list)
+    skip_entropy_checks = file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
+        any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS)
+    # Search by lines after strings with high entropy as possibly suspicious
+    for line in file_contents.split('\n'):
+        # if detected disable-secrets comment, skip the line
+        skip_secrets = is_secrets_disabled(line, skip_secrets)
+        if skip_secrets:
+            continue
+        # REGEX scanning for IOCs and false positive groups
+        regex_secrets, false_positives = regex_for_secrets(line)
+        for regex_secret in regex_secrets:
+            if not ioc_white_list.search(regex_secret.lower()):
+                secrets_found_with_regex.append(regex_secret)
+        # added false positives into white list array before testing the strings in line
+        false_positives_white_list.update(false_positive.lower() for false_positive in false_positives)
+        # due to nature of eml files, skip string by string secret detection - only regex
+        if skip_entropy_checks:
+            continue
+        line = remove_false_positives(line)
+        # calculate entropy for each string in the file
+        for string_ in line.split():
+            # compare the lower case of the string against both generic whitelist & temp white list
+            lower_string = string_.lower()
+            if generic_white_list.search(lower_string) or file_white_list.search(lower_string) or \
+                    any(false_positive in lower_string for false_positive in false_positives_white_list):
+                continue
+            entropy = calculate_shannon_entropy(string_)
+            if entropy >= ENTROPY_THRESHOLD:
+                high_entropy_strings.append(string_)
+
+    # uniquify identical matches between lists
+    return list(set(high_entropy_strings + secrets_found_with_regex))
+
+
 def create_temp_white_list(file_contents):
     temp_white_list = set()
     context_paths = re.findall(r'contextPath: (\S+\.+\S+)', file_contents)
@@ -230,38 +342,33 @@ def regex_for_secrets(line):
     false_positives = []
 
     # Dates REGEX for false positive preventing since they have high entropy
-    dates = re.findall(DATES_REGEX, line)
+    dates = SECRETS_PATTERNS['dates'].findall(line)
     if dates:
         false_positives += [date[0].lower() for date in dates]
     # UUID REGEX
-    uuids = re.findall(UUID_REGEX, line)
-    if uuids:
-        false_positives += uuids
+    if '-' in line:
+        false_positives += SECRETS_PATTERNS['uuids'].findall(line)
     # docker images version are detected as ips. so we ignore and whitelist them
     # example: dockerimage: demisto/duoadmin:1.0.0.147
-    re_res = re.search(r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)', line)
+    re_res = SECRETS_PATTERNS['docker'].search(line) if 'dockerimage:' in line else None
     if re_res:
         docker_version = re_res.group(1)
         false_positives.append(docker_version)
         line = line.replace(docker_version, '')
     # URL REGEX
-    urls = re.findall(URLS_REGEX, line)
-    if urls:
-        potential_secrets += urls
+    if '://' in line:
+        potential_secrets += SECRETS_PATTERNS['urls'].findall(line)
     # EMAIL REGEX
-    emails = re.findall(EMAIL_REGEX, line)
-    if emails:
-        potential_secrets += emails
+    if '@' in line:
+        potential_secrets += SECRETS_PATTERNS['emails'].findall(line)
     # IPV6 REGEX
-    ipv6_list = re.findall(IPV6_REGEX, line)
-    if ipv6_list:
-        for ipv6 in ipv6_list:
+    if ':' in line:
+        for ipv6 in SECRETS_PATTERNS['ipv6'].findall(line):
             if ipv6 != '::' and len(ipv6) > 4:
                 potential_secrets.append(ipv6)
     # IPV4 REGEX
-    ipv4_list = re.findall(IPV4_REGEX, line)
-    if ipv4_list:
-        potential_secrets += ipv4_list
+    if '.' in line:
+        potential_secrets += SECRETS_PATTERNS['ipv4'].findall(line)
 
     return potential_secrets, false_positives
 
@@ -275,10 +382,12 @@ def calculate_shannon_entropy(data):
     if not data:
         return 0
     entropy = 0
-    # each unicode code representation of all characters which are considered printable
-    for x in (ord(c) for c in string.printable):
+    # count all the characters in a single pass
+    char_counts = Counter(data)
+    # each character which is considered printable
+    for char in string.printable:
         # probability of event X
-        px = float(data.count(chr(x))) / len(data)
+        px = float(char_counts.get(char, 0)) / len(data)
         if px > 0:
             # the information in every possible news, in bits
             entropy += - px * math.log(px, 2)
@@ -13,6 +13,24 @@ except ImportError:
     sys.exit(1)
 
 
+class CachedSchemaCore(Core):
+    """pykwalify Core which validates against a schema that is loaded once per schema file, instead of once per
+    validated file. The validation itself is pykwalify's own (Core.validate).
+
+    Attributes:
+        schema_file (str): the path of the schema file.
+    """
+    _schemas = {}  # type: dict
+
+    def __init__(self, source_file, schema_file):
+        self.schema_file = schema_file
+        if schema_file not in self._schemas:
+            # let pykwalify load the file, so it's parsed exactly as with a regular Core
+            self._schemas[schema_file] = Core(source_data={}, schema_files=[schema_file]).schema
+
+        super(CachedSchemaCore, self).__init__(source_file=source_file, schema_data=self._schemas[schema_file])
+
+
 class StructureValidator(object):
     """Structure validator is designed to validate the correctness of the file structure we enter to content repo.
 
@@ -111,8 +129,8 @@ class StructureValidator(object):
 
         if matching_regex not in self.SKIPPED_SCHEMAS or os.path.isfile(self.file_path):
             if matching_regex is not None and self.REGEXES_TO_SCHEMA_DICT.get(matching_regex):
-                c = Core(source_file=self.file_path,
-                         schema_files=[self.SCHEMAS_PATH + self.REGEXES_TO_SCHEMA_DICT.get(matching_regex) + '.yml'])
+                schema_file = self.SCHEMAS_PATH + self.REGEXES_TO_SCHEMA_DICT.get(matching_regex) + '.yml'
+                c = CachedSchemaCore(source_file=self.file_path, schema_file=schema_file)
                 try:
                     c.validate(raise_exception=True)
                 except Exception as err:
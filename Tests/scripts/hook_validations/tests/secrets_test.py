@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from Tests.scripts.hook_validations import secrets
+from Tests.scripts.hook_validations.secrets import SubstringMatcher, search_potential_secrets
+
+
+def contains_any(strings, text):
+    """The substring check of the white lists, before the matchers"""
+    return any(string_ in text for string_ in strings)
+
+
+@pytest.mark.parametrize('strings, text, expected', [
+    # overlapping strings
+    (['abcd', 'bcde', 'cdx'], 'xxabcdx', True),
+    (['abcd', 'bcde', 'cdx'], 'xxabcex', False),
+    (['abcd', 'bcde', 'cdx'], 'abcbcde', True),
+    # strings which are suffixes of other strings
+    (['she', 'he', 'hers', 'his'], 'ushers', True),
+    (['abc', 'bc', 'c'], 'xxbxx', False),
+    (['abc', 'bc', 'c'], 'xxbcx', True),
+    (['aab'], 'aaab', True),
+    # empty white lists, and an empty string which is a substring of any text
+    ([], 'text', False),
+    ([], '', False),
+    ([''], 'text', True),
+])
+def test_substring_matcher(strings, text, expected):
+    assert SubstringMatcher(strings).search(text) is expected
+    assert contains_any(strings, text) is expected
+
+
+def test_substring_matcher_random():
+    rand = random.Random(7)
+    for _ in range(200):
+        strings = [''.join(rand.choice('abc') for _ in range(rand.randint(1, 5))) for _ in range(rand.randint(0, 8))]
+        matcher = SubstringMatcher(strings)
+        for _ in range(20):
+            text = ''.join(rand.choice('abcd') for _ in range(rand.randint(0, 12)))
+            assert matcher.search(text) == contains_any(strings, text), (strings, text)
+
+
+# disable-secrets-detection-start
+FILES = {
+    'flagged.txt': 'key = Zx9Qw8Er7Ty6Ui5Op4As3Df2Gh1Jk0L\nurl: http://malicious-site.org/path\n',
+    # the white lists are case insensitive
+    'white_listed.txt': 'key = Ab1Cd2Ef3Gh4Ij5Kl6Mn7Op8Qr9St0\nurl: http://benign-site.org/path\n',
+    'empty.txt': 'nothing to see here\n',
+}
+GENERIC_WHITE_LIST = {'GH4IJ5KL6', 'benign-site.org'}
+IOC_WHITE_LIST = {'benign-site.org'}
+# disable-secrets-detection-end
+
+
+@pytest.mark.parametrize('file_names', [['flagged.txt'], sorted(FILES)])
+def test_search_potential_secrets(tmpdir, monkeypatch, mocker, file_names):
+    mocker.patch.object(secrets, 'get_white_list', return_value=(GENERIC_WHITE_LIST, IOC_WHITE_LIST, set()))
+    for file_name, content in FILES.items():
+        tmpdir.join(file_name).write(content)
+    # the scanned paths are relative to the content root
+    monkeypatch.chdir(tmpdir)
+
+    # a single file is scanned in process, several files in a pool
+    secrets_found = search_potential_secrets(file_names)
+    assert {file_name: sorted(file_secrets) for file_name, file_secrets in secrets_found.items()} == {
+        'flagged.txt': ['Zx9Qw8Er7Ty6Ui5Op4As3Df2Gh1Jk0L', 'http://malicious-site.org']  # disable-secrets-detection
+    }
+
+
+def test_search_potential_secrets_empty_white_list(tmpdir, monkeypatch, mocker):
+    mocker.patch.object(secrets, 'get_white_list', return_value=(set(), set(), set()))
+    for file_name, content in FILES.items():
+        tmpdir.join(file_name).write(content)
+    # the scanned paths are relative to the content root
+    monkeypatch.chdir(tmpdir)
+
+    secrets_found = search_potential_secrets(sorted(FILES))
+    assert sorted(secrets_found) == ['flagged.txt', 'white_listed.txt']
+    assert len(secrets_found['white_listed.txt']) == 2
@@ -2,7 +2,9 @@ import os
 import pytest
 from shutil import copyfile
 
-from Tests.scripts.hook_validations.structure import StructureValidator
+from pykwalify.core import Core
+
+from Tests.scripts.hook_validations.structure import StructureValidator, CachedSchemaCore
 from Tests.scripts.constants import PLAYBOOK_REGEX
 
 
@@ -95,10 +97,44 @@ def test_valid_file_examination():
 
 
 def test_invalid_file_examination():
-    copyfile("./Tests/setup/integration-test.yml", "Integrations/integration-test.yml")
+    copyfile("./Tests/setup/Playbooks.playbook-invalid.yml", "Playbooks/playbook-invalid.yml")
     validator = StructureValidator(file_path="Integrations/integration-test.yml")
 
     assert validator.is_file_valid() is False, \
         "Didn't find a problem in the file although it is not valid"
 
     os.remove("Integrations/integration-test.yml")
+
+
+@pytest.mark.parametrize('source_file, schema_file, is_valid', [
+    ('./Tests/setup/Playbooks.playbook-test.yml', './Tests/schemas/playbook.yml', True),
+    ('./Tests/setup/Playbooks.playbook-invalid.yml', './Tests/schemas/playbook.yml', False),
+])
+def test_cached_schema_core(source_file, schema_file, is_valid):
+    core = Core(source_file=source_file, schema_files=[schema_file])
+    core.validate(raise_exception=False)
+
+    # the second core uses the schema cached by the first one
+    for _ in range(2):
+        cached_core = CachedSchemaCore(source_file=source_file, schema_file=schema_file)
+        cached_core.validate(raise_exception=False)
+        assert cached_core.validation_errors == core.validation_errors
+        assert is_valid == (not cached_core.validation_errors)
+
+
+def test_validate_file_scheme():
+    from Tests.scripts.validate_files import validate_file_scheme
+    copyfile("./Tests/setup/Playbooks.playbook-test.yml", "Playbooks/playbook-test.yml")
+    copyfile("./Tests/setup/Playbooks.playbook-invalid.yml", "Playbooks/playbook-invalid.yml")
+    try:
+        is_valid, output, _ = validate_file_scheme("Playbooks/playbook-test.yml")
+        assert is_valid
+        assert output == ''
+
+        # the printed errors are captured and returned, to be printed in order by the parent process
+        is_valid, output, _ = validate_file_scheme("Playbooks/playbook-invalid.yml")
+        assert not is_valid
+        assert 'Failed: Playbooks/playbook-invalid.yml failed' in output
+    finally:
+        os.remove("Playbooks/playbook-test.yml")
+        os.remove("Playbooks/playbook-invalid.yml")
@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+import json
+import zipfile
+
+import yaml
+import pytest
+
+if sys.version_info[0] > 2:
+    pytest.skip('content_creator runs with python 2', allow_module_level=True)
+
+import package_creator  # noqa: E402
+from content_creator import main, get_from_version, ZIP_PRE, ZIP_POST, ZIP_TEST  # noqa: E402
+
+CONTENT_FILES = {
+    # a fromversion of a nested key is not the fromversion of the file
+    'Integrations/integration-Old.yml': 'commonfields:\n  id: Old\nname: Old\nscript:\n  fromversion: 5.0.0\n',
+    'Integrations/integration-New.yml': 'commonfields:\n  id: New\nname: New\nfromversion: 4.0.0\n',
+    'Scripts/script-Quoted.yml': "commonfields:\n  id: Quoted\nname: Quoted\nfromversion: '3.5.0'\n",
+    'Scripts/script-Number.yml': 'commonfields:\n  id: Number\nname: Number\nfromversion: 3.0\n',
+    'Scripts/ScriptPkg/ScriptPkg.yml': "commonfields:\n  id: ScriptPkg\nname: ScriptPkg\ntype: python\nscript: '-'\n"
+                                       "fromversion: 5.0.0\n",
+    'Scripts/ScriptPkg/ScriptPkg.py': "demisto.results('ok')\n",
+    'IncidentFields/incidentfield-a.json': '{"incidentFields": [{"id": "a"}]}',
+    'IndicatorFields/incidentfield-b.json': '[{"id": "b"}]',
+    'TestPlaybooks/playbook-T.yml': 'id: T\n',
+    'TestPlaybooks/NonCircleTests/playbook-N.yml': 'id: N\n',
+    'Tools/tool1/tool.txt': 'tool',
+    'content-descriptor.json': '{}',
+    'Documentation/doc-CommonServer.json': '[]',
+    'Tests/id_set.json': '{}',
+    'release-notes.md': 'notes',
+}
+
+COMMON_ENTRIES = {'tools-tool1.zip', 'content-descriptor.json', 'doc-CommonServer.json'}
+EXPECTED_ENTRIES = {
+    ZIP_PRE: COMMON_ENTRIES | {'integration-Old.yml', 'script-Number.yml', 'incidentfield-a.json',
+                               'incidentfield-b.json', 'incidentfield-indicatorfield-b.json'},
+    ZIP_POST: COMMON_ENTRIES | {'integration-Old.yml', 'integration-New.yml', 'script-Quoted.yml', 'script-Number.yml',
+                                'script-ScriptPkg.yml', 'incidentfield-a.json', 'incidentfield-indicatorfield-b.json'},
+    ZIP_TEST: COMMON_ENTRIES | {'integration-New.yml', 'script-Quoted.yml', 'script-ScriptPkg.yml',
+                                'incidentfield-a.json', 'incidentfield-b.json', 'incidentfield-indicatorfield-b.json',
+                                'playbook-T.yml', 'playbook-N.yml'},
+}
+
+
+@pytest.fixture
+def content_dir(tmpdir, monkeypatch):
+    for path, content in CONTENT_FILES.items():
+        tmpdir.join(path).write(content, ensure=True)
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(package_creator, 'UNIFY_CACHE_DIR', str(tmpdir.join('unify_cache')))
+    return tmpdir
+
+
+def test_get_from_version(content_dir):
+    # the fromversion is read as when loading the whole yml
+    for path in CONTENT_FILES:
+        if path.endswith('.yml') and not path.startswith('TestPlaybooks'):
+            with open(path) as yml_file:
+                assert get_from_version(path) == yaml.safe_load(yml_file).get('fromversion', '0')
+
+
+def test_content_bundles(content_dir):
+    artifacts = content_dir.mkdir('artifacts')
+    main(str(artifacts))
+
+    for zip_name, expected_entries in EXPECTED_ENTRIES.items():
+        with zipfile.ZipFile(str(artifacts.join(zip_name + '.zip'))) as bundle:
+            assert set(bundle.namelist()) == expected_entries
+            # the files are added as they are
+            for path, content in CONTENT_FILES.items():
+                if path.endswith('.yml') and os.path.basename(path) in expected_entries:
+                    assert bundle.read(os.path.basename(path)) == content
+            assert json.loads(bundle.read('incidentfield-a.json')) == [{'id': 'a'}]
+            assert json.loads(bundle.read('incidentfield-indicatorfield-b.json')) == [{'id': 'b'}]
+            with zipfile.ZipFile(io.BytesIO(bundle.read('tools-tool1.zip'))) as tools_zip:
+                assert tools_zip.read('tool.txt') == 'tool'
+
+    with zipfile.ZipFile(str(artifacts.join(ZIP_POST + '.zip'))) as bundle:
+        assert "demisto.results('ok')" in bundle.read('script-ScriptPkg.yml')
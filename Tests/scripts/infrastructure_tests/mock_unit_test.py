@@ -1,6 +1,14 @@
+import time
+import sys
+import pytest
+import threading
+from collections import deque
+import requests
 from mock import patch
-from Tests.mock_server import AMIConnection, clean_filename, get_mock_file_path, get_log_file_path, get_folder_path
-from Tests.test_content import organize_tests
+from Tests.mock_server import AMIConnection, LocalReplayProxy, clean_filename, get_mock_file_path, get_log_file_path, \
+    get_folder_path, get_replay_key, get_local_replay_options
+from Tests.test_content import organize_tests, run_test_scenarios_concurrently, get_expected_duration
+from Tests.test_integration import get_polling_interval, MIN_POLLING_INTERVAL, MAX_POLLING_INTERVAL
 
 
 def test_clean_filename():
@@ -47,3 +55,115 @@ def test_integration_list_split_by_unmockable():
 
     assert mockable == [test3]
     assert unmockable == [test1, test2]
+
+
+def test_concurrent_tests_results_in_conf_order():
+    tests = [
+        {'playbookID': 'slow', 'integrations': 'first'},
+        {'playbookID': 'same_integration', 'integrations': ['first', 'second']},
+        {'playbookID': 'no_integrations'},
+        {'playbookID': 'failing', 'integrations': 'second'},
+    ]
+    running = set()
+    conflicts = []
+    lock = threading.Lock()
+
+    def run_scenario(test, failed_playbooks, succeed_playbooks, skipped_tests, skipped_integration):
+        integrations = test.get('integrations', [])
+        integrations = set(integrations if isinstance(integrations, list) else [integrations])
+        with lock:
+            conflicts.extend(running.intersection(integrations))
+            running.update(integrations)
+        time.sleep(0.05 if test['playbookID'] == 'slow' else 0.01)
+        with lock:
+            running.difference_update(integrations)
+        if test['playbookID'] == 'failing':
+            failed_playbooks.append(test['playbookID'])
+        else:
+            succeed_playbooks.append(test['playbookID'])
+
+    failed_playbooks, succeed_playbooks, skipped_tests, skipped_integration = [], [], set(), set()
+    run_test_scenarios_concurrently(tests, 3, run_scenario, failed_playbooks, succeed_playbooks, skipped_tests,
+                                    skipped_integration)
+
+    assert not conflicts
+    assert failed_playbooks == ['failing']
+    assert succeed_playbooks == ['slow', 'same_integration', 'no_integrations']
+
+
+def test_concurrent_tests_exit(capsys):
+    tests = [{'playbookID': 'exiting'}, {'playbookID': 'passing'}, {'playbookID': 'exiting_again'}]
+
+    def run_scenario(test, failed_playbooks, succeed_playbooks, skipped_tests, skipped_integration):
+        print('running {}'.format(test['playbookID']))
+        if test['playbookID'].startswith('exiting'):
+            sys.exit(1)
+        succeed_playbooks.append(test['playbookID'])
+
+    failed_playbooks, succeed_playbooks, skipped_tests, skipped_integration = [], [], set(), set()
+    run_test_scenarios_concurrently(tests, 1, run_scenario, failed_playbooks, succeed_playbooks, skipped_tests,
+                                    skipped_integration)
+
+    # the worker goes on to the next tests, and the output of each test is printed
+    assert failed_playbooks == ['exiting', 'exiting_again']
+    assert succeed_playbooks == ['passing']
+    output = capsys.readouterr()[0]
+    assert 'running exiting\n' in output
+    assert 'running passing\n' in output
+    assert 'running exiting_again\n' in output
+
+
+def test_polling_interval():
+    # unknown duration - fast polls at first, then back off
+    assert get_polling_interval(0) == MIN_POLLING_INTERVAL
+    assert MIN_POLLING_INTERVAL < get_polling_interval(10) < MAX_POLLING_INTERVAL
+    assert get_polling_interval(1000) == MAX_POLLING_INTERVAL
+    # known duration - sleep most of it at once, then poll fast around its end
+    assert get_polling_interval(0, expected_duration=6) == 3
+    assert get_polling_interval(5.9, expected_duration=6) == MIN_POLLING_INTERVAL
+    assert get_polling_interval(6, expected_duration=6) == MIN_POLLING_INTERVAL
+
+
+def test_expected_duration():
+    timings_history = {
+        'mocked': [{'mock': True, 'setup': 1, 'run': 20, 'teardown': 1}, {'mock': True, 'setup': 1, 'run': 8}],
+        'failed_setup': [{'mock': False}],
+    }
+    assert get_expected_duration(timings_history, 'mocked') == 8
+    assert get_expected_duration(timings_history, 'failed_setup') == 0
+    assert get_expected_duration(timings_history, 'new_test') == 0
+
+
+def test_local_replay_proxy():
+    responses = {
+        get_replay_key('GET', 'http', 'api.example.com', 80, '/ip?q=1', b''): deque([
+            (200, 'OK', [('Content-Type', 'application/json')], b'{"ip": "first"}'),
+            (200, 'OK', [('Content-Type', 'application/json')], b'{"ip": "second"}'),
+        ])
+    }
+    proxy = LocalReplayProxy(port=0)
+    with patch('Tests.mock_server.load_mock_flows', return_value=responses):
+        proxy.start(u'test_playbook')
+    try:
+        proxies = {'http': 'http://' + proxy.address}
+        # recorded responses of the same request are replayed in order
+        assert requests.get('http://api.example.com/ip?q=1', proxies=proxies).json() == {'ip': 'first'}
+        assert requests.get('http://api.example.com/ip?q=1', proxies=proxies).json() == {'ip': 'second'}
+        assert requests.get('http://api.example.com/ip?q=1', proxies=proxies).status_code == 502
+    finally:
+        unmatched_requests = proxy.stop()
+
+    assert unmatched_requests == ['No recorded response for GET http://api.example.com:80/ip?q=1']
+
+
+def test_get_local_replay_options():
+    options = get_local_replay_options(['-p', 'x', '--', 'echo'])
+    assert options.playbookID == 'x'
+    assert options.command == ['echo']
+
+    options = get_local_replay_options(['-p', 'x', 'pytest', '-q', 'Whois_test.py'])
+    assert options.command == ['pytest', '-q', 'Whois_test.py']
+
+    for args in (['-p', 'x'], ['-p', 'x', '--']):
+        with pytest.raises(SystemExit):
+            get_local_replay_options(args)
@@ -0,0 +1,68 @@
+import io
+import os
+import sys
+
+import pytest
+
+if sys.version_info[0] > 2:
+    pytest.skip('package_creator runs with python 2', allow_module_level=True)
+
+import package_creator  # noqa: E402
+from package_creator import merge_script_package_to_yml, get_unify_cache_key, get_yml_path  # noqa: E402
+
+PACKAGE_PATH = 'Integrations/Test/'
+PACKAGE_FILES = {
+    'Test.yml': "commonfields:\n  id: Test\nname: Test\nscript:\n  type: python\n  script: '-'\n",
+    'Test.py': "demisto.results('ok')\n",
+    'Test_image.png': 'image',
+    'Test_description.md': 'description',
+}
+
+
+@pytest.fixture
+def package(tmpdir, monkeypatch):
+    for name, content in PACKAGE_FILES.items():
+        tmpdir.join(PACKAGE_PATH, name).write(content, ensure=True)
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(package_creator, 'UNIFY_CACHE_DIR', str(tmpdir.join('unify_cache')))
+    return tmpdir
+
+
+def get_cache_key():
+    return get_unify_cache_key(PACKAGE_PATH, 'Integrations', get_yml_path(PACKAGE_PATH))
+
+
+@pytest.mark.parametrize('source_file', sorted(PACKAGE_FILES))
+def test_unify_cache_key(package, source_file):
+    cache_key = get_cache_key()
+    assert get_cache_key() == cache_key
+
+    # a change in any of the package sources invalidates the cached yml
+    package.join(PACKAGE_PATH, source_file).write('\n', mode='a')
+    assert get_cache_key() != cache_key
+
+
+def test_unify_cache(package, mocker):
+    output_path = merge_script_package_to_yml(PACKAGE_PATH, 'Integrations')[0]
+    with io.open(output_path, encoding='utf-8') as output_file:
+        unified_yml = output_file.read()
+    assert "demisto.results('ok')" in unified_yml
+    assert 'detaileddescription: |\n  description\n' in unified_yml
+    assert 'image: data:image/png;base64,' in unified_yml
+    # the cache entry is written to a temp file, which is renamed into place when complete
+    assert os.listdir(package_creator.UNIFY_CACHE_DIR) == [get_cache_key() + '.json']
+
+    os.remove(output_path)
+    unify_package = mocker.patch.object(package_creator, 'unify_package')
+    assert merge_script_package_to_yml(PACKAGE_PATH, 'Integrations') == \
+        ('Integrations/integration-Test.yml', PACKAGE_PATH + 'Test.yml', PACKAGE_PATH + 'Test.py',
+         PACKAGE_PATH + 'Test_image.png', PACKAGE_PATH + 'Test_description.md')
+    assert not unify_package.called
+    with io.open(output_path, encoding='utf-8') as output_file:
+        assert output_file.read() == unified_yml
+
+    # without the cache, the package is unified again
+    unify_package.return_value = {'yml_text': unified_yml, 'script_path': None, 'image_path': None,
+                                  'desc_path': None}
+    merge_script_package_to_yml(PACKAGE_PATH, 'Integrations', use_cache=False)
+    assert unify_package.called
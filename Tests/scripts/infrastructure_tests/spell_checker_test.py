@@ -0,0 +1,75 @@
+import pytest
+
+spellchecker = pytest.importorskip('spellchecker')
+
+from Tests.scripts import spell_checker  # noqa: E402
+from Tests.scripts.spell_checker import spell_check_files  # noqa: E402
+
+# disable-secrets-detection-start
+YML = 'name: Demisto Integration\ndisplay: Qwzzy Things\ncomment: things of Qwzzy\nscript:\n  ' \
+      'description: Gets the Blorf\n  id: Notchecked\n'
+MD = 'The Blorf of the integration\nanother Flurbish line\n\nKnownword here\n'
+# disable-secrets-detection-end
+
+
+@pytest.fixture
+def files(tmpdir, monkeypatch):
+    tmpdir.join('known_words.txt').write('Demisto\nKnownword\n')
+    tmpdir.join('integration.yml').write(YML)
+    tmpdir.join('README.md').write(MD)
+    monkeypatch.setattr(spell_checker, 'KNOWN_WORDS_PATH', str(tmpdir.join('known_words.txt')))
+    monkeypatch.setattr(spell_checker, 'SPELL_CHECKER_CACHE_PATH', str(tmpdir.join('spell_checker_cache.json')))
+    return str(tmpdir.join('integration.yml')), str(tmpdir.join('README.md'))
+
+
+def is_unknown_word(word):
+    checker = spellchecker.SpellChecker()
+    checker.word_frequency.load_text_file(spell_checker.KNOWN_WORDS_PATH)
+    return bool(checker.unknown([word]))
+
+
+def test_spell_check_files(files):
+    yml_path, md_path = files
+    results = spell_check_files([yml_path], [md_path], use_cache=False)
+
+    assert results == {
+        yml_path: {'Qwzzy': ['display', 'comment'], 'Blorf': ['script.description']},
+        md_path: {'Blorf': ['line 1'], 'Flurbish': ['line 2']},
+    }
+    # the words of all the files are checked at once, as each word is checked on its own
+    for path, is_md in ((yml_path, False), (md_path, True)):
+        for word in spell_checker.get_file_words(path, is_md):
+            assert (word in results[path]) is is_unknown_word(word)
+
+
+def test_spell_check_files_cache(files, mocker):
+    yml_path, md_path = files
+    results = spell_check_files([yml_path], [md_path])
+    checker = mocker.patch.object(spell_checker, 'SpellChecker', wraps=spellchecker.SpellChecker)
+
+    # cache hit
+    assert spell_check_files([yml_path], [md_path]) == results
+    assert not checker.called
+
+    # a changed file is checked again, the others are taken from the cache
+    with open(md_path, 'a') as md_file:
+        md_file.write('Zorbleq\n')
+    md_results = spell_check_files(md_paths=[md_path])
+    assert checker.call_count == 1
+    assert md_results[md_path] == dict(results[md_path], Zorbleq=['line 5'])
+    assert spell_check_files([yml_path], [md_path]) == dict(results, **md_results)
+    assert checker.call_count == 1
+
+    # the cached results are of the known words, the checker and the pyspellchecker version
+    with open(spell_checker.KNOWN_WORDS_PATH, 'a') as known_words_file:
+        known_words_file.write('Blorf\n')
+    assert 'Blorf' not in spell_check_files([yml_path])[yml_path]
+    assert checker.call_count == 2
+
+    mocker.patch.object(spellchecker, '__version__', 'other', create=True)
+    spell_check_files([yml_path])
+    assert checker.call_count == 3
+
+    mocker.patch.object(spell_checker, 'SPELL_CHECKER_PATH', md_path)
+    spell_check_files([yml_path])
+    assert checker.call_count == 4
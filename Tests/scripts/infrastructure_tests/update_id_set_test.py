@@ -0,0 +1,35 @@
+import os
+import json
+
+from Tests.scripts.update_id_set import get_parser_version, load_id_set_cache, save_id_set_cache
+
+
+def test_get_parser_version(tmpdir):
+    parser_files = [str(tmpdir.join('update_id_set.py')), str(tmpdir.join('test_utils.py'))]
+    for parser_file in parser_files:
+        tmpdir.join(os.path.basename(parser_file)).write('code')
+    version = get_parser_version(parser_files)
+    assert version == get_parser_version(parser_files)
+
+    # a change in any of the files the records depend on changes the version
+    tmpdir.join('test_utils.py').write('changed code')
+    assert get_parser_version(parser_files) != version
+
+
+def test_id_set_cache(tmpdir):
+    cache_path = str(tmpdir.join('id_set_cache.json'))
+    files_cache = {'Scripts/script-A.yml': {'section': 'scripts', 'hash': '1', 'data': [{'A': {'name': 'A'}}]}}
+
+    # no cache yet
+    assert load_id_set_cache(cache_path, 'version') == {}
+
+    save_id_set_cache(cache_path, 'version', files_cache)
+    assert load_id_set_cache(cache_path, 'version') == files_cache
+
+    # the records of another parser version are not used
+    assert load_id_set_cache(cache_path, 'other version') == {}
+
+    # a corrupted cache is ignored
+    with open(cache_path, 'w') as cache_file:
+        cache_file.write(json.dumps(files_cache)[:-5])
+    assert load_id_set_cache(cache_path, 'version') == {}
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import os
 import sys
+import json
+import time
+import hashlib
 import subprocess
 import concurrent.futures
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from pkg_dev_test_tasks import get_dev_requirements
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,32 +14,122 @@ CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
 sys.path.append(CONTENT_DIR)
 from Tests.test_utils import print_color, LOG_COLORS  # noqa: E402
 
+PKG_ROOT_DIRS = ["Integrations", "Scripts", "Beta_Integrations"]
+# results of green runs and durations of previous runs, by package
+RESULTS_CACHE_PATH = os.path.join(CONTENT_DIR, 'Tests', 'pkg_dev_tasks_cache.json')
+# files which pkg_dev_test_tasks.py copies into each package (see setup_dev_files)
+DEV_FILES = {'demistomock.py', 'CommonServerUserPython.py', 'conftest.py', 'CommonServerPython.py'}
+# files outside of the packages which all the dev tasks depend on
+DEV_ENV_PATHS = [
+    os.path.join(CONTENT_DIR, 'Scripts/CommonServerPython/CommonServerPython.py'),
+    os.path.join(CONTENT_DIR, 'Tests/demistomock/demistomock.py'),
+    os.path.join(SCRIPT_DIR, 'pkg_dev_test_tasks.py'),
+    os.path.join(SCRIPT_DIR, 'pkg_dev_container_setup.sh'),
+    os.path.join(SCRIPT_DIR, 'run_dev_tasks.sh'),
+    os.path.join(SCRIPT_DIR, 'run_mypy.sh'),
+    os.path.join(SCRIPT_DIR, 'dev_envs'),
+    # flake8 config
+    os.path.join(CONTENT_DIR, 'tox.ini'),
+    # get_code_file of pkg_dev_test_tasks.py
+    os.path.join(CONTENT_DIR, 'package_creator.py'),
+]
 
-def run_dev_task(pkg_dir: str, params: Optional[List[str]]) -> Tuple[subprocess.CompletedProcess, str]:
+
+def run_dev_task(pkg_dir: str, params: Optional[List[str]]) -> Tuple[subprocess.CompletedProcess, str, float]:
     args = [SCRIPT_DIR + '/pkg_dev_test_tasks.py', '-d', pkg_dir]
     if params:
         args.extend(params)
     cmd_line = " ".join(args)
     # color stderr in red and remove the warning about no config file from pylint
     cmd_line += r" 2> >(sed '/No config file found, using default configuration/d' | sed $'s,.*,\x1B[31m&\x1B[0m,'>&1)"
+    start = time.time()
     res = subprocess.run(cmd_line, text=True, capture_output=True, shell=True, executable='/bin/bash')
-    return (res, pkg_dir)
+    return (res, pkg_dir, time.time() - start)
+
 
+def get_changed_pkgs(pkg_dirs: List[str]) -> Set[str]:
+    """Get the packages with changes, by a single git diff of all the packages
 
-def should_run_pkg(pkg_dir: str) -> bool:
+    Returns:
+        set -- The packages which have changed files, all the packages if DIFF_COMPARE is not set
+    """
     diff_compare = os.getenv("DIFF_COMPARE")
     if not diff_compare:
-        return True
+        return set(pkg_dirs)
     if os.getenv('CONTENT_PRECOMMIT_RUN_DEV_TASKS'):
         # if running in precommit we check against staged
         diff_compare = '--staged'
-    res = subprocess.run(["git", "diff", "--name-only", diff_compare, "--", pkg_dir], text=True, capture_output=True)
-    if res.stdout:
-        return True
-    return False
+    res = subprocess.run(["git", "diff", "--name-only", diff_compare, "--"] + PKG_ROOT_DIRS, text=True,
+                         capture_output=True)
+    changed_dirs = set()
+    for changed_file in res.stdout.splitlines():
+        parts = changed_file.split('/')
+        if len(parts) > 2:
+            changed_dirs.add('/'.join(parts[:2]))
+    return changed_dirs.intersection(pkg_dirs)
+
+
+def hash_files(sha1, path: str, skipped_files: Set[str] = frozenset()):
+    """Add the names and contents of a file, or of all the files under a dir (in a stable order), to a hash"""
+    if os.path.isfile(path):
+        sha1.update(path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            sha1.update(f.read())
+        return
+    for root, dirs, files in os.walk(path):
+        # skip caches (.pytest_cache, .mypy_cache, __pycache__)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+        for file_name in sorted(files):
+            if file_name in skipped_files or file_name.endswith('.pyc'):
+                continue
+            file_path = os.path.join(root, file_name)
+            sha1.update(os.path.relpath(file_path, path).encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                sha1.update(f.read())
+
+
+def get_dev_env_hash(params: Optional[List[str]]) -> str:
+    """Hash of CommonServerPython, the dev tasks and their dev environments, and the dev tasks params"""
+    sha1 = hashlib.sha1()
+    for path in DEV_ENV_PATHS:
+        hash_files(sha1, path)
+    sha1.update(' '.join(params or []).encode('utf-8'))
+    return sha1.hexdigest()
+
+
+def get_pkg_hash(pkg_dir: str, dev_env_hash: str) -> str:
+    sha1 = hashlib.sha1(dev_env_hash.encode('utf-8'))
+    # the package's own CommonServerPython.py is part of the package only in Scripts/CommonServerPython
+    skipped_files = DEV_FILES - {'CommonServerPython.py'} if pkg_dir == 'Scripts/CommonServerPython' else DEV_FILES
+    hash_files(sha1, pkg_dir, skipped_files)
+    return sha1.hexdigest()
+
+
+def load_results_cache() -> Dict[str, dict]:
+    try:
+        with open(RESULTS_CACHE_PATH, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (IOError, ValueError):
+        cache = {}
+    cache.setdefault('green', {})
+    cache.setdefault('durations', {})
+    return cache
 
 
-def handle_run_res(res: Tuple[subprocess.CompletedProcess, str], fail_pkgs: list, good_pkgs: list):
+def save_results_cache(cache: Dict[str, dict]):
+    with open(RESULTS_CACHE_PATH, 'w') as cache_file:
+        json.dump(cache, cache_file, indent=4, sort_keys=True)
+
+
+def sort_longest_first(pkg_dirs: List[str], durations: Dict[str, float]) -> List[str]:
+    """Sort the packages by their duration in previous runs, longest first.
+    Packages without a previous duration are assumed to take the average duration.
+    """
+    average_duration = sum(durations.values()) / len(durations) if durations else 0
+    return sorted(pkg_dirs, key=lambda pkg_dir: durations.get(pkg_dir, average_duration), reverse=True)
+
+
+def handle_run_res(res: Tuple[subprocess.CompletedProcess, str, float], fail_pkgs: list, good_pkgs: list):
     if res[0].returncode != 0:
         fail_pkgs.append(res[1])
         print_color("============= {} =============".format(res[1]), LOG_COLORS.RED)
@@ -52,22 +145,51 @@ def main():
         print("Run pkg_dev_test_tasks.py in parallel. Accepts same parameters as pkg_dev_test_tasks.py.\n"
               "Additionally you can specify the following environment variables:\n"
               "DIFF_COMPARE: specify how to do a git compare. Leave empty to run on all.\n"
-              "MAX_WORKERS: max amount of workers to use for running "
+              "MAX_WORKERS: max amount of workers to use for running\n"
+              "NO_CACHE: set to run the packages which passed with the same files in a previous run.\n"
+              "TIMINGS_FILE: path of a json file to write the run time of each package to.\n"
               )
         sys.exit(1)
     max_workers = int(os.getenv("MAX_WORKERS", "10"))
-    find_out = subprocess.check_output(["find", "Integrations", "Scripts", "Beta_Integrations",
-                                        "-maxdepth", "1", "-mindepth", "1", "-type", "d", "-print"], text=True)
+    use_cache = not os.getenv("NO_CACHE")
+    find_out = subprocess.check_output(["find"] + PKG_ROOT_DIRS + ["-maxdepth", "1", "-mindepth", "1", "-type", "d",
+                                                                   "-print"], text=True)
     pkg_dirs = find_out.splitlines()
+    changed_pkgs = get_changed_pkgs(pkg_dirs)
+    params = sys.argv[1::]
+    cache = load_results_cache()
+    dev_env_hash = get_dev_env_hash(params)
+    pkg_hashes = {}
     pkgs_to_run = []
+    cached_pkgs = []
     for dir in pkg_dirs:
-        if should_run_pkg(dir):
+        if dir not in changed_pkgs:
+            continue
+        pkg_hashes[dir] = get_pkg_hash(dir, dev_env_hash)
+        if use_cache and cache['green'].get(dir) == pkg_hashes[dir]:
+            cached_pkgs.append(dir)
+        else:
             pkgs_to_run.append(dir)
+    # the long packages start first, so they don't end up running alone at the end
+    pkgs_to_run = sort_longest_first(pkgs_to_run, cache['durations'])
+    if cached_pkgs:
+        print("Skipping [{}] packages which passed with the same files in a previous run".format(len(cached_pkgs)))
     print("Starting parallel run for [{}] packages with [{}] max workers".format(len(pkgs_to_run), max_workers))
-    params = sys.argv[1::]
     fail_pkgs = []
     good_pkgs = []
-    if(len(pkgs_to_run) > 1):  # setup pipenv before hand to avoid conflics
+    timings = {}
+
+    def handle_pkg_res(res: Tuple[subprocess.CompletedProcess, str, float]):
+        handle_run_res(res, fail_pkgs, good_pkgs)
+        pkg_dir, duration = res[1], res[2]
+        timings[pkg_dir] = duration
+        cache['durations'][pkg_dir] = duration
+        if res[0].returncode == 0:
+            cache['green'][pkg_dir] = pkg_hashes[pkg_dir]
+        else:
+            cache['green'].pop(pkg_dir, None)
+
+    if len(pkgs_to_run) > 1:  # setup pipenv before hand to avoid conflics
         get_dev_requirements(2.7)
         get_dev_requirements(3.7)
     # run CommonServer non parallel to avoid conflicts
@@ -75,19 +197,26 @@ def main():
     if 'Scripts/CommonServerPython' in pkgs_to_run:
         pkgs_to_run.remove('Scripts/CommonServerPython')
         res = run_dev_task('Scripts/CommonServerPython', params)
-        handle_run_res(res, fail_pkgs, good_pkgs)
+        handle_pkg_res(res)
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures_submit = [executor.submit(run_dev_task, dir, params) for dir in pkgs_to_run]
         for future in concurrent.futures.as_completed(futures_submit):
             res = future.result()
-            handle_run_res(res, fail_pkgs, good_pkgs)
+            handle_pkg_res(res)
+    save_results_cache(cache)
+    timings_json = json.dumps(timings, indent=4, sort_keys=True)
+    if os.getenv("TIMINGS_FILE"):
+        with open(os.getenv("TIMINGS_FILE"), 'w') as timings_file:
+            timings_file.write(timings_json)
+    if timings:
+        print("\n******* PKGS TIMINGS (seconds): *******\n{}\n".format(timings_json))
     if fail_pkgs:
         print_color("\n******* FAIL PKGS: *******", LOG_COLORS.RED)
         print_color("\n\t{}\n".format("\n\t".join(fail_pkgs)), LOG_COLORS.RED)
     if good_pkgs:
         print_color("\n******* SUCCESS PKGS: *******", LOG_COLORS.GREEN)
         print_color("\n\t{}\n".format("\n\t".join(good_pkgs)), LOG_COLORS.GREEN)
-    if not good_pkgs and not fail_pkgs:
+    if not good_pkgs and not fail_pkgs and not cached_pkgs:
         print_color("\n******* No changed packages found *******\n", LOG_COLORS.YELLOW)
     if fail_pkgs:
         sys.exit(1)
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
+import os
 import sys
+import json
 import yaml
+import hashlib
 import argparse
 
+import spellchecker
 from spellchecker import SpellChecker
 
 from Tests.test_utils import print_error
@@ -16,60 +20,177 @@ DISPLAYABLE_LINES = [
 
 SCRIPT_ARGS = 'scriptarguments'
 
+KNOWN_WORDS_PATH = 'Tests/known_words.txt'
+# unknown words of previously checked files, by the hash of the file and the known words
+SPELL_CHECKER_CACHE_PATH = 'Tests/spell_checker_cache.json'
+SPELL_CHECKER_PATH = os.path.abspath(__file__).replace('.pyc', '.py')
 
-def check_yaml(spellchecker, yml_info, unknown_words):
+
+def get_yaml_words(yml_info, words, key_path=''):
+    """Collect the words of the displayable keys of a yml.
+
+    Args:
+        yml_info (dict): the loaded yml.
+        words (dict): the keys each word appears in, by word. Updated with the words of the yml.
+        key_path (str): the path of yml_info in the yml.
+    """
     for key, value in yml_info.items():
+        current_path = '{}.{}'.format(key_path, key) if key_path else key
         if key in DISPLAYABLE_LINES:
             for word in value.split():
-                if word.isalpha() and spellchecker.unknown([word]):
-                    unknown_words.add(word)
+                if word.isalpha() and current_path not in words.setdefault(word, []):
+                    words[word].append(current_path)
 
         else:
             if isinstance(value, dict):
                 if key != SCRIPT_ARGS:
-                    check_yaml(spellchecker, value, unknown_words)
+                    get_yaml_words(value, words, current_path)
             elif isinstance(value, list):
                 for sub_list in value:
                     if isinstance(sub_list, dict):
-                        check_yaml(spellchecker, sub_list, unknown_words)
+                        get_yaml_words(sub_list, words, current_path)
 
 
-def check_md_file(spellchecker, md_data, unknown_words):
-    for line in md_data:
+def get_md_words(md_data, words):
+    """Collect the words of an md file, with the lines they appear in"""
+    for line_number, line in enumerate(md_data, 1):
         for word in line.split():
-            if word.isalpha() and spellchecker.unknown([word]):
-                unknown_words.add(word)
+            if word.isalpha() and 'line {}'.format(line_number) not in words.setdefault(word, []):
+                words[word].append('line {}'.format(line_number))
 
 
-def spell_checker(path, is_md=False):
-    unknown_words = set([])
-    spellchecker = SpellChecker()
-    spellchecker.word_frequency.load_text_file('Tests/known_words.txt')
-
+def get_file_words(path, is_md):
+    words = {}
     if is_md:
         with open(path, 'r') as md_file:
             md_data = md_file.readlines()
 
-        check_md_file(spellchecker, md_data, unknown_words)
+        get_md_words(md_data, words)
     else:
         with open(path, 'r') as yaml_file:
             yml_info = yaml.safe_load(yaml_file)
 
-        check_yaml(spellchecker, yml_info, unknown_words)
+        get_yaml_words(yml_info, words)
+
+    return words
+
+
+def get_checker_hash():
+    """Hash of the known words, this checker and the pyspellchecker version, which the unknown words of the
+    cached files depend on"""
+    sha1 = hashlib.sha1(getattr(spellchecker, '__version__', '').encode('utf-8'))
+    for path in (KNOWN_WORDS_PATH, SPELL_CHECKER_PATH):
+        with open(path, 'rb') as checker_file:
+            sha1.update(checker_file.read())
+    return sha1.hexdigest()
+
+
+def get_file_hash(path, checker_hash, is_md):
+    sha1 = hashlib.sha1(checker_hash.encode('utf-8'))
+    sha1.update(b'md' if is_md else b'yml')
+    with open(path, 'rb') as checked_file:
+        sha1.update(checked_file.read())
+    return sha1.hexdigest()
+
+
+def load_spell_checker_cache():
+    try:
+        with open(SPELL_CHECKER_CACHE_PATH, 'r') as cache_file:
+            return json.load(cache_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_spell_checker_cache(cache):
+    with open(SPELL_CHECKER_CACHE_PATH, 'w') as cache_file:
+        json.dump(cache, cache_file)
+
+
+def spell_check_files(yml_paths=(), md_paths=(), use_cache=True):
+    """Spell check yml and md files, loading the dictionary once and checking the unique words of all the files
+    in a single call.
 
+    Args:
+        yml_paths (iterable): paths of yml files.
+        md_paths (iterable): paths of md files.
+        use_cache (bool): take the unknown words of files which were checked before from the cache.
+
+    Returns:
+        dict. For each path, the keys (yml) or lines (md) of each unknown word in it, by word.
+    """
+    checker_hash = get_checker_hash()
+    cache = load_spell_checker_cache() if use_cache else {}
+
+    results = {}
+    files_words = {}
+    file_hashes = {}
+    for paths, is_md in ((yml_paths, False), (md_paths, True)):
+        for path in paths:
+            file_hashes[path] = get_file_hash(path, checker_hash, is_md)
+            if file_hashes[path] in cache:
+                results[path] = cache[file_hashes[path]]
+            else:
+                files_words[path] = get_file_words(path, is_md)
+
+    if files_words:
+        checker = SpellChecker()
+        checker.word_frequency.load_text_file(KNOWN_WORDS_PATH)
+        all_words = set()
+        for words in files_words.values():
+            all_words.update(words)
+        unknown_words = checker.unknown(all_words)
+
+        for path, words in files_words.items():
+            # unknown() returns the words lower cased, unless the checker is case sensitive
+            results[path] = {word: keys for word, keys in words.items()
+                             if word in unknown_words or word.lower() in unknown_words}
+            cache[file_hashes[path]] = results[path]
+
+        if use_cache:
+            save_spell_checker_cache(cache)
+
+    return results
+
+
+def print_unknown_words(unknown_words):
+    """Print the unknown words of a file.
+
+    Returns:
+        int. 1 if there are unknown words, 0 otherwise.
+    """
     if unknown_words:
-        print_error(u"Found the problematic words:\n{}".format('\n'.join(unknown_words)))
+        print_error(u"Found the problematic words:\n{}".format('\n'.join(
+            u'{} ({})'.format(word, ', '.join(keys)) for word, keys in sorted(unknown_words.items()))))
         return 1
 
     print("No problematic words found")
     return 0
 
 
+def spell_checker(path, is_md=False):
+    if is_md:
+        results = spell_check_files(md_paths=[path])
+    else:
+        results = spell_check_files(yml_paths=[path])
+
+    return print_unknown_words(results[path])
+
+
 if __name__ == "__main__":
-    description = """Run spell check on a given yml/md file. """
+    description = """Run spell check on given yml/md files. """
     parser = argparse.ArgumentParser(description=description, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-    parser.add_argument("-p", "--path", help="Specify path of yml/md file", required=True)
-    parser.add_argument("-i", "--isMD", help="Whether the path is to a yml file or an md.", action='store_true')
+    parser.add_argument("-p", "--path", help="Specify paths of yml/md files (.md files are always checked as md)",
+                        nargs='+', required=True)
+    parser.add_argument("-i", "--isMD", help="Whether the paths are to yml files or md files.", action='store_true')
+    parser.add_argument("-n", "--noCache", help="Check all the files, without the results of previous checks",
+                        action='store_true')
 
     args = parser.parse_args()
-    sys.exit(spell_checker(args.path, args.isMD))
+    md_paths = [path for path in args.path if args.isMD or os.path.splitext(path)[1].lower() == '.md']
+    yml_paths = [path for path in args.path if path not in md_paths]
+    files_results = spell_check_files(yml_paths, md_paths, use_cache=not args.noCache)
+    exit_code = 0
+    for path in args.path:
+        print("Checking the file - {}".format(path))
+        exit_code = print_unknown_words(files_results[path]) or exit_code
+    sys.exit(exit_code)
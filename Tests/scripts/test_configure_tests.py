@@ -2,7 +2,7 @@ import os
 import re
 import unittest
 
-from Tests.scripts.configure_tests import get_modified_files, get_test_list
+from Tests.scripts.configure_tests import get_modified_files, get_test_list, IdSetGraph
 
 FILTER_CONF = "Tests/filter_file.txt"
 
@@ -174,5 +174,33 @@ A       Integrations/Active_Directory_Query/key.pem
         self.assertIn('Integrations/Active_Directory_Query/Active_Directory_Query.yml', files_list)
 
 
+class TestIdSetGraph(unittest.TestCase):
+    ID_SET = {
+        'integrations': [{'Int': {'name': 'Int', 'commands': ['int-cmd']}}],
+        'scripts': [
+            {'ScriptA': {'name': 'ScriptA', 'script_executions': ['ScriptC']}},
+            {'ScriptB': {'name': 'ScriptB', 'depends_on': ['int-cmd'], 'script_executions': ['ScriptC']}},
+        ],
+        'playbooks': [
+            {'PlaybookA': {'name': 'PlaybookA', 'command_to_integration': {'int-cmd': ''}}},
+            {'PlaybookB': {'name': 'PlaybookB', 'implementing_scripts': ['ScriptC'],
+                           'command_to_integration': {'int-cmd': 'Int', 'other-cmd': ''}}},
+        ],
+        'TestPlaybooks': [],
+    }
+
+    def test_lookup(self):
+        graph = IdSetGraph(self.ID_SET)
+        self.assertEqual(graph.integration_to_commands, {'Int': ['int-cmd']})
+        self.assertEqual([_id for _id, _ in graph.lookup((graph.scripts_by_script, ['ScriptC']))],
+                         ['ScriptA', 'ScriptB'])
+        self.assertEqual([_id for _id, _ in graph.lookup((graph.scripts_by_command, ['int-cmd']))], ['ScriptB'])
+        # entities matched by several keys are returned once, in their id_set order
+        self.assertEqual([_id for _id, _ in graph.lookup((graph.playbooks_by_script, ['ScriptC']),
+                                                         (graph.playbooks_by_command, ['other-cmd', 'int-cmd']))],
+                         ['PlaybookA', 'PlaybookB'])
+        self.assertEqual(graph.lookup((graph.playbooks_by_playbook, ['PlaybookA'])), [])
+
+
 if __name__ == '__main__':
     unittest.main()
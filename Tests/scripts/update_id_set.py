@@ -4,6 +4,7 @@ import re
 import os
 import glob
 import json
+import hashlib
 import argparse
 from collections import OrderedDict
 from multiprocessing import Pool, cpu_count
@@ -17,6 +18,11 @@ from Tests.test_utils import get_yaml, get_to_version, get_from_version, collect
 CHECKED_TYPES_REGEXES = (INTEGRATION_REGEX, PLAYBOOK_REGEX, SCRIPT_REGEX,
                          TEST_PLAYBOOK_REGEX, INTEGRATION_YML_REGEX)
 
+ID_SET_CACHE_PATH = './Tests/id_set_cache.json'
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+# the code the parsed records depend on, changes in it invalidate the cache
+PARSER_FILES = ('Tests/scripts/update_id_set.py', 'Tests/test_utils.py', 'Tests/scripts/constants.py')
+
 
 def checked_type(file_path, regex_list=CHECKED_TYPES_REGEXES):
     for regex in regex_list:
@@ -347,33 +353,140 @@ def process_testplaybook_path(file_path):
     return playbook, script
 
 
-def re_create_id_set():
+SECTION_TO_PROCESSOR = {
+    'integrations': process_integration,
+    'playbooks': process_playbook,
+    'scripts': process_script,
+    'TestPlaybooks': process_testplaybook_path,
+}
+
+
+def get_id_set_sources():
+    """
+    List the files and packages which the id_set is created from
+
+    Returns:
+        list -- (section, path) pairs, in the order the id_set is created
+    """
+    sources = [('integrations', path) for path in glob.glob(os.path.join('Integrations', '*'))]
+    sources.extend(('integrations', path) for path in glob.glob(os.path.join('Beta_Integrations', '*')))
+    sources.extend(('playbooks', path) for path in glob.glob(os.path.join('Playbooks', '*.yml')))
+    sources.extend(('scripts', path) for path in glob.glob(os.path.join('Scripts', '*')))
+    sources.extend(('TestPlaybooks', path) for path in glob.glob(os.path.join('TestPlaybooks', '*')))
+    return sources
+
+
+def get_source_hash(path):
+    """
+    Hash the content of a file, or of all the files of a package
+
+    Arguments:
+        path {string} -- path to a file or a package dir
+
+    Returns:
+        string -- hex digest of the content
+    """
+    sha1 = hashlib.sha1()
+    file_paths = sorted(glob.glob(os.path.join(path, '*'))) if os.path.isdir(path) else [path]
+    for file_path in file_paths:
+        if os.path.isfile(file_path):
+            sha1.update(os.path.basename(file_path).encode('utf-8'))
+            with open(file_path, 'rb') as source_file:
+                sha1.update(source_file.read())
+    return sha1.hexdigest()
+
+
+def get_parser_version(parser_files=PARSER_FILES):
+    sha1 = hashlib.sha1()
+    for parser_file_path in parser_files:
+        with open(os.path.join(CONTENT_DIR, parser_file_path), 'rb') as parser_file:
+            sha1.update(parser_file.read())
+    return sha1.hexdigest()
+
+
+def load_id_set_cache(cache_path, parser_version):
+    if not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cache = json.load(cache_file, object_pairs_hook=OrderedDict)
+    except ValueError:
+        print_color("The id_set cache is corrupted, ignoring it", LOG_COLORS.YELLOW)
+        return {}
+    if cache.get('version') != parser_version:
+        return {}
+    return cache.get('files', {})
+
+
+def save_id_set_cache(cache_path, parser_version, files_cache):
+    with open(cache_path, 'w') as cache_file:
+        json.dump({'version': parser_version, 'files': files_cache}, cache_file)
+
+
+def process_id_set_source(source):
+    """
+    Process a single file or package of any section, to be used with a single pool for all the sections
+
+    Arguments:
+        source {tuple} -- (section, path, content hash)
+
+    Returns:
+        tuple -- (section, path, content hash, processed data)
+    """
+    section, path, source_hash = source
+    return section, path, source_hash, SECTION_TO_PROCESSOR[section](path)
+
+
+def re_create_id_set(use_cache=True, cache_path=ID_SET_CACHE_PATH):
     start_time = time.time()
     scripts_list = []
     playbooks_list = []
     integration_list = []
     testplaybooks_list = []
 
-    pool = Pool(processes=cpu_count() * 2)
-
     print_color("Starting the creation of the id_set", LOG_COLORS.GREEN)
-    print_color("Starting iterating over Integrations", LOG_COLORS.GREEN)
-    integration_files = glob.glob(os.path.join('Integrations', '*'))
-    integration_files.extend(glob.glob(os.path.join('Beta_Integrations', '*')))
-    for arr in pool.map(process_integration, integration_files):
-        integration_list.extend(arr)
-    print_color("Starting iterating over Playbooks", LOG_COLORS.GREEN)
-    for arr in pool.map(process_playbook, glob.glob(os.path.join('Playbooks', '*.yml'))):
-        playbooks_list.extend(arr)
-    print_color("Starting iterating over Scripts", LOG_COLORS.GREEN)
-    for arr in pool.map(process_script, glob.glob(os.path.join('Scripts', '*'))):
-        scripts_list.extend(arr)
-    print_color("Starting iterating over TestPlaybooks", LOG_COLORS.GREEN)
-    for pair in pool.map(process_testplaybook_path, glob.glob(os.path.join('TestPlaybooks', '*'))):
-        if pair[0]:
-            testplaybooks_list.append(pair[0])
-        if pair[1]:
-            scripts_list.append(pair[1])
+    parser_version = get_parser_version()
+    files_cache = load_id_set_cache(cache_path, parser_version) if use_cache else {}
+    sources = [(section, path, get_source_hash(path)) for section, path in get_id_set_sources()]
+    results = {}
+    to_process = []
+    for section, path, source_hash in sources:
+        cached = files_cache.get(path)
+        if cached and cached['section'] == section and cached['hash'] == source_hash:
+            results[path] = cached['data']
+        else:
+            to_process.append((section, path, source_hash))
+    scan_time = time.time()
+    print_color("Found {} files, {} of them changed since the last run ({:.2f} seconds)".format(
+        len(sources), len(to_process), scan_time - start_time), LOG_COLORS.GREEN)
+
+    if to_process:
+        # a single pool for all the sections, so a slow section doesn't block the others
+        pool = Pool(processes=cpu_count() * 2)
+        try:
+            for section, path, source_hash, data in pool.imap_unordered(process_id_set_source, to_process):
+                results[path] = data
+                files_cache[path] = {'section': section, 'hash': source_hash, 'data': data}
+        finally:
+            pool.close()
+            pool.join()
+    parse_time = time.time()
+    print_color("Parsed {} files ({:.2f} seconds)".format(len(to_process), parse_time - scan_time), LOG_COLORS.GREEN)
+
+    # keep the order of the sources, so the id_set is the same as without the cache
+    for section, path, _ in sources:
+        data = results[path]
+        if section == 'integrations':
+            integration_list.extend(data)
+        elif section == 'playbooks':
+            playbooks_list.extend(data)
+        elif section == 'scripts':
+            scripts_list.extend(data)
+        else:
+            if data[0]:
+                testplaybooks_list.append(data[0])
+            if data[1]:
+                scripts_list.append(data[1])
 
     new_ids_dict = OrderedDict()
     # we sort each time the whole set in case someone manually changed something
@@ -385,7 +498,13 @@ def re_create_id_set():
 
     with open('./Tests/id_set.json', 'w') as id_set_file:
         json.dump(new_ids_dict, id_set_file, indent=4)
-    exec_time = time.time() - start_time
+    if use_cache:
+        source_paths = set(path for _, path, _ in sources)
+        save_id_set_cache(cache_path, parser_version,
+                          {path: record for path, record in files_cache.items() if path in source_paths})
+    write_time = time.time()
+    print_color("Wrote the id_set ({:.2f} seconds)".format(write_time - parse_time), LOG_COLORS.GREEN)
+    exec_time = write_time - start_time
     print_color("Finished the creation of the id_set. Total time: {} seconds".format(exec_time), LOG_COLORS.GREEN)
 
 
@@ -508,11 +627,13 @@ def update_id_set():
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Utility CircleCI usage')
     parser.add_argument('-r', '--reCreate', action='store_true', help='Is re-create id_set or update it')
+    parser.add_argument('-n', '--noCache', action='store_true',
+                        help='Re-create the id_set without using the cache of previously parsed files')
     options = parser.parse_args()
 
     if options.reCreate:
         print("Re creating the id_set.json")
-        re_create_id_set()
+        re_create_id_set(use_cache=not options.noCache)
 
     else:
         if os.path.isfile('./Tests/id_set.json'):
@@ -520,4 +641,4 @@ if __name__ == '__main__':
             update_id_set()
         else:
             print("./Tests/id_set.json is missing. Recreating...")
-            re_create_id_set()
+            re_create_id_set(use_cache=not options.noCache)
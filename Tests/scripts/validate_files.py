@@ -14,11 +14,20 @@ import os
 import re
 import sys
 import glob
+import time
 import logging
 import argparse
 import subprocess
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
 import yaml
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
 from Tests.scripts.constants import *
 from Tests.scripts.hook_validations.id import IDSetValidator
 from Tests.scripts.hook_validations.secrets import get_secrets
@@ -379,31 +388,56 @@ class FilesValidator(object):
 
     def validate_all_files(self):
         """Validate all files in the repo are in the right format."""
+        # (directory, printed name, file path) of each file, in the order they are reported
+        files_to_validate = []
         for regex in CHECKED_TYPES_REGEXES:
             splitted_regex = regex.split('.*')
             directory = splitted_regex[0]
             for root, dirs, files in os.walk(directory):
                 if root not in DIR_LIST:  # Skipping in case we entered a package
                     continue
-                print_color('Validating {} directory:'.format(directory), LOG_COLORS.GREEN)
+                files_to_validate.append((directory, None, None))
                 for file_name in files:
-                    file_path = os.path.join(root, file_name)
                     # skipping hidden files
                     if file_name.startswith('.'):
                         continue
 
-                    print('Validating ' + file_name)
-                    structure_validator = StructureValidator(file_path)
-                    if not structure_validator.is_valid_scheme():
-                        self._is_valid = False
+                    files_to_validate.append((directory, file_name, os.path.join(root, file_name)))
 
                 if root in PACKAGE_SUPPORTING_DIRECTORIES:
                     for inner_dir in dirs:
                         file_path = glob.glob(os.path.join(root, inner_dir, '*.yml'))[0]
-                        print('Validating ' + file_path)
-                        structure_validator = StructureValidator(file_path)
-                        if not structure_validator.is_valid_scheme():
-                            self._is_valid = False
+                        files_to_validate.append((directory, file_path, file_path))
+
+        # the same directory may be matched by several regexes, each file is validated once
+        file_paths = list(OrderedDict.fromkeys(file_path for _, _, file_path in files_to_validate if file_path))
+        pool = Pool(processes=cpu_count())
+        try:
+            results = dict(zip(file_paths, pool.map(validate_file_scheme, file_paths, chunksize=8)))
+        finally:
+            pool.close()
+            pool.join()
+
+        directory_times = OrderedDict()  # type: OrderedDict
+        for directory, name, file_path in files_to_validate:
+            if file_path is None:
+                print_color('Validating {} directory:'.format(directory), LOG_COLORS.GREEN)
+                directory_times.setdefault(directory, [0, 0.0])
+                continue
+
+            print('Validating ' + name)
+            is_valid, output, validation_time = results[file_path]
+            if output:
+                print(output, end='')
+            if not is_valid:
+                self._is_valid = False
+
+            directory_times[directory][0] += 1
+            directory_times[directory][1] += validation_time
+
+        print_color('Validation time by directory:', LOG_COLORS.GREEN)
+        for directory, (files_count, validation_time) in directory_times.items():
+            print('{}: {} files, {:.2f} seconds'.format(directory, files_count, validation_time))
 
     def is_valid_structure(self, branch_name, is_backward_check=True, prev_ver=None):
         """Check if the structure is valid for the case we are in, master - all files, branch - changed files.
@@ -453,6 +487,27 @@ class FilesValidator(object):
             self._is_valid = prev_self_valid
 
 
+def validate_file_scheme(file_path):
+    """Validate the scheme of a single file, runs in a worker process of FilesValidator.validate_all_files.
+
+    Args:
+        file_path (string): The path of the file to validate.
+
+    Returns:
+        (bool, string, float). Whether the scheme is valid, the printed validation errors and the validation time.
+    """
+    start_time = time.time()
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        is_valid = StructureValidator(file_path).is_valid_scheme()
+        output = sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+    return is_valid, output, time.time() - start_time
+
+
 def main():
     """Execute FilesValidator checks on the modified changes in your branch, or all files in case of master.
 
@@ -5,20 +5,24 @@ import string
 import random
 import argparse
 import requests
+import threading
 import subprocess
+from io import BytesIO
 from time import sleep
 from datetime import datetime
 
 import demisto
 from slackclient import SlackClient
 
-from Tests.test_integration import test_integration, disable_all_integrations
+from Tests.test_integration import test_integration, disable_all_integrations, release_integration_instances
 from Tests.mock_server import MITMProxy, AMIConnection
 from Tests.test_utils import print_color, print_error, print_warning, LOG_COLORS, str2bool, server_version_compare
 from Tests.scripts.constants import RUN_ALL_TESTS_FORMAT, FILTER_CONF, PB_Status
 
 SERVER_URL = "https://{}"
 INTEGRATIONS_CONF = "./Tests/integrations_file.txt"
+# setup, run & teardown durations of the tests, the run durations of the previous build drive the polling
+TEST_TIMINGS_PATH = "./Tests/test_timings.json"
 
 FAILED_MATCH_INSTANCE_MSG = "{} Failed to run.\n There are {} instances of {}, please select one of them by using the " \
                             "instance_name argument in conf.json. The options are:\n{}"
@@ -49,6 +53,13 @@ def options_handler():
                              'dmst_content_nightly_memory_data', default=False)
     parser.add_argument('-d', '--serverVersion', help='Which server version to run the '
                                                       'tests on(Valid only when using AMI)', default="NonAMI")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of mock-disabled tests to run concurrently. Tests which use the same '
+                             'integration never run at the same time')
+    parser.add_argument('-r', '--reuseInstances', type=str2bool, default=True,
+                        help='Reuse the integration instances of a passed test in the next test, '
+                             'if it uses the same integration and params. A reused instance carries its '
+                             'integration context and state over to the next test')
 
     options = parser.parse_args()
 
@@ -299,7 +310,24 @@ def retrieve_id(circle_user_name, sc):
     return user_id
 
 
-def create_result_files(failed_playbooks, skipped_integration, skipped_tests):
+def load_test_timings():
+    try:
+        with open(TEST_TIMINGS_PATH, 'r') as test_timings_file:
+            return json.load(test_timings_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def get_expected_duration(timings_history, playbook_id):
+    """Get the run duration of the last run of a test in the previous build, 0 if unknown"""
+    runs = [run for run in timings_history.get(playbook_id, []) if 'run' in run]
+    return runs[-1]['run'] if runs else 0
+
+
+def create_result_files(failed_playbooks, skipped_integration, skipped_tests, test_timings=None):
+    if test_timings is not None:
+        with open(TEST_TIMINGS_PATH, "w") as test_timings_file:
+            json.dump(test_timings, test_timings_file, indent=4, sort_keys=True)
     with open("./Tests/failed_tests.txt", "w") as failed_tests_file:
         failed_tests_file.write('\n'.join(failed_playbooks))
     with open('./Tests/skipped_tests.txt', "w") as skipped_tests_file:
@@ -414,11 +442,155 @@ def organize_tests(tests, unmockable_integrations, skipped_integrations_conf, ni
     return mock_tests, mockless_tests
 
 
+def get_test_integrations(test):
+    integrations_conf = test.get('integrations', [])
+    if not isinstance(integrations_conf, list):
+        integrations_conf = [integrations_conf, ]
+
+    return set(integrations_conf)
+
+
+class ThreadOutput(object):
+    """Stdout of concurrent tests, keeps the output of each test thread apart until the test ends.
+
+    Attributes:
+        stdout (file): the original stdout.
+        local (threading.local): the output buffer of the current thread, if any.
+    """
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def start_buffer(self):
+        self.local.buffer = BytesIO()
+
+    def end_buffer(self):
+        buffer = self.local.buffer
+        self.local.buffer = None
+        return buffer.getvalue()
+
+    def write(self, data):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is not None:
+            buffer.write(data if isinstance(data, bytes) else data.encode('utf-8'))
+        else:
+            self.stdout.write(data)
+
+    def flush(self):
+        self.stdout.flush()
+
+
+class TestScheduler(object):
+    """Hands out the tests to concurrent workers, in conf order, so that tests which use the same integration
+    never run at the same time.
+
+    Attributes:
+        pending (list): (index, test) of the tests which did not start yet.
+        running_integrations (set): the integrations of the tests which are currently running.
+        condition (threading.Condition): notified when a test ends.
+    """
+
+    def __init__(self, tests):
+        self.pending = list(enumerate(tests))
+        self.running_integrations = set()
+        self.condition = threading.Condition()
+
+    def next_test(self):
+        """Wait for the first pending test which has no running integration.
+
+        Returns:
+            tuple. (index, test), or None if there are no more tests.
+        """
+        with self.condition:
+            while self.pending:
+                for i, (index, test) in enumerate(self.pending):
+                    test_integrations = get_test_integrations(test)
+                    if not self.running_integrations.intersection(test_integrations):
+                        del self.pending[i]
+                        self.running_integrations.update(test_integrations)
+                        return index, test
+
+                self.condition.wait()
+
+            return None
+
+    def test_done(self, test):
+        with self.condition:
+            self.running_integrations.difference_update(get_test_integrations(test))
+            self.condition.notify_all()
+
+
+def run_test_scenarios_concurrently(tests, workers, run_scenario, failed_playbooks, succeed_playbooks, skipped_tests,
+                                    skipped_integration):
+    """Run test scenarios with concurrent workers. The output of each test is printed when it ends, and the
+    results are added in conf order, as if the tests ran one after another.
+
+    Args:
+        tests (list): the tests to run.
+        workers (int): number of tests to run at the same time.
+        run_scenario (func): runs a test, gets the test and the result lists and sets to update:
+            failed playbooks, succeed playbooks, skipped tests and skipped integrations.
+        failed_playbooks (list): the failed playbooks of all the tests.
+        succeed_playbooks (list): the succeed playbooks of all the tests.
+        skipped_tests (set): the skipped tests of all the tests.
+        skipped_integration (set): the skipped integrations of all the tests.
+    """
+    scheduler = TestScheduler(tests)
+    results = [([], [], set([]), set([])) for _ in tests]
+    output = ThreadOutput(sys.stdout)
+    output_lock = threading.Lock()
+
+    def worker():
+        while True:
+            next_test = scheduler.next_test()
+            if next_test is None:
+                return
+
+            index, test = next_test
+            output.start_buffer()
+            try:
+                run_scenario(test, *results[index])
+            except (Exception, SystemExit, KeyboardInterrupt) as ex:
+                # a test which exits must not stop the worker, the rest of the tests still need to run
+                print_error('Failed running playbook {}: {!r}'.format(test.get('playbookID'), ex))
+                results[index][0].append(test.get('playbookID'))
+            finally:
+                test_output = output.end_buffer()
+                scheduler.test_done(test)
+                if not isinstance(test_output, str):
+                    # python 3 - the stdout is a text stream
+                    test_output = test_output.decode('utf-8', 'replace')
+                with output_lock:
+                    try:
+                        output.stdout.write(test_output)
+                        output.stdout.flush()
+                    except Exception as ex:
+                        output.stdout.write('Failed writing the output of playbook {}: {}\n'.format(
+                            test.get('playbookID'), ex))
+
+    sys.stdout = output
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(min(workers, len(tests)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.stdout = output.stdout
+
+    for test_failed, test_succeed, test_skipped, test_skipped_integration in results:
+        failed_playbooks.extend(test_failed)
+        succeed_playbooks.extend(test_succeed)
+        skipped_tests.update(test_skipped)
+        skipped_integration.update(test_skipped_integration)
+
+
 def run_test_scenario(t, c, proxy, default_test_timeout, skipped_tests_conf, nightly_integrations,
                       skipped_integrations_conf, skipped_integration, is_nightly, run_all_tests, is_filter_configured,
                       filtered_tests, skipped_tests, demisto_api_key, secret_params, failed_playbooks,
                       unmockable_integrations, succeed_playbooks, slack, circle_ci, build_number, server, build_name,
-                      server_numeric_version, is_ami=True):
+                      server_numeric_version, is_ami=True, test_timings=None, timings_history=None):
     playbook_id = t['playbookID']
     nightly_test = t.get('nightly', False)
     integrations_conf = t.get('integrations', [])
@@ -426,8 +598,11 @@ def run_test_scenario(t, c, proxy, default_test_timeout, skipped_tests_conf, nig
 
     test_message = 'playbook: ' + playbook_id
 
+    options = options_handler()
     test_options = {
-        'timeout': t.get('timeout', default_test_timeout)
+        'timeout': t.get('timeout', default_test_timeout),
+        'expected_duration': get_expected_duration(timings_history or {}, playbook_id),
+        'reuse_instances': options.reuseInstances
     }
 
     if not isinstance(integrations_conf, list):
@@ -482,7 +657,6 @@ def run_test_scenario(t, c, proxy, default_test_timeout, skipped_tests_conf, nig
         return
 
     test_message = update_test_msg(integrations, test_message)
-    options = options_handler()
     stdout, stderr = get_docker_memory_data()
     text = 'Memory Usage: {}'.format(stdout) if not stderr else stderr
     if options.nightly and options.memCheck:
@@ -494,6 +668,8 @@ def run_test_scenario(t, c, proxy, default_test_timeout, skipped_tests_conf, nig
     run_test(c, proxy, failed_playbooks, integrations, unmockable_integrations, playbook_id,
              succeed_playbooks, test_message, test_options, slack, circle_ci,
              build_number, server, build_name, is_ami)
+    if test_timings is not None:
+        test_timings[playbook_id] = test_options.get('timings', [])
 
 
 def restart_demisto_service(ami, c):
@@ -574,6 +750,8 @@ def execute_testing(server, server_ip, server_version, server_numeric_version, i
     succeed_playbooks = []
     skipped_tests = set([])
     skipped_integration = set([])
+    timings_history = load_test_timings()
+    test_timings = {}
 
     disable_all_integrations(c)
 
@@ -598,26 +776,56 @@ def execute_testing(server, server_ip, server_version, server_numeric_version, i
                               is_filter_configured,
                               filtered_tests, skipped_tests, demisto_api_key, secret_params, failed_playbooks,
                               unmockable_integrations, succeed_playbooks, slack, circle_ci, build_number, server,
-                              build_name, server_numeric_version)
+                              build_name, server_numeric_version, test_timings=test_timings,
+                              timings_history=timings_history)
 
+        # the pooled instances use the proxy
+        release_integration_instances(c)
         print("\nRunning mock-disabled tests")
         proxy.configure_proxy_in_demisto('')
         print("Restarting demisto service")
         restart_demisto_service(ami, c)
         print("Demisto service restarted\n")
 
-    for t in mockless_tests:
-        run_test_scenario(t, c, proxy, default_test_timeout, skipped_tests_conf, nightly_integrations,
-                          skipped_integrations_conf, skipped_integration, is_nightly, run_all_tests,
+    worker_clients = threading.local()
+
+    def get_worker_client():
+        """The demisto client is not thread safe, so each concurrent worker logs in with its own client"""
+        if options.workers <= 1:
+            return c
+
+        if getattr(worker_clients, 'client', None) is None:
+            client = demisto.DemistoClient(None, server, username, password)
+            login_res = client.Login()
+            if login_res.status_code != 200:
+                raise Exception('Login has failed with status code {}'.format(login_res.status_code))
+            worker_clients.client = client
+
+        return worker_clients.client
+
+    def run_mockless_test(t, test_failed_playbooks, test_succeed_playbooks, test_skipped_tests,
+                          test_skipped_integration):
+        run_test_scenario(t, get_worker_client(), proxy, default_test_timeout, skipped_tests_conf, nightly_integrations,
+                          skipped_integrations_conf, test_skipped_integration, is_nightly, run_all_tests,
                           is_filter_configured,
-                          filtered_tests, skipped_tests, demisto_api_key, secret_params, failed_playbooks,
-                          unmockable_integrations, succeed_playbooks, slack, circle_ci, build_number, server,
-                          build_name, server_numeric_version, is_ami)
+                          filtered_tests, test_skipped_tests, demisto_api_key, secret_params, test_failed_playbooks,
+                          unmockable_integrations, test_succeed_playbooks, slack, circle_ci, build_number, server,
+                          build_name, server_numeric_version, is_ami, test_timings, timings_history)
+
+    # mock tests share the proxy, so only mock-disabled tests can run concurrently
+    if options.workers > 1:
+        print("Running mock-disabled tests with {} workers".format(options.workers))
+        run_test_scenarios_concurrently(mockless_tests, options.workers, run_mockless_test, failed_playbooks,
+                                        succeed_playbooks, skipped_tests, skipped_integration)
+    else:
+        for t in mockless_tests:
+            run_mockless_test(t, failed_playbooks, succeed_playbooks, skipped_tests, skipped_integration)
+    release_integration_instances(c)
 
     print_test_summary(succeed_playbooks, failed_playbooks, skipped_tests, skipped_integration, unmockable_integrations,
                        proxy, is_ami)
 
-    create_result_files(failed_playbooks, skipped_integration, skipped_tests)
+    create_result_files(failed_playbooks, skipped_integration, skipped_tests, test_timings)
 
     if is_ami and build_name == 'master':
         print("Pushing new/updated mock files to mock git repo.")
@@ -1,8 +1,10 @@
 import copy
+import json
 import time
 from pprint import pformat
 import uuid
 import urllib
+import threading
 import requests.exceptions
 
 from Tests.test_utils import print_error, print_warning, print_color, LOG_COLORS
@@ -12,6 +14,15 @@ from Tests.scripts.constants import PB_Status
 DEFAULT_TIMEOUT = 60
 DEFAULT_INTERVAL = 20
 ENTRY_TYPE_ERROR = 4
+# playbook state polling, in seconds
+MIN_POLLING_INTERVAL = 0.25
+MAX_POLLING_INTERVAL = 5
+# after the expected duration, sleep this part of the overtime between polls
+POLLING_BACKOFF = 0.25
+
+# instances of passed tests, by integration and params, to be reused by the next test
+INSTANCES_POOL = {}  # type: dict
+INSTANCES_POOL_LOCK = threading.Lock()
 
 
 # ----- Functions ----- #
@@ -276,6 +287,57 @@ def __print_investigation_error(client, playbook_id, investigation_id, color=LOG
                 print_color('\t- Body: ' + entry['contents'].encode('utf-8'), color)
 
 
+def get_polling_interval(elapsed, expected_duration=0):
+    """Get the time to sleep before the next playbook state poll.
+    Polls fast around the expected end of the playbook, and backs off when it takes longer.
+
+    Args:
+        elapsed: seconds since the playbook started.
+        expected_duration: the duration of previous runs of the playbook, in seconds (0 if unknown).
+
+    Returns:
+        float. seconds to sleep.
+    """
+    if elapsed < expected_duration:
+        interval = (expected_duration - elapsed) / 2.0
+    else:
+        interval = (elapsed - expected_duration) * POLLING_BACKOFF
+    return min(max(interval, MIN_POLLING_INTERVAL), MAX_POLLING_INTERVAL)
+
+
+def __get_instance_pool_key(integration_name, integration_instance_name, integration_params, is_byoi, is_mock_run):
+    return (integration_name, integration_instance_name, json.dumps(integration_params, sort_keys=True), is_byoi,
+            is_mock_run)
+
+
+def __take_pooled_instances(client, pool_keys):
+    """Take the pooled instances of the given keys. Other pooled instances are deleted, so that only the instances
+    of the running tests are enabled.
+
+    Returns:
+        dict. pooled instances by key.
+    """
+    with INSTANCES_POOL_LOCK:
+        taken = {key: INSTANCES_POOL.pop(key) for key in pool_keys if key in INSTANCES_POOL}
+        unused = list(INSTANCES_POOL.values())
+        INSTANCES_POOL.clear()
+
+    if unused:
+        __disable_integrations_instances(client, unused)
+        __delete_integrations_instances(client, unused)
+    return taken
+
+
+def release_integration_instances(client):
+    """
+    Disable and delete the instances that were kept for reuse. Should be called at the end of the test loop
+
+    Arguments:
+        client -- demisto py client
+    """
+    __take_pooled_instances(client, [])
+
+
 # Configure integrations to work with mock
 def configure_proxy_unsecure(integration_params):
     """Copies the intgeration parameters dictionary.
@@ -291,23 +353,41 @@ def configure_proxy_unsecure(integration_params):
     return integration_params_copy
 
 
-# 1. create integrations instances
+# 1. create integrations instances (or reuse the instances of the previous test)
 # 2. create incident with playbook
 # 3. wait for playbook to finish run
-# 4. if test pass - delete incident & instance
+# 4. if test pass - delete incident & keep instances for reuse
 # return playbook status
 def test_integration(client, integrations, playbook_id, options=None, is_mock_run=False):
     options = options if options is not None else {}
+    # setup, run & teardown durations of each run of the test
+    timings = {'mock': is_mock_run}
+    options.setdefault('timings', []).append(timings)
+    reuse_instances = options.get('reuse_instances', True)
+    setup_start = time.time()
+
+    instances_keys = []
+    for integration in integrations:
+        if is_mock_run:
+            configure_proxy_unsecure(integration.get('params', None))
+        instances_keys.append(__get_instance_pool_key(integration.get('name', None),
+                                                      integration.get('instance_name', ''),
+                                                      integration.get('params', None),
+                                                      integration.get('byoi', True), is_mock_run))
+    pooled_instances = __take_pooled_instances(client, instances_keys if reuse_instances else [])
+
     # create integrations instances
     module_instances = []
-    for integration in integrations:
+    for integration, instance_key in zip(integrations, instances_keys):
         integration_name = integration.get('name', None)
         integration_instance_name = integration.get('instance_name', '')
         integration_params = integration.get('params', None)
         is_byoi = integration.get('byoi', True)
 
-        if is_mock_run:
-            configure_proxy_unsecure(integration_params)
+        if instance_key in pooled_instances:
+            module_instances.append(pooled_instances.pop(instance_key))
+            print('Reusing integration %s instance' % (integration_name,))
+            continue
 
         module_instance = __create_integration_instance(client, integration_name, integration_instance_name,
                                                         integration_params, is_byoi)
@@ -332,13 +412,16 @@ def test_integration(client, integrations, playbook_id, options=None, is_mock_ru
     print('Investigation ID: {}'.format(investigation_id))
 
     timeout_amount = options['timeout'] if 'timeout' in options else DEFAULT_TIMEOUT
-    timeout = time.time() + timeout_amount
+    expected_duration = options.get('expected_duration') or 0
+    run_start = time.time()
+    timings['setup'] = run_start - setup_start
+    timeout = run_start + timeout_amount
 
-    i = 1
+    next_print = run_start + DEFAULT_INTERVAL
     # wait for playbook to finish run
     while True:
         # give playbook time to run
-        time.sleep(1)
+        time.sleep(get_polling_interval(time.time() - run_start, expected_duration))
 
         # fetch status
         playbook_state = __get_investigation_playbook_state(client, investigation_id)
@@ -357,20 +440,30 @@ def test_integration(client, integrations, playbook_id, options=None, is_mock_ru
             print_error(playbook_id + ' failed on timeout')
             break
 
-        if i % DEFAULT_INTERVAL == 0:
-            print('loop no. {}, playbook state is {}'.format(i / DEFAULT_INTERVAL, playbook_state))
-        i = i + 1
+        if time.time() >= next_print:
+            print('{} seconds passed, playbook state is {}'.format(int(time.time() - run_start), playbook_state))
+            next_print += DEFAULT_INTERVAL
 
-    __disable_integrations_instances(client, module_instances)
+    teardown_start = time.time()
+    timings['run'] = teardown_start - run_start
 
     test_pass = playbook_state == PB_Status.COMPLETED or playbook_state == PB_Status.NOT_SUPPORTED_VERSION
     if test_pass:
         # delete incident
         __delete_incident(client, incident)
 
-        # delete integration instance
-        __delete_integrations_instances(client, module_instances)
+        if reuse_instances:
+            # keep the integration instances for the next test
+            with INSTANCES_POOL_LOCK:
+                INSTANCES_POOL.update(zip(instances_keys, module_instances))
+        else:
+            # delete integration instance
+            __disable_integrations_instances(client, module_instances)
+            __delete_integrations_instances(client, module_instances)
+    else:
+        __disable_integrations_instances(client, module_instances)
 
+    timings['teardown'] = time.time() - teardown_start
     return playbook_state, inc_id
 
 
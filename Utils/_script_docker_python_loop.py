@@ -2,7 +2,11 @@ import os
 import threading
 import sys
 import json
+import time
+import hashlib
+import importlib
 import traceback
+from collections import OrderedDict
 
 if sys.version_info[0] < 3:
     import Queue as queue
@@ -65,9 +69,7 @@ class Demisto:
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__protocol'].log({'type': 'entryLog', 'args': {'message': msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -121,12 +123,12 @@ class Demisto:
     def info(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'info', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'info', 'args': argsObj})
 
     def error(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'error', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'error', 'args': argsObj})
 
     def exception(self, ex):
         return self.__do({'type': 'exception', 'command': 'exception', 'args': ex})
@@ -134,7 +136,7 @@ class Demisto:
     def debug(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'debug', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'debug', 'args': argsObj})
 
     def getAllSupportedCommands(self):
         return self.__do({'type': 'getAllModulesSupportedCmds'})
@@ -150,18 +152,8 @@ class Demisto:
 
     def __do(self, cmd):
         # Watch out there is another defintion like this
-        # prepare command to send to server
-        json.dump(cmd, sys.stdout)
-        sys.stdout.write('\\n')
-
-        # send command to Demisto server
-        sys.stdout.flush()
-
-        # wait to receive response from Demisto server
-        data = globals()['__readWhileAvailable']()
-        if data.find('$$##') > -1:
-            raise ValueError(data[4:])
-        return json.loads(data)
+        # send command to Demisto server and wait to receive its response
+        return globals()['__protocol'].request(cmd)
 
 
     def convert(self, results):
@@ -189,9 +181,7 @@ class Demisto:
         else:
             res.append(converted)
 
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__protocol'].send({'type': 'result', 'results': res})
 
 demisto = Demisto(context)
 
@@ -234,9 +224,7 @@ class Demisto:
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__protocol'].log({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -299,17 +287,17 @@ class Demisto:
     def info(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'info', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'info', 'args': argsObj})
 
     def error(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'error', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'error', 'args': argsObj})
 
     def debug(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'debug', 'args': argsObj})
+        globals()['__protocol'].log({'type': 'log', 'command': 'debug', 'args': argsObj})
 
     def gets(self, obj, field):
         return str(self.get(obj, field))
@@ -325,13 +313,7 @@ class Demisto:
 
     def __do(self, cmd):
         # Watch out there is another defintion like this
-        json.dump(cmd, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
-        data = globals()['__readWhileAvailable']()
-        if data.find('$$##') > -1:
-            raise ValueError(data[4:])
-        return json.loads(data)
+        return globals()['__protocol'].request(cmd)
 
     def __convert(self, results):
         """ Convert whatever result into entry """
@@ -356,9 +338,7 @@ class Demisto:
             res = converted
         else:
             res.append(converted)
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__protocol'].send({'type': 'result', 'results': res})
 
     def incidents(self, incidents):
         self.results({'Type': 1, 'Contents': json.dumps(incidents), 'ContentsFormat': 'json'})
@@ -392,26 +372,169 @@ print = demisto_print
 # delete home dir and tmp dir
 
 
+# number of compiled scripts to keep, the same scripts run again and again in a warm container
+CODE_CACHE_SIZE = int(os.environ.get('DEMISTO_PYTHON_CODE_CACHE_SIZE', '32'))
+__code_cache = OrderedDict()
+
+
+def get_compiled_code(code_string, is_integ_script):
+    """Returns the compiled code of the script within its template, and whether it was taken from the cache"""
+    key = (is_integ_script, hashlib.sha1(code_string.encode('utf-8')).hexdigest())
+    code = __code_cache.pop(key, None)
+    if code is not None:
+        __code_cache[key] = code  # most recently used is last
+        return code, True
+
+    if is_integ_script:
+        complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
+    else:
+        complete_code = template_code.replace('###CODE_HERE###', code_string)
+
+    code = compile(complete_code, '<string>', 'exec')
+    if CODE_CACHE_SIZE > 0:
+        __code_cache[key] = code
+        while len(__code_cache) > CODE_CACHE_SIZE:
+            __code_cache.popitem(last=False)
+
+    return code, False
+
+
+# import heavy modules once per container, so every script starts with them in sys.modules
+# comma separated module names, e.g. DEMISTO_PYTHON_PRELOAD_MODULES=requests,dateparser
+def preload_modules():
+    for module_name in os.environ.get('DEMISTO_PYTHON_PRELOAD_MODULES', '').split(','):
+        module_name = module_name.strip()
+        if module_name:
+            try:
+                importlib.import_module(module_name)
+            except Exception:
+                pass  # the script will fail on its own import if it needs the module
+
+
+class LineProtocol(object):
+    """The default protocol of a script run: every message is a json line,
+    and every request and log waits for a response line from the server"""
+    name = 'line'
+
+    def __init__(self, read_input):
+        self.read_input = read_input
+
+    def send(self, msg):
+        json.dump(msg, sys.stdout)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+    def log(self, msg):
+        if msg['type'] == 'log':
+            self.request(msg)  # the server acknowledges logs
+        else:
+            self.send(msg)
+
+    def read_response(self):
+        return self.read_input()
+
+    def request(self, msg):
+        self.send(msg)
+        data = self.read_response()
+        if data.find('$$##') > -1:
+            raise ValueError(data[4:])
+        return json.loads(data)
+
+    def flush(self):
+        pass
+
+
+class FramedProtocol(LineProtocol):
+    """Length prefixed protocol of a script run, used when the server asks for it in the script context.
+
+    Every message is a frame: the length of the payload in a line, followed by the json payload (ascii only, so the
+    length is the same in characters and bytes). Logs are not acknowledged by the server, they are collected and sent
+    in a single 'batch' frame when the flush interval passed, or before any other message. A payload bigger than the
+    chunk size is sent in 'chunk' frames, which hold parts of the payload.
+    """
+    name = 'framed'
+
+    def __init__(self, read_input, flush_interval=None, chunk_size=None):
+        super(FramedProtocol, self).__init__(read_input)
+        if flush_interval is None:
+            flush_interval = float(os.environ.get('DEMISTO_PYTHON_LOG_FLUSH_INTERVAL', '0.5'))
+        if chunk_size is None:
+            chunk_size = int(os.environ.get('DEMISTO_PYTHON_FRAME_CHUNK_SIZE', str(1024 * 1024)))
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.pending_logs = []
+        self.last_flush = time.time()
+        self.chunk_id = 0
+
+    def write(self, msg):
+        payload = json.dumps(msg)
+        if len(payload) <= self.chunk_size:
+            sys.stdout.write('{}\n{}'.format(len(payload), payload))
+        else:
+            self.chunk_id += 1
+            for start in range(0, len(payload), self.chunk_size):
+                chunk = json.dumps({'type': 'chunk', 'id': self.chunk_id,
+                                    'last': start + self.chunk_size >= len(payload),
+                                    'data': payload[start:start + self.chunk_size]})
+                sys.stdout.write('{}\n{}'.format(len(chunk), chunk))
+        sys.stdout.flush()
+
+    def send(self, msg):
+        self.flush()
+        self.write(msg)
+
+    def log(self, msg):
+        self.pending_logs.append(msg)
+        if time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def read_response(self):
+        length = sys.stdin.readline()
+        if not length.strip():
+            raise EOFError('The server closed the input while waiting for a response')
+        return sys.stdin.read(int(length))
+
+    def flush(self):
+        self.last_flush = time.time()
+        if self.pending_logs:
+            batch = {'type': 'batch', 'messages': self.pending_logs}
+            self.pending_logs = []
+            self.write(batch)
+
+
+# the framed protocol reads exact lengths from stdin, which the windows input thread doesn't support
+SUPPORTED_PROTOCOLS = [LineProtocol.name] if win else [LineProtocol.name, FramedProtocol.name]
+
+
 # notifies demisto server that the current executed script is completed
 # and the process is ready to execute the next script
-def send_script_completed():
-    json.dump({'type': 'completed'}, sys.stdout)
+def send_script_completed(timing=None, framed_protocol=None):
+    completed = {'type': 'completed'}
+    if timing:
+        completed['timing'] = timing
+    if framed_protocol:
+        framed_protocol.send(completed)
+        return
+    json.dump(completed, sys.stdout)
     sys.stdout.write('\\n')
     sys.stdout.flush()
 
 
-def send_script_exception(exc_type, exc_value, exc_traceback):
+def send_script_exception(exc_type, exc_value, exc_traceback, framed_protocol=None):
     ex_string = traceback.format_exception(exc_type, exc_value, exc_traceback)
     if ex_string == 'None\n':
         ex_string = str(ex)
 
+    if framed_protocol:
+        framed_protocol.send({'type': 'exception', 'args': {'exception': ex_string}})
+        return
     json.dump({'type': 'exception', 'args': {'exception': ex_string}}, sys.stdout)
     sys.stdout.write('\\n')
     sys.stdout.flush()
 
 
 def send_pong():
-    json.dump({'type': 'pong'}, sys.stdout)
+    json.dump({'type': 'pong', 'protocols': SUPPORTED_PROTOCOLS}, sys.stdout)
     sys.stdout.write('\\n')
     sys.stdout.flush()
 
@@ -427,6 +550,8 @@ def do_ping_pong():
             return ping
 
 
+preload_modules()
+
 backup_env_vars = {}
 for key in os.environ.keys():
     backup_env_vars[key] = os.environ[key]
@@ -450,17 +575,20 @@ while True:
     contextJSON.pop('script', None)
 
     is_integ_script = contextJSON['integration']
-    complete_code = ''
-    if is_integ_script:
-        complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
-    else:
-        complete_code = template_code.replace('###CODE_HERE###', code_string)
+    framed_protocol = None
+    if contextJSON.get('protocol') == FramedProtocol.name and FramedProtocol.name in SUPPORTED_PROTOCOLS:
+        framed_protocol = FramedProtocol(__readWhileAvailable)
+    start_time = time.time()
+    compile_time = None
+    is_cached = False
 
     try:
-        code = compile(complete_code, '<string>', 'exec')
+        code, is_cached = get_compiled_code(code_string, is_integ_script)
+        compile_time = time.time()
 
         sub_globals = {
             '__readWhileAvailable': __readWhileAvailable,
+            '__protocol': framed_protocol or LineProtocol(__readWhileAvailable),
             'context': contextJSON,
             'win': win
         }
@@ -469,15 +597,21 @@ while True:
 
     except Exception as ex:
         exc_type, exc_value, exc_traceback = sys.exc_info()
-        send_script_exception(exc_type, exc_value, exc_traceback)
+        send_script_exception(exc_type, exc_value, exc_traceback, framed_protocol)
     except SystemExit:
         # print 'Will not stop on sys.exit(0)'
         pass
 
+    end_time = time.time()
+    timing = {'cached': is_cached, 'total_ms': round((end_time - start_time) * 1000, 2)}
+    if compile_time:
+        timing['compile_ms'] = round((compile_time - start_time) * 1000, 2)
+        timing['exec_ms'] = round((end_time - compile_time) * 1000, 2)
+
     rollback_system()
 
     # ping back to Demisto server that script is completed
-    send_script_completed()
+    send_script_completed(timing, framed_protocol)
 
     # if the script running on native python then terminate the process after finished the script
     is_python_native = contextJSON['native']
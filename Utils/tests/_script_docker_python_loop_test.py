@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import subprocess
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+LOOP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '_script_docker_python_loop.py')
+
+
+def load_loop_definitions():
+    """The loop starts serving scripts when it runs, so only its definitions (the code before the loop) run here"""
+    with open(LOOP_PATH) as loop_file:
+        source = loop_file.read()
+    namespace = {'__name__': 'docker_python_loop'}
+    exec(compile(source[:source.index('\npreload_modules()\n')], LOOP_PATH, 'exec'), namespace)
+    return namespace
+
+
+FramedProtocol = load_loop_definitions()['FramedProtocol']
+
+
+def parse_frames(data):
+    """Splits the output of the framed protocol to the json payloads of its frames"""
+    frames = []
+    while data:
+        length, data = data.split('\n', 1)
+        frames.append(json.loads(data[:int(length)]))
+        data = data[int(length):]
+    return frames
+
+
+def test_framed_protocol_round_trip(mocker):
+    mocker.patch.object(sys, 'stdout', StringIO())
+    protocol = FramedProtocol(None, flush_interval=10, chunk_size=1024)
+    msg = {'type': 'executeCommand', 'command': 'getList', 'args': {'listName': 'list'}}
+    protocol.send(msg)
+    output = sys.stdout.getvalue()
+    assert output == '{}\n{}'.format(len(json.dumps(msg)), json.dumps(msg))
+
+    # the responses of the server are framed the same way
+    mocker.patch.object(sys, 'stdin', StringIO(output + output))
+    assert json.loads(protocol.read_response()) == msg
+    assert json.loads(protocol.read_response()) == msg
+
+
+def test_framed_protocol_closed_input(mocker):
+    mocker.patch.object(sys, 'stdin', StringIO(''))
+    protocol = FramedProtocol(None, flush_interval=10, chunk_size=1024)
+    try:
+        protocol.read_response()
+        assert False, 'Expected an EOFError when the server closed the input'
+    except EOFError:
+        pass
+
+
+def test_framed_protocol_chunks(mocker):
+    mocker.patch.object(sys, 'stdout', StringIO())
+    protocol = FramedProtocol(None, flush_interval=10, chunk_size=100)
+    msg = {'type': 'result', 'results': 'x' * 250}
+    protocol.send(msg)
+    protocol.send(msg)
+
+    frames = parse_frames(sys.stdout.getvalue())
+    assert all(frame['type'] == 'chunk' and len(frame['data']) <= 100 for frame in frames)
+    for chunk_id in (1, 2):
+        chunks = [frame for frame in frames if frame['id'] == chunk_id]
+        assert [frame['last'] for frame in chunks] == [False] * (len(chunks) - 1) + [True]
+        assert json.loads(''.join(frame['data'] for frame in chunks)) == msg
+
+
+def test_framed_protocol_log_batches(mocker):
+    mocker.patch.object(sys, 'stdout', StringIO())
+    protocol = FramedProtocol(None, flush_interval=10, chunk_size=1024)
+    logs = [{'type': 'log', 'command': 'info', 'args': {'message': 'log {}'.format(i)}} for i in range(3)]
+    for log in logs:
+        protocol.log(log)
+    # the logs wait for the flush interval
+    assert sys.stdout.getvalue() == ''
+
+    # and are flushed before any other message
+    result = {'type': 'result', 'results': 'done'}
+    protocol.send(result)
+    assert parse_frames(sys.stdout.getvalue()) == [{'type': 'batch', 'messages': logs}, result]
+
+    # once the flush interval passed, a log is flushed right away
+    sys.stdout.truncate(0)
+    sys.stdout.seek(0)
+    protocol.flush_interval = 0
+    protocol.log(logs[0])
+    assert parse_frames(sys.stdout.getvalue()) == [{'type': 'batch', 'messages': logs[:1]}]
+
+
+def test_framed_protocol_negotiation():
+    env = dict(os.environ, DEMISTO_PYTHON_FRAME_CHUNK_SIZE='100')
+    process = subprocess.Popen([sys.executable, LOOP_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    context = {'script': "demisto.info('a log')\ndemisto.results('x' * 250)", 'integration': False, 'native': False,
+               'args': {}, 'context': {}, 'protocol': 'framed'}
+    output, _ = process.communicate(('ping\n' + json.dumps(context) + '\n').encode('utf-8'))
+    output = output.decode('utf-8')
+
+    # the pong is a json line (ended by an escaped new line), which advertises the supported protocols
+    pong, end = json.JSONDecoder().raw_decode(output)
+    assert pong == {'type': 'pong', 'protocols': ['line', 'framed']}
+    assert output[end:end + 2] == '\\n'
+
+    # the server asked for the framed protocol, so the script messages are frames
+    messages = []
+    chunks = []
+    for frame in parse_frames(output[end + 2:]):
+        if frame['type'] == 'chunk':
+            chunks.append(frame['data'])
+            if frame['last']:
+                messages.append(json.loads(''.join(chunks)))
+                chunks = []
+        elif frame['type'] == 'batch':
+            messages.extend(frame['messages'])
+        else:
+            messages.append(frame)
+
+    assert [msg['type'] for msg in messages] == ['log', 'result', 'completed']
+    assert messages[0]['args'] == {'args': ['a log']}
+    assert messages[1]['results'][0]['Contents'] == 'x' * 250
@@ -1,10 +1,16 @@
 import os
+import re
+import io
 import sys
+import time
 import yaml
 import json
 import glob
 import shutil
 import zipfile
+import threading
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
 
 from package_creator import DIR_TO_PREFIX, merge_script_package_to_yml
 
@@ -13,14 +19,18 @@ CONTENT_DIRS = ['Integrations', 'Misc', 'Playbooks', 'Reports', 'Dashboards', 'W
 
 TEST_DIR = 'TestPlaybooks'
 
-# temp folder names
+# bundle names
 BUNDLE_PRE = 'bundle_pre'
 BUNDLE_POST = 'bundle_post'
 BUNDLE_TEST = 'bundle_test'
-# zip files names (the extension will be added later - shutil demands file name without extension)
+# zip files names (without extension)
 ZIP_PRE = 'content_yml'
 ZIP_POST = 'content_new'
 ZIP_TEST = 'content_test'
+BUNDLE_TO_ZIP = OrderedDict([(BUNDLE_PRE, ZIP_PRE), (BUNDLE_POST, ZIP_POST), (BUNDLE_TEST, ZIP_TEST)])
+
+# a top level fromversion key, at the beginning of a line
+FROM_VERSION_REGEX = re.compile(r'^fromversion:(.*)$', re.MULTILINE)
 
 
 def is_ge_version(ver1, ver2):
@@ -38,15 +48,24 @@ def is_ge_version(ver1, ver2):
     return len(ver1) <= len(ver2)
 
 
-def add_tools_to_bundle(bundle):
+def create_tools_zips():
+    """Create the zip of each tool, to be added to every bundle
+
+    Returns:
+        list -- (zip name, zip content) pairs
+    """
+    tools_zips = []
     for d in glob.glob(os.path.join('Tools', '*')):
-        zipf = zipfile.ZipFile(os.path.join(bundle, 'tools-%s.zip' % (os.path.basename(d), )), 'w',
-                               zipfile.ZIP_DEFLATED)
+        zip_content = io.BytesIO()
+        zipf = zipfile.ZipFile(zip_content, 'w', zipfile.ZIP_DEFLATED)
         zipf.comment = '{ "system": true }'
         for root, _, files in os.walk(d):
             for file in files:
                 zipf.write(os.path.join(root, file), file)
         zipf.close()
+        tools_zips.append(('tools-%s.zip' % (os.path.basename(d), ), zip_content.getvalue()))
+
+    return tools_zips
 
 
 # modify incident fields file to contain only `incidentFields` field (array)
@@ -63,113 +82,183 @@ def convert_incident_fields_to_array():
                 f.truncate()
 
 
-def copy_dir_yml(dir_name, version_num, bundle_pre, bundle_post, bundle_test):
+def get_from_version(path):
+    """Read the fromversion of a yml file, without loading the whole file
+
+    Arguments:
+        path {string} -- path to the yml file
+
+    Returns:
+        the fromversion value, as yaml would load it ('0' if missing)
+    """
+    with open(path, 'r') as f:
+        match = FROM_VERSION_REGEX.search(f.read())
+    if not match:
+        return '0'
+    # load only the value, so it is parsed (quotes, numbers) exactly as when loading the whole yml
+    ver = yaml.safe_load(match.group(1))
+    return '' if ver is None else ver
+
+
+def add_dir_yml(dir_name, version_num, bundles):
     scan_files = glob.glob(os.path.join(dir_name, '*.yml'))
     post_files = 0
     for path in scan_files:
-        with open(path, 'r') as f:
-            yml_info = yaml.safe_load(f)
-
-        ver = yml_info.get('fromversion', '0')
+        ver = get_from_version(path)
         if ver == '' or is_ge_version(version_num, ver):
             print ' - marked as post: %s (%s)' % (ver, path, )
-            shutil.copyfile(path, os.path.join(bundle_post, os.path.basename(path)))
-            shutil.copyfile(path, os.path.join(bundle_test, os.path.basename(path)))
+            bundles[BUNDLE_POST][os.path.basename(path)] = path
+            bundles[BUNDLE_TEST][os.path.basename(path)] = path
             post_files += 1
         else:
             # add the file to both bundles
             print ' - marked as pre: %s (%s)' % (ver, path, )
-            shutil.copyfile(path, os.path.join(bundle_pre, os.path.basename(path)))
-            shutil.copyfile(path, os.path.join(bundle_post, os.path.basename(path)))
+            bundles[BUNDLE_PRE][os.path.basename(path)] = path
+            bundles[BUNDLE_POST][os.path.basename(path)] = path
 
     print ' - total post files: %d' % (post_files, )
 
 
-def copy_dir_json(dir_name, version_num, bundle_pre, bundle_post, bundle_test):
+def add_dir_json(dir_name, version_num, bundles):
     # handle *.json files
     scan_files = glob.glob(os.path.join(dir_name, '*.json'))
     for path in scan_files:
         dpath = os.path.basename(path)
-        shutil.copyfile(path, os.path.join(bundle_pre, os.path.basename(path)))
+        bundles[BUNDLE_PRE][os.path.basename(path)] = path
         # this part is a workaround because server doesn't support indicatorfield-*.json naming
-        shutil.copyfile(path, os.path.join(bundle_test, os.path.basename(path)))
+        bundles[BUNDLE_TEST][os.path.basename(path)] = path
         if dir_name == 'IndicatorFields':
             new_path = dpath.replace('incidentfield-', 'incidentfield-indicatorfield-')
             if os.path.isfile(new_path):
                 raise NameError('Failed while trying to create {}. File already exists.'.format(new_path))
             dpath = new_path
-        shutil.copyfile(path, os.path.join(bundle_post, dpath))
-        shutil.copyfile(path, os.path.join(bundle_pre, dpath))
-        shutil.copyfile(path, os.path.join(bundle_test, dpath))
+        bundles[BUNDLE_POST][dpath] = path
+        bundles[BUNDLE_PRE][dpath] = path
+        bundles[BUNDLE_TEST][dpath] = path
 
 
-def copy_dir_files(*args):
+def add_dir_files(*args):
     # handle *.json files
-    copy_dir_json(*args)
+    add_dir_json(*args)
     # handle *.yml files
-    copy_dir_yml(*args)
+    add_dir_yml(*args)
 
 
-def copy_test_files(bundle_test):
-    print 'copying test files to test bundle'
+def add_test_files(bundles):
+    print 'adding test files to test bundle'
     scan_files = glob.glob(os.path.join(TEST_DIR, '*'))
     for path in scan_files:
         if os.path.isdir(path):
             NonCircleTests = glob.glob(os.path.join(path, '*'))
             for new_path in NonCircleTests:
-                print "copying path %s" % (new_path,)
-                shutil.copyfile(new_path, os.path.join(bundle_test, os.path.basename(new_path)))
+                print "adding path %s" % (new_path,)
+                bundles[BUNDLE_TEST][os.path.basename(new_path)] = new_path
 
         else:
-            print "copying path %s" % (path,)
-            shutil.copyfile(path, os.path.join(bundle_test, os.path.basename(path)))
+            print "adding path %s" % (path,)
+            bundles[BUNDLE_TEST][os.path.basename(path)] = path
+
+
+def merge_package(package_and_dir):
+    package, dir_name = package_and_dir
+    return merge_script_package_to_yml(package, dir_name)[0]
+
+
+def merge_packages():
+    packages = []
+    for d in DIR_TO_PREFIX.keys():
+        packages.extend((package, d) for package in glob.glob(os.path.join(d, '*/')))
+
+    pool = Pool(processes=cpu_count())
+    try:
+        pool.map(merge_package, packages)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def write_bundle_zip(zip_path, files, tools_zips):
+    zipf = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED)
+    try:
+        for zip_name, zip_content in tools_zips:
+            zipf.writestr(zip_name, zip_content)
+        for arc_name, path in files.items():
+            zipf.write(path, arc_name)
+    finally:
+        zipf.close()
+
+
+def write_bundle_zips(bundles, tools_zips):
+    errors = []
+
+    def write_zip(bundle):
+        try:
+            write_bundle_zip(BUNDLE_TO_ZIP[bundle] + '.zip', bundles[bundle], tools_zips)
+        except Exception as ex:
+            errors.append(ex)
+
+    # compression releases the GIL, so each bundle is written by its own thread
+    threads = [threading.Thread(target=write_zip, args=(b, )) for b in bundles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
 
 
 def main(circle_artifacts):
     print 'starting create content artifact ...'
+    stage_times = OrderedDict()
+    stage_start = time.time()
 
     # version that separate post bundle from pre bundle
     # e.i. any yml with "fromversion" of <version_num> or more will be only on post bundle
     version_num = "3.5"
 
-    print 'creating dir for bundles ...'
-    for b in [BUNDLE_PRE, BUNDLE_POST, BUNDLE_TEST]:
-        os.mkdir(b)
-        add_tools_to_bundle(b)
+    # files of each bundle, by their name in the bundle zip
+    bundles = OrderedDict((b, OrderedDict()) for b in BUNDLE_TO_ZIP)
+    tools_zips = create_tools_zips()
 
     convert_incident_fields_to_array()
+    stage_times['tools and incident fields'] = time.time() - stage_start
+    stage_start = time.time()
 
-    for d in DIR_TO_PREFIX.keys():
-        scanned_packages = glob.glob(os.path.join(d, '*/'))
-        for package in scanned_packages:
-            merge_script_package_to_yml(package, d)
+    print 'merging packages ...'
+    merge_packages()
+    stage_times['merge packages'] = time.time() - stage_start
+    stage_start = time.time()
 
     for d in CONTENT_DIRS:
-        print 'copying dir %s to bundles ...' % (d,)
-        copy_dir_files(d, version_num, BUNDLE_PRE, BUNDLE_POST, BUNDLE_TEST)
+        print 'adding dir %s to bundles ...' % (d,)
+        add_dir_files(d, version_num, bundles)
 
-    copy_test_files(BUNDLE_TEST)
+    add_test_files(bundles)
 
-    print 'copying content descriptor to bundles'
-    for b in [BUNDLE_PRE, BUNDLE_POST, BUNDLE_TEST]:
-        shutil.copyfile('content-descriptor.json', os.path.join(b, 'content-descriptor.json'))
-
-    print 'copying common server doc to bundles'
-    for b in [BUNDLE_PRE, BUNDLE_POST, BUNDLE_TEST]:
-        shutil.copyfile('./Documentation/doc-CommonServer.json', os.path.join(b, 'doc-CommonServer.json'))
+    print 'adding content descriptor and common server doc to bundles'
+    for b in bundles:
+        bundles[b]['content-descriptor.json'] = 'content-descriptor.json'
+        bundles[b]['doc-CommonServer.json'] = './Documentation/doc-CommonServer.json'
+    stage_times['scan files'] = time.time() - stage_start
+    stage_start = time.time()
 
     print 'compressing bundles ...'
-    shutil.make_archive(ZIP_POST, 'zip', BUNDLE_POST)
-    shutil.make_archive(ZIP_PRE, 'zip', BUNDLE_PRE)
-    shutil.make_archive(ZIP_TEST, 'zip', BUNDLE_TEST)
+    write_bundle_zips(bundles, tools_zips)
+    stage_times['compress bundles'] = time.time() - stage_start
+    stage_start = time.time()
+
     shutil.copyfile(ZIP_PRE + '.zip', os.path.join(circle_artifacts, ZIP_PRE + '.zip'))
     shutil.copyfile(ZIP_POST + '.zip', os.path.join(circle_artifacts, ZIP_POST + '.zip'))
     shutil.copyfile(ZIP_TEST + '.zip', os.path.join(circle_artifacts, ZIP_TEST + '.zip'))
     shutil.copyfile("./Tests/id_set.json", os.path.join(circle_artifacts, "id_set.json"))
 
     shutil.copyfile('release-notes.md', os.path.join(circle_artifacts, 'release-notes.md'))
+    stage_times['copy artifacts'] = time.time() - stage_start
 
     print 'finished create content artifact at %s' % (circle_artifacts, )
+    for stage, stage_time in stage_times.items():
+        print ' - %s: %.2f seconds' % (stage, stage_time, )
 
 
 def test_version_compare(version_num):
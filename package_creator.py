@@ -4,8 +4,10 @@ import os
 import io
 import sys
 import glob
+import json
 import yaml
 import base64
+import hashlib
 import argparse
 import re
 
@@ -22,14 +24,20 @@ TYPE_TO_EXTENSION = {
 
 IMAGE_PREFIX = 'data:image/png;base64,'
 
+# changes in this file may change the unified ymls, so they invalidate the cache
+PACKAGE_CREATOR_PATH = os.path.abspath(__file__).replace('.pyc', '.py')
+# unified ymls of unchanged packages are taken from here, by the hash of the package sources
+UNIFY_CACHE_DIR = os.path.join(os.path.dirname(PACKAGE_CREATOR_PATH), 'Tests', 'unify_cache')
 
-def merge_script_package_to_yml(package_path, dir_name, dest_path=""):
+
+def merge_script_package_to_yml(package_path, dir_name, dest_path="", use_cache=True):
     """Merge the various components to create an output yml file
 
     Args:
         package_path (str): Directory containing the various files
         dir_name (str): Parent directory containing package (Scripts/Integrations)
         dest_path (str, optional): Defaults to "". Destination output
+        use_cache (bool, optional): Defaults to True. Take the output of an unchanged package from the unify cache
 
     Returns:
         output path, script path, image path
@@ -41,6 +49,24 @@ def merge_script_package_to_yml(package_path, dir_name, dest_path=""):
     else:
         output_path = os.path.join(dir_name, output_filename)
 
+    yml_path = get_yml_path(package_path)
+    cache_path = None
+    unified = None
+    if use_cache:
+        cache_path = os.path.join(UNIFY_CACHE_DIR, get_unify_cache_key(package_path, dir_name, yml_path) + '.json')
+        unified = load_unified_from_cache(cache_path)
+
+    if unified is None:
+        unified = unify_package(package_path, dir_name, yml_path)
+        if cache_path:
+            save_unified_to_cache(cache_path, unified)
+
+    with io.open(output_path, mode='w', encoding='utf-8') as f:
+        f.write(unified['yml_text'])
+    return output_path, yml_path, unified['script_path'], unified['image_path'], unified['desc_path']
+
+
+def get_yml_path(package_path):
     yml_paths = glob.glob(package_path + '*.yml')
     yml_path = yml_paths[0]
     for path in yml_paths:
@@ -52,6 +78,20 @@ def merge_script_package_to_yml(package_path, dir_name, dest_path=""):
             yml_path = path
             break
 
+    return yml_path
+
+
+def unify_package(package_path, dir_name, yml_path):
+    """Create the unified yml text of a package
+
+    Args:
+        package_path (str): Directory containing the various files
+        dir_name (str): Parent directory containing package (Scripts/Integrations)
+        yml_path (str): The yml file of the package
+
+    Returns:
+        dict. The unified yml text, and the script, image and description paths
+    """
     with open(yml_path, 'r') as yml_file:
         yml_data = yaml.safe_load(yml_file)
 
@@ -70,9 +110,72 @@ def merge_script_package_to_yml(package_path, dir_name, dest_path=""):
         yml_text, image_path = insert_image_to_yml(dir_name, package_path, yml_data, yml_text)
         yml_text, desc_path = insert_description_to_yml(dir_name, package_path, yml_data, yml_text)
 
-    with io.open(output_path, mode='w', encoding='utf-8') as f:
-        f.write(yml_text)
-    return output_path, yml_path, script_path, image_path, desc_path
+    return {
+        'yml_text': yml_text,
+        'script_path': script_path,
+        'image_path': image_path,
+        'desc_path': desc_path
+    }
+
+
+def get_unify_cache_key(package_path, dir_name, yml_path):
+    """Hash the sources of a package: the yml, code, image and description files
+
+    Args:
+        package_path (str): Directory containing the various files
+        dir_name (str): Parent directory containing package (Scripts/Integrations)
+        yml_path (str): The yml file of the package
+
+    Returns:
+        str. Hex digest of the package sources
+    """
+    source_paths = [yml_path]
+    for script_type in sorted(TYPE_TO_EXTENSION.values()):
+        try:
+            source_paths.append(get_code_file(package_path, script_type))
+        except IndexError:
+            pass
+    source_paths.extend(glob.glob(package_path + '*png'))
+    source_paths.extend(glob.glob(package_path + '*_description.md'))
+
+    sha1 = hashlib.sha1()
+    with open(PACKAGE_CREATOR_PATH, 'rb') as creator_file:
+        sha1.update(creator_file.read())
+    sha1.update(package_path.encode('utf-8'))
+    sha1.update(dir_name.encode('utf-8'))
+    for source_path in source_paths:
+        sha1.update(source_path.encode('utf-8'))
+        with open(source_path, 'rb') as source_file:
+            sha1.update(source_file.read())
+
+    return sha1.hexdigest()
+
+
+def load_unified_from_cache(cache_path):
+    if not os.path.isfile(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r') as cache_file:
+            return json.load(cache_file)
+    except ValueError:
+        print("The unify cache of {} is corrupted, ignoring it".format(cache_path))
+        return None
+
+
+def save_unified_to_cache(cache_path, unified):
+    if not os.path.isdir(UNIFY_CACHE_DIR):
+        try:
+            os.makedirs(UNIFY_CACHE_DIR)
+        except OSError:
+            # created by another process
+            if not os.path.isdir(UNIFY_CACHE_DIR):
+                raise
+
+    # packages may be merged in parallel, so the entry is renamed into place only when it is complete
+    temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    with open(temp_path, 'w') as cache_file:
+        json.dump(unified, cache_file)
+    os.rename(temp_path, cache_path)
 
 
 def insert_image_to_yml(dir_name, package_path, yml_data, yml_text):
@@ -201,9 +304,11 @@ def get_package_path():
     parser = argparse.ArgumentParser(description='Utility merging package yml with its code into one yml file')
     parser.add_argument('-p', '--packagePath', help='Path to the package', required=True)
     parser.add_argument('-d', '--destPath', help='Destination directory path for the result yml', default="")
+    parser.add_argument('-n', '--noCache', action='store_true', help='Merge the package without the unify cache')
     options = parser.parse_args()
     package_path = options.packagePath
     dest_path = options.destPath
+    use_cache = not options.noCache
     if package_path[-1] != '/':
         package_path = package_path + '/'
 
@@ -217,10 +322,10 @@ def get_package_path():
               "should contain either Integrations or Scripts directories")
         sys.exit(1)
 
-    return package_path, directory_name, dest_path
+    return package_path, directory_name, dest_path, use_cache
 
 
 if __name__ == "__main__":
-    package_path, dir_name, dest_path = get_package_path()
-    output, yml, script, image, desc = merge_script_package_to_yml(package_path, dir_name, dest_path)
+    package_path, dir_name, dest_path, use_cache = get_package_path()
+    output, yml, script, image, desc = merge_script_package_to_yml(package_path, dir_name, dest_path, use_cache)
     print("Done creating: {}, from: {}, {}, {}".format(output, yml, script, image))